@@ -0,0 +1,6 @@
+# bench/instrument.py
+
+# The profiler lives in the top-level instrument module, so that storage,
+# model and eval do not depend on bench; re-exported for benchmark code.
+from instrument import (DEFAULT_TRACE, ENV_VAR, MAX_EVENTS, PROFILER, SAMPLE_INTERVAL, TRACE_ENV_VAR, Profiler,
+                        add_profile_args, count, current_rss, setup_profiling, stage)
@@ -0,0 +1,233 @@
+# bench/suite.py
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from eval.backtest import backtest_batch, backtest_one
+from eval.simulate import simulate_frame
+from model.baseline import predict_all, predict_matrix, price_matrix
+from model.data_health import compute_health, health_report
+from model.echo import echo_ranking, returns_frame
+from storage.loader import load_dataframe, resample_frame
+from storage.coverage import Coverage
+from storage.price_store import convert_jsonl
+from storage.ring import PriceRing
+
+REPORT_VERSION = 1
+METHODS = ["last", "mean", "linear", "momentum_wave"]
+STARTUP_COMMANDS = ["health", "baseline"]  # CLI commands whose cold start is timed
+CHART_FRAMES = 10  # Live chart updates per timed run
+SIM_THRESHOLDS = np.linspace(0, 0.01, 101)  # Thresholds simulated in one batch
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COMPARE_COLUMNS = ["stage", "baseline", "current", "change", "status"]
+
+def measure(fn, repeat: int = 3, setup=None) -> dict:
+    """
+    Time `fn` `repeat` times (calling `setup` untimed before each run).
+    """
+    runs = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"best": min(runs), "median": statistics.median(runs), "runs": len(runs)}
+
+def startup(command: str) -> None:
+    """
+    Cold start of one CLI command: a fresh interpreter importing it and
+    printing its help.
+    """
+    subprocess.run([sys.executable, "-m", "runners", command, "--help"], cwd=ROOT,
+                   stdout=subprocess.DEVNULL, check=True)
+
+def chart_frames(series_dict: dict[str, pd.Series], hours: int, frames: int = CHART_FRAMES) -> list[tuple]:
+    """
+    Live chart inputs for `frames` updates of an `hours` window sliding one
+    minute per update over the end of the data, normalized as runners.load
+    does.
+    """
+    end = max(s.index[-1] for s in series_dict.values())
+    out = []
+    for i in range(frames - 1, -1, -1):
+        end_time = end - pd.Timedelta(minutes=i)
+        sliced = {}
+        for coin, s in series_dict.items():
+            s = s[end_time - pd.Timedelta(hours=hours):end_time]
+            if not s.empty:
+                sliced[coin] = s / s.iloc[0] - 1
+        out.append((sliced, end_time))
+    return out
+
+def render_chart(frames: list[tuple], reference: str, hours: int, render: str) -> None:
+    """
+    Headless (Agg) live chart: a new figure, then one update per frame.
+    """
+    # Imported here: only this stage needs matplotlib
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from view.chart import make_chart
+
+    fig = Figure(figsize=(14, 6))
+    FigureCanvasAgg(fig)
+    chart = make_chart(fig, fig.add_subplot(), hours, render=render)
+    none = pd.DatetimeIndex([])
+    for sliced, end_time in frames:
+        sliced = {"bitcoin": sliced[reference], **{c: s for c, s in sliced.items() if c != reference}}
+        chart.update(sliced, none, none, None, end_time)
+
+def build_coverage(df: pd.DataFrame) -> dict[str, Coverage]:
+    ts = df.index.asi8
+    coverages = {}
+    for col in df.columns:
+        if col.startswith("prices.") and col.endswith(".usd"):
+            coverage = coverages[col.split(".")[1]] = Coverage()
+            coverage.extend(ts, df[col].to_numpy(dtype=float))
+    return coverages
+
+def run_suite(
+    logfile: str,
+    workdir: str,
+    repeat: int = 3,
+    methods: list[str] = METHODS,
+    reference: str = "bitcoin",
+    hours: int = 24,
+    echo_hours: int = 3,
+    on_stage=None
+) -> dict[str, dict]:
+    """
+    Time every pipeline stage on one JSONL log:
+
+        startup.<command>, load.jsonl, store.convert, load.store, resample,
+        predict_all.<method>.<horizon>, predict_matrix, backtest_one.<method>,
+        backtest_batch.<method>, simulate, compute_health, coverage.build,
+        health_report, echo_ranking,
+        chart.<render>, ring.build, ring.matrix
+
+    Backtests run on `reference` over the last `hours`. Stages that need the
+    output of an earlier one reuse it rather than timing it again.
+    `on_stage(name, result)` is called as each stage finishes.
+
+    Returns:
+        {stage: {"best": s, "median": s, "runs": n}}
+    """
+    results = {}
+
+    def stage(name, fn, setup=None):
+        results[name] = measure(fn, repeat=repeat, setup=setup)
+        if on_stage is not None:
+            on_stage(name, results[name])
+
+    for command in STARTUP_COMMANDS:
+        stage(f"startup.{command}", lambda: startup(command))
+
+    stage("load.jsonl", lambda: load_dataframe(logfile))
+
+    store_dir = os.path.join(workdir, "bench.store")
+    stage("store.convert", lambda: convert_jsonl(logfile, store_dir),
+          setup=lambda: shutil.rmtree(store_dir, ignore_errors=True))
+    stage("load.store", lambda: load_dataframe(store_dir))
+
+    df = load_dataframe(store_dir)
+    stage("resample", lambda: resample_frame(df))
+    series_dict = resample_frame(df)
+
+    for method in methods:
+        for horizon in ("1h", "1d"):
+            stage(f"predict_all.{method}.{horizon}", lambda: predict_all(series_dict, horizon=horizon, method=method))
+    stage("predict_matrix", lambda: predict_matrix(price_matrix(series_dict), horizons=["1h", "1d"], methods=methods))
+
+    series = series_dict[reference]
+    series = series[series.index >= series.index[-1] - pd.Timedelta(hours=hours)]
+    for method in methods:
+        stage(f"backtest_one.{method}", lambda: backtest_one(series, horizon="1h", method=method))
+    for method in methods:
+        stage(f"backtest_batch.{method}", lambda: backtest_batch(series, horizon="1h", method=method))
+
+    signals = backtest_batch(series, horizon="1h", method="linear", step_minutes=1)
+    stage("simulate", lambda: simulate_frame(signals, thresholds=SIM_THRESHOLDS))
+
+    stage("compute_health", lambda: compute_health(df, hours=hours))
+    stage("coverage.build", lambda: build_coverage(df))
+    coverages = build_coverage(df)
+    stage("health_report", lambda: health_report(coverages, end=df.index[-1]))
+
+    end = max(s.index[-1] for s in series_dict.values())
+    recent = {coin: s[end - pd.Timedelta(hours=echo_hours):end] for coin, s in series_dict.items()}
+    stage("echo_ranking", lambda: echo_ranking(returns_frame(recent), reference=reference))
+
+    stage("ring.build", lambda: PriceRing.from_series_dict(series_dict))
+    ring = PriceRing.from_series_dict(series_dict)
+    stage("ring.matrix", lambda: predict_matrix(ring.matrix(), horizons=["1h", "1d"], methods=["linear"]))
+
+    frames = chart_frames(series_dict, echo_hours)
+    for render in ("full", "blit"):
+        stage(f"chart.{render}", lambda: render_chart(frames, reference, echo_hours, render))
+
+    return results
+
+def make_report(results: dict[str, dict], params: dict) -> dict:
+    return {
+        "version": REPORT_VERSION,
+        "created": datetime.utcnow().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+        },
+        "params": params,
+        "results": results,
+    }
+
+def save_report(report: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+def load_report(path: str) -> dict:
+    with open(path, "r") as f:
+        report = json.load(f)
+    if report.get("version") != REPORT_VERSION:
+        raise ValueError(f"Unsupported benchmark report version: {report.get('version')}")
+    return report
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25) -> pd.DataFrame:
+    """
+    Stage-by-stage comparison of two reports on their best times.
+
+    A stage is "slower" when it takes more than (1 + threshold) times the
+    baseline and "faster" when the baseline takes more than (1 + threshold)
+    times it. Stages only in one report are "new" or "removed".
+    """
+    cur, base = current["results"], baseline["results"]
+    rows = []
+    for name in list(base) + [n for n in cur if n not in base]:
+        b = base.get(name, {}).get("best")
+        c = cur.get(name, {}).get("best")
+        if b is None:
+            rows.append((name, None, c, None, "new"))
+            continue
+        if c is None:
+            rows.append((name, b, None, None, "removed"))
+            continue
+
+        ratio = c / b if b > 0 else float("inf")
+        if ratio > 1 + threshold:
+            status = "slower"
+        elif ratio < 1 / (1 + threshold):
+            status = "faster"
+        else:
+            status = "ok"
+        rows.append((name, b, c, ratio - 1, status))
+
+    return pd.DataFrame(rows, columns=COMPARE_COLUMNS)
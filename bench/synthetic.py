@@ -0,0 +1,67 @@
+# bench/synthetic.py
+
+import json
+import numpy as np
+from datetime import datetime, timedelta
+
+DEFAULT_COINS = [
+    "bitcoin", "ethereum", "litecoin", "binancecoin", "cardano",
+    "solana", "dogecoin", "shibainu", "polygon", "chainlink"
+]
+
+def generate_log(
+    path: str,
+    coins: list[str] = DEFAULT_COINS,
+    days: float = 2,
+    volatility: float = 0.001,
+    gap_rate: float = 0.001,
+    gap_minutes: int = 30,
+    drop_rate: float = 0.01,
+    jitter_seconds: int = 3,
+    end: datetime | None = None,
+    seed: int = 0
+) -> int:
+    """
+    Write a synthetic scan log in the crypto_prices_log.jsonl format.
+
+    Prices follow correlated geometric random walks (every coin shares a
+    market factor), sampled about once a minute with timestamp jitter.
+    Each minute may start an outage of up to `gap_minutes` with no records
+    (`gap_rate`), and each coin may be missing from a record (`drop_rate`),
+    as when the API omits it.
+
+    Returns:
+        Number of records written
+    """
+    rng = np.random.default_rng(seed)
+    minutes = int(days * 24 * 60)
+    end = end or datetime.utcnow()
+    start = end - timedelta(minutes=minutes)
+
+    # Log-returns: shared market move plus per-coin noise, with per-coin beta
+    beta = rng.uniform(0.5, 1.5, len(coins))
+    market = rng.normal(0, volatility, minutes)
+    own = rng.normal(0, volatility, (minutes, len(coins)))
+    prices = np.exp(np.cumsum(market[:, None] * beta + own, axis=0)) * rng.uniform(0.01, 50_000, len(coins))
+
+    offsets = rng.integers(-jitter_seconds, jitter_seconds + 1, minutes) if jitter_seconds else np.zeros(minutes, int)
+    present = rng.random((minutes, len(coins))) >= drop_rate
+
+    outage = np.zeros(minutes, dtype=bool)
+    for i in np.flatnonzero(rng.random(minutes) < gap_rate):
+        outage[i:i + int(rng.integers(1, gap_minutes + 1))] = True
+
+    written = 0
+    with open(path, "w") as f:
+        for i in range(minutes):
+            if outage[i]:
+                continue
+            ts = start + timedelta(minutes=i, seconds=int(offsets[i]))
+            record = {
+                "timestamp": ts.isoformat(),
+                "prices": {coin: {"usd": float(prices[i, j])} for j, coin in enumerate(coins) if present[i, j]}
+            }
+            f.write(json.dumps(record) + "\n")
+            written += 1
+
+    return written
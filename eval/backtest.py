@@ -1,9 +1,13 @@
 # eval/backtest.py
 
+import math
 import pandas as pd
 import numpy as np
 from typing import Callable, Literal
-from model.baseline import predict_next
+from instrument import count, stage
+from model.baseline import HORIZON_MINUTES, predict_next
+from model.ensemble import DEFAULT_ENSEMBLE, Ensemble, WindowFeatures
+from model.projection import rolling_linear_fit, rolling_mean
 
 Horizon = Literal["1h", "1d"]
 
@@ -12,41 +16,268 @@ def backtest_one(
     horizon: Horizon = "1h",
     method: str = "linear",
     step_minutes: int = 10,
-    lookback_minutes: int = 60
+    lookback_minutes: int = 60,
+    distance: int = 10,
+    ensemble: Ensemble | None = None
 ) -> pd.DataFrame:
     """
     Backtest a single price series using a rolling prediction.
 
+    With method="ensemble" (`ensemble`, default DEFAULT_ENSEMBLE) each
+    window's shared intermediates are computed once and every member is
+    scored in the same pass, in one predicted_<member> column each (see
+    member_scores).
+
     Returns:
-        DataFrame with columns: timestamp, prediction, actual, error, hit
+        DataFrame with columns: timestamp, predicted, actual, error, hit
     """
     freq = pd.Timedelta("1min")
     df = []
 
     timestamps = series.index
     delta = {"1h": pd.Timedelta("1h"), "1d": pd.Timedelta("1d")}[horizon]
+    ensemble = ensemble or DEFAULT_ENSEMBLE
 
-    for i in range(lookback_minutes, len(series) - int(delta.total_seconds() / 60), step_minutes):
-        window = series.iloc[i - lookback_minutes : i]
-        current_time = window.index[-1]
-        future_time = current_time + delta
+    with stage("backtest.loop"):
+        for i in range(lookback_minutes, len(series) - int(delta.total_seconds() / 60), step_minutes):
+            window = series.iloc[i - lookback_minutes : i]
+            current_time = window.index[-1]
+            future_time = current_time + delta
 
-        if future_time not in series.index:
-            continue
+            if future_time not in series.index:
+                continue
 
-        predicted_change = predict_next(window, horizon=horizon, method=method)
-        future_price = series[future_time]
-        current_price = window.iloc[-1]
-        actual_change = (future_price - current_price) / current_price
-        error = predicted_change - actual_change
-        hit = int(np.sign(predicted_change) == np.sign(actual_change) and predicted_change != 0)
-
-        df.append({
-            "timestamp": current_time,
-            "predicted": predicted_change,
-            "actual": actual_change,
-            "error": error,
-            "hit": hit,
-        })
+            members = {}
+            if method == "ensemble":
+                members = ensemble.predict_members(WindowFeatures(window, horizon=horizon, distance=distance))
+                predicted_change = ensemble.combine(members)
+            else:
+                predicted_change = predict_next(window, horizon=horizon, method=method, distance=distance)
+            future_price = series[future_time]
+            current_price = window.iloc[-1]
+            actual_change = (future_price - current_price) / current_price
+            error = predicted_change - actual_change
+            hit = int(np.sign(predicted_change) == np.sign(actual_change) and predicted_change != 0)
+
+            df.append({
+                "timestamp": current_time,
+                "predicted": predicted_change,
+                "actual": actual_change,
+                "error": error,
+                "hit": hit,
+                **{f"predicted_{m}": p for m, p in members.items()},
+            })
+    count("backtest.windows", len(df))
 
     return pd.DataFrame(df)
+
+MEMBER_COLUMNS = ["member", "points", "mae", "hit_rate"]
+
+def member_scores(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Points, MAE and hit rate of the ensemble and of each member from one
+    ensemble backtest_one run, read from its predicted_<member> columns.
+    """
+    rows = [("ensemble", len(df), df["error"].abs().mean(), df["hit"].mean())] if len(df) else []
+    for column in df.columns:
+        if not column.startswith("predicted_"):
+            continue
+        predicted, actual = df[column].to_numpy(dtype=float), df["actual"].to_numpy(dtype=float)
+        rows.append((column[len("predicted_"):], len(df), np.abs(predicted - actual).mean(),
+                     _hits(predicted, actual).mean()))
+    return pd.DataFrame(rows, columns=MEMBER_COLUMNS)
+
+RESULT_COLUMNS = ["timestamp", "predicted", "actual", "error", "hit"]
+
+class BacktestContext:
+    """
+    Parameter-independent arrays for backtesting one series on a regular
+    grid of 1-minute points or coarser bars: future returns per horizon,
+    rolling means and rolling regression fits per window width. Each is
+    computed once and shared by every (method, step, lookback, distance)
+    evaluated on the series.
+
+    Steps, lookbacks and horizons are given in minutes and converted to
+    bars. Window `end` covers values[end - lookback : end]; its last point
+    is end - 1.
+    """
+
+    def __init__(self, series: pd.Series):
+        freq = series.index.freq or series.index.inferred_freq
+        minute = pd.Timedelta("1min")
+        if freq is None or pd.Timedelta(freq) < minute or pd.Timedelta(freq) % minute:
+            raise ValueError("Backtests need a series on a regular grid of whole minutes.")
+
+        self.series = series
+        self.bar_minutes = int(pd.Timedelta(freq) // minute)
+        self.values = series.to_numpy(dtype=float)
+
+        self._means: dict[int, np.ndarray] = {}
+        self._returns: dict[int, np.ndarray] = {}
+        self._fits: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self._predictions: dict[tuple, dict[int, float]] = {}
+
+    def bars(self, minutes: int) -> int:
+        return minutes // self.bar_minutes
+
+    def ends(self, horizon: Horizon, step_minutes: int, lookback_minutes: int) -> np.ndarray:
+        h, lookback = self.bars(HORIZON_MINUTES[horizon]), self.bars(lookback_minutes)
+        if h == 0 or lookback == 0:
+            return np.empty(0, dtype=int)
+        return np.arange(lookback, len(self.values) - h, max(1, self.bars(step_minutes)))
+
+    def actual(self, horizon: Horizon, ends: np.ndarray) -> np.ndarray:
+        h = self.bars(HORIZON_MINUTES[horizon])
+        if h not in self._returns:
+            current = self.values[: len(self.values) - h]
+            self._returns[h] = (self.values[h:] - current) / current
+        return self._returns[h][ends - 1]
+
+    def predicted(self, method: str, horizon: Horizon, lookback_minutes: int,
+                  ends: np.ndarray, distance: int = 10, ensemble: Ensemble | None = None) -> np.ndarray:
+        if method == "ensemble":
+            # Members are cached per method, so scoring them too costs nothing extra
+            ensemble = ensemble or DEFAULT_ENSEMBLE
+            return ensemble.combine({m: self.predicted(m, horizon, lookback_minutes, ends, distance=distance)
+                                     for m in ensemble.members})
+
+        # predict_next only looks at the most recent `horizon` points of the window
+        lookback = self.bars(lookback_minutes)
+        width = min(self.bars(HORIZON_MINUTES[horizon]), lookback)
+        current = self.values[ends - 1]
+
+        if width < 2 or method == "last":
+            return np.zeros(len(ends))
+
+        if method == "mean":
+            if width not in self._means:
+                self._means[width] = rolling_mean(self.values, width)
+            mean = self._means[width][ends - width]
+            return (mean - current) / current
+
+        if method == "linear":
+            if width not in self._fits:
+                with stage("backtest.rolling_fit"):
+                    self._fits[width] = rolling_linear_fit(self.values, width)
+            slope, intercept = self._fits[width]
+            next_val = slope[ends - width] * width + intercept[ends - width]
+            return (next_val - current) / current
+
+        # No closed form: predict per window, remembering each window so
+        # other steps over the same lookback reuse it
+        cache = self._predictions.setdefault((method, horizon, lookback_minutes, distance), {})
+        with stage("backtest.predict_windows"):
+            missing = [end for end in ends if end not in cache]
+            for end in missing:
+                window = self.series.iloc[end - lookback : end]
+                cache[end] = predict_next(window, horizon=horizon, method=method, distance=distance)
+        count("backtest.windows", len(missing))
+        return np.array([cache[end] for end in ends], dtype=float)
+
+    def backtest(self, horizon: Horizon = "1h", method: str = "linear", step_minutes: int = 10,
+                 lookback_minutes: int = 60, distance: int = 10, ensemble: Ensemble | None = None) -> pd.DataFrame:
+        ends = self.ends(horizon, step_minutes, lookback_minutes)
+        if len(ends) == 0:
+            return pd.DataFrame(columns=RESULT_COLUMNS)
+
+        predicted = self.predicted(method, horizon, lookback_minutes, ends, distance=distance, ensemble=ensemble)
+        actual = self.actual(horizon, ends)
+
+        return pd.DataFrame({
+            "timestamp": self.series.index[ends - 1],
+            "predicted": predicted,
+            "actual": actual,
+            "error": predicted - actual,
+            "hit": _hits(predicted, actual),
+        }, columns=RESULT_COLUMNS)
+
+    def score(self, horizon: Horizon = "1h", method: str = "linear", step_minutes: int = 10,
+              lookback_minutes: int = 60, distance: int = 10, ensemble: Ensemble | None = None,
+              first: pd.Timestamp | None = None) -> tuple[int, float, float]:
+        """
+        (points, MAE, hit rate) for one configuration, without building the
+        frame. With `first`, only windows whose last point is at or after it
+        are scored.
+        """
+        ends = self.ends(horizon, step_minutes, lookback_minutes)
+        if first is not None:
+            ends = ends[self.series.index[ends - 1] >= first]
+        if len(ends) == 0:
+            return 0, np.nan, np.nan
+
+        predicted = self.predicted(method, horizon, lookback_minutes, ends, distance=distance, ensemble=ensemble)
+        actual = self.actual(horizon, ends)
+        return len(ends), float(np.abs(predicted - actual).mean()), float(_hits(predicted, actual).mean())
+
+def _hits(predicted: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    return ((np.sign(predicted) == np.sign(actual)) & (predicted != 0)).astype(int)
+
+class RunningScore:
+    """
+    Points, directional hits and absolute error of backtested windows,
+    folded in batch by batch.
+
+    The error total is kept exactly, as a few floats whose exact sum it
+    is, so `mae` is the correctly rounded mean and does not depend on how
+    the windows were split into batches. Non-finite errors (a NaN or inf
+    prediction from a zero or missing price) still count as points but
+    are left out of `mae`, as Series.mean() skips NaN.
+    """
+
+    __slots__ = ("points", "hits", "errors", "partials")
+
+    def __init__(self):
+        self.points = 0
+        self.hits = 0
+        self.errors = 0  # finite errors in the total
+        self.partials: list[float] = []
+
+    def add(self, predicted: np.ndarray, actual: np.ndarray) -> None:
+        predicted, actual = np.asarray(predicted, dtype=float), np.asarray(actual, dtype=float)
+        self.points += len(predicted)
+        self.hits += int(_hits(predicted, actual).sum())
+
+        errors = np.abs(predicted - actual)
+        errors = errors[np.isfinite(errors)]
+        self.errors += len(errors)
+        terms = self.partials + errors.tolist()
+        partials = []
+        # Each correctly rounded residual leaves a far smaller exact remainder
+        while (residual := math.fsum(terms + [-p for p in partials])) != 0:
+            partials.append(residual)
+        self.partials = partials
+
+    @property
+    def mae(self) -> float:
+        return math.fsum(self.partials) / self.errors if self.errors else np.nan
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.points if self.points else np.nan
+
+def backtest_batch(
+    series: pd.Series,
+    horizon: Horizon = "1h",
+    method: str = "linear",
+    step_minutes: int = 10,
+    lookback_minutes: int = 60,
+    distance: int = 10,
+    ensemble: Ensemble | None = None
+) -> pd.DataFrame:
+    """
+    Vectorized equivalent of backtest_one for a series on a regular 1-minute
+    grid (or coarser bars, with minutes converted to bars).
+
+    All lookback windows are evaluated at once and future prices are looked
+    up by integer offset. `last`, `mean` and `linear` are array operations
+    (`linear` through the prefix-sum kernel in model.projection); other
+    methods fall back to predict_next per window. `ensemble` combines its
+    members' prediction arrays.
+
+    Returns:
+        DataFrame with columns: timestamp, predicted, actual, error, hit
+    """
+    with stage("backtest.batch"):
+        return BacktestContext(series).backtest(horizon=horizon, method=method, step_minutes=step_minutes,
+                                                lookback_minutes=lookback_minutes, distance=distance,
+                                                ensemble=ensemble)
@@ -0,0 +1,136 @@
+# eval/chunked.py
+
+import math
+import numpy as np
+import pandas as pd
+from eval.backtest import BacktestContext, RunningScore
+from eval.parallel import RESULT_COLUMNS
+from instrument import count, stage
+from model.baseline import HORIZON_MINUTES
+from model.projection import PREFIX_BLOCK
+from storage.loader import LOGFILE, iter_chunks
+
+MINUTE_NS = 60 * 10**9
+
+class _CoinStream:
+    """
+    One coin's 1-minute grid as it is read: the points later windows still
+    need, where they sit in the whole grid, and a score per (method,
+    horizon) with the next window end it has to evaluate.
+    """
+
+    __slots__ = ("values", "offset", "first_minute", "next_end", "scores")
+
+    def __init__(self, jobs: list[tuple[str, str]], lookback: int):
+        self.values = np.empty(0)
+        self.offset = 0          # grid position of values[0]
+        self.first_minute = None
+        self.next_end = {job: lookback for job in jobs}
+        self.scores = {job: RunningScore() for job in jobs}
+
+    @property
+    def points(self) -> int:
+        return self.offset + len(self.values)
+
+    def extend(self, minutes: np.ndarray, means: np.ndarray) -> None:
+        """
+        Append the grid up to the last of these bucket means, filling gaps
+        from the previous point as resample(...).interpolate() does.
+        """
+        known = self.first_minute is not None
+        if known:
+            last = self.first_minute + self.points - 1
+            minutes = np.concatenate(([last], minutes))
+            means = np.concatenate(([self.values[-1]], means))
+        else:
+            self.first_minute = int(minutes[0])
+        grid = np.arange(minutes[0], minutes[-1] + 1)
+        filled = means if len(grid) == len(means) else np.interp(grid, minutes, means)
+        self.values = np.concatenate((self.values, filled[1:] if known else filled))
+
+    def series(self) -> pd.Series:
+        index = pd.date_range(pd.Timestamp((self.first_minute + self.offset) * MINUTE_NS), periods=len(self.values),
+                              freq="1min", name="timestamp")
+        return pd.Series(self.values, index=index, copy=False)
+
+    def trim(self, keep_from: int, align: int) -> None:
+        # Drop points before `keep_from`, keeping values[0] on a multiple of
+        # `align` so rolling sums are blocked as they are over the whole grid
+        start = max(self.offset, keep_from // align * align)
+        self.values = self.values[start - self.offset:].copy()
+        self.offset = start
+
+def _buckets(ts: np.ndarray, prices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # Minutes that have points, and the mean of each
+    known = ~np.isnan(prices)
+    minutes, inverse = np.unique(ts[known] // MINUTE_NS, return_inverse=True)
+    return minutes, np.bincount(inverse, weights=prices[known]) / np.bincount(inverse)
+
+def backtest_chunked(
+    source: str = LOGFILE,
+    methods: list[str] = ("linear",),
+    horizons: list[str] = ("1h",),
+    hours: int | None = None,
+    end=None,
+    chunk_hours: float = 24,
+    step_minutes: int = 10,
+    lookback_minutes: int = 60
+) -> pd.DataFrame:
+    """
+    backtest_matrix over the last `hours` of a log without loading it:
+    the log is read chunk by chunk (storage.loader.iter_chunks) and every
+    coin's 1-minute grid is extended from each chunk. Windows whose outcome
+    is known are backtested as soon as their horizon has been read and
+    folded into one RunningScore per (coin, method, horizon). Only the
+    lookback before the next window end is kept, rounded back to a
+    rolling-sum block.
+
+    Memory depends on `chunk_hours`, the lookback and the horizon, not on
+    `hours`. The windows, predictions and outcomes are the ones the
+    in-memory path evaluates, so the table is identical.
+
+    Returns:
+        DataFrame with columns: Coin, Method, Horizon, Points, MAE, Hit Rate
+    """
+    jobs = [(method, horizon) for method in methods for horizon in horizons]
+    lookback, step = lookback_minutes, max(1, step_minutes)
+    # Rolling mean / fit blocks for every window width the jobs use
+    align = math.lcm(*(max(PREFIX_BLOCK, min(HORIZON_MINUTES[h], lookback)) for _, h in jobs))
+    streams: dict[str, _CoinStream] = {}
+
+    for ts, columns in iter_chunks(source, hours=hours, end=end, chunk_hours=chunk_hours):
+        with stage("chunked.backtest"):
+            for coin, prices in columns.items():
+                minutes, means = _buckets(ts, prices)
+                if not len(minutes):
+                    continue
+                stream = streams.get(coin)
+                if stream is None:
+                    stream = streams[coin] = _CoinStream(jobs, lookback)
+                stream.extend(minutes, means)
+                _evaluate(stream, lookback, step)
+                stream.trim(min(stream.next_end.values()) - lookback, align)
+
+    rows = [
+        (coin, method, horizon, score.points, score.mae, score.hit_rate)
+        for coin, stream in streams.items()
+        for (method, horizon), score in stream.scores.items()
+        if score.points
+    ]
+    return pd.DataFrame(rows, columns=RESULT_COLUMNS)
+
+def _evaluate(stream: _CoinStream, lookback: int, step: int) -> None:
+    # Every window end e (lookback + k * step) whose outcome, e - 1 + horizon,
+    # is a final point before the last one, as BacktestContext.ends allows
+    ctx = None
+    for job, next_end in stream.next_end.items():
+        method, horizon = job
+        ends = np.arange(next_end, stream.points - HORIZON_MINUTES[horizon], step)
+        if not len(ends):
+            continue
+        if ctx is None:
+            ctx = BacktestContext(stream.series())
+        local = ends - stream.offset
+        stream.scores[job].add(ctx.predicted(method, horizon, lookback, local), ctx.actual(horizon, local))
+        stream.next_end[job] = int(ends[-1]) + step
+        count("chunked.windows", len(ends))
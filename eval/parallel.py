@@ -0,0 +1,110 @@
+# eval/parallel.py
+
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from eval.backtest import RunningScore, backtest_batch
+
+RESULT_COLUMNS = ["Coin", "Method", "Horizon", "Points", "MAE", "Hit Rate"]
+
+# Per-worker state, set once by _init_worker
+_shm: shared_memory.SharedMemory | None = None
+_layout: dict[str, tuple[int, int, pd.Timestamp, pd.Timedelta]] = {}
+
+def _pack(series_dict: dict[str, pd.Series]) -> tuple[shared_memory.SharedMemory, dict]:
+    """
+    Copy every coin's prices into one shared float64 buffer.
+    Layout maps coin -> (offset, length, first timestamp, resolution); the
+    index is rebuilt in the worker from the regular grid.
+    """
+    total = sum(len(s) for s in series_dict.values())
+    shm = shared_memory.SharedMemory(create=True, size=max(total, 1) * 8)
+    buffer = np.ndarray((total,), dtype=np.float64, buffer=shm.buf)
+
+    layout = {}
+    offset = 0
+    for coin, series in series_dict.items():
+        freq = series.index.freq or (series.index.inferred_freq if len(series) > 2 else "1min")
+        if len(series) > 1 and freq is None:
+            raise ValueError(f"{coin}: series must be on a regular grid")
+        buffer[offset : offset + len(series)] = series.to_numpy(dtype=float)
+        layout[coin] = (offset, len(series), series.index[0], pd.Timedelta(freq))
+        offset += len(series)
+
+    return shm, layout
+
+def _init_worker(shm_name: str, layout: dict):
+    global _shm, _layout
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    _layout = layout
+
+def _series(coin: str) -> pd.Series:
+    offset, length, start, freq = _layout[coin]
+    values = np.ndarray((length,), dtype=np.float64, buffer=_shm.buf, offset=offset * 8)
+    index = pd.date_range(start, periods=length, freq=freq)
+    return pd.Series(values, index=index, name=coin, copy=False)
+
+def _summarize(coin: str, method: str, horizon: str, df: pd.DataFrame) -> tuple | None:
+    if df.empty:
+        return None
+    score = RunningScore()
+    score.add(df["predicted"], df["actual"])
+    return (coin, method, horizon, score.points, score.mae, score.hit_rate)
+
+def _run_job(job: tuple[str, str, str, int, int]) -> tuple | None:
+    coin, method, horizon, step_minutes, lookback_minutes = job
+    df = backtest_batch(_series(coin), horizon=horizon, method=method,
+                        step_minutes=step_minutes, lookback_minutes=lookback_minutes)
+    return _summarize(coin, method, horizon, df)
+
+def backtest_matrix(
+    series_dict: dict[str, pd.Series],
+    methods: list[str],
+    horizons: list[str],
+    workers: int | None = None,
+    step_minutes: int = 10,
+    lookback_minutes: int = 60
+) -> pd.DataFrame:
+    """
+    Backtest every (coin, method, horizon) combination and collect the
+    summaries into one table.
+
+    Jobs are spread over a process pool. Price arrays are placed in shared
+    memory once, so workers only receive small job tuples instead of
+    pickled Series. workers=1 runs everything in-process.
+
+    Returns:
+        DataFrame with columns: Coin, Method, Horizon, Points, MAE, Hit Rate
+    """
+    workers = workers or os.cpu_count() or 1
+    series_dict = {coin: s for coin, s in series_dict.items() if not s.empty}
+    jobs = [
+        (coin, method, horizon, step_minutes, lookback_minutes)
+        for coin in series_dict
+        for method in methods
+        for horizon in horizons
+    ]
+
+    if workers == 1 or len(jobs) <= 1:
+        results = [
+            _summarize(coin, method, horizon, backtest_batch(
+                series_dict[coin], horizon=horizon, method=method,
+                step_minutes=step_minutes, lookback_minutes=lookback_minutes))
+            for coin, method, horizon, _, _ in jobs
+        ]
+    else:
+        shm, layout = _pack(series_dict)
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                     initializer=_init_worker,
+                                     initargs=(shm.name, layout)) as pool:
+                # Heavy jobs (momentum_wave, 1d) first so they don't straggle at the end
+                jobs.sort(key=lambda j: (j[1] != "momentum_wave", j[2] != "1d"))
+                results = list(pool.map(_run_job, jobs))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    return pd.DataFrame([r for r in results if r is not None], columns=RESULT_COLUMNS)
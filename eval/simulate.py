@@ -0,0 +1,167 @@
+# eval/simulate.py
+
+import numpy as np
+import pandas as pd
+from eval.backtest import BacktestContext
+
+SIM_COLUMNS = ["threshold", "trades", "exposure", "turnover", "total_return", "max_drawdown", "sharpe", "hit_rate"]
+CURVE_COLUMNS = ["timestamp", "position", "pnl", "equity", "drawdown"]
+YEAR = pd.Timedelta(days=365)
+
+def positions(predicted: np.ndarray, thresholds: np.ndarray, allow_short: bool = True) -> np.ndarray:
+    """
+    Position per (threshold, signal): +1 when the predicted change is above
+    the threshold, -1 when below minus the threshold (if shorting is
+    allowed), else flat.
+
+    Returns:
+        Array of shape (len(thresholds), len(predicted))
+    """
+    p = np.asarray(predicted, dtype=float)[None, :]
+    t = np.asarray(thresholds, dtype=float)[:, None]
+    pos = (p > t).astype(float)
+    if allow_short:
+        pos -= p < -t
+    return pos
+
+def _trade(predicted: np.ndarray, actual: np.ndarray, thresholds: np.ndarray, cost: float,
+           allow_short: bool) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Positions, per-signal net returns and traded size for every threshold.
+    Signals whose actual change is unknown (NaN) are sat out. Every change
+    of position pays `cost` per unit traded, and the final position is
+    closed after the last signal.
+    """
+    known = ~np.isnan(actual)
+    pos = positions(np.where(known, predicted, 0.0), thresholds, allow_short=allow_short)
+    pos[:, ~known] = 0.0
+    traded = np.abs(np.diff(pos, axis=1, prepend=0.0))
+    traded[:, -1] += np.abs(pos[:, -1])
+    return pos, pos * np.where(known, actual, 0.0) - cost * traded, traded
+
+def simulate(
+    predicted: np.ndarray,
+    actual: np.ndarray,
+    thresholds: list[float] = (0.0,),
+    fee: float = 0.001,
+    slippage: float = 0.0005,
+    allow_short: bool = True,
+    periods_per_year: float | None = None
+) -> pd.DataFrame:
+    """
+    Trade on prediction signals for every threshold at once.
+
+    Signal i opens (or keeps) a position of size 1 whose return is
+    actual[i], the realized change over the prediction horizon. Fees and
+    slippage are fractions of the traded size, paid on every change of
+    position and on the final close. Equity compounds the net returns;
+    with horizons longer than the spacing of signals the returns overlap,
+    so use step == horizon for a tradeable equity curve.
+
+    Positions, returns, equity and drawdown for all thresholds are built as
+    one (threshold, signal) array with cumulative NumPy operations.
+
+    Args:
+        predicted: predicted % change per signal
+        actual: realized % change per signal
+        thresholds: minimum |predicted| to take a position, one result row each
+        fee, slippage: cost per unit traded (0.001 = 0.1%)
+        allow_short: go short on predictions below -threshold
+        periods_per_year: signals per year, to annualize Sharpe (None: per signal)
+
+    Returns:
+        DataFrame with one row per threshold and columns: threshold, trades,
+        exposure, turnover, total_return, max_drawdown, sharpe, hit_rate
+    """
+    predicted = np.asarray(predicted, dtype=float)
+    actual = np.asarray(actual, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    if predicted.shape != actual.shape or predicted.ndim != 1:
+        raise ValueError("predicted and actual must be 1-D arrays of the same length.")
+    if not len(predicted):
+        return pd.DataFrame({"threshold": thresholds}, columns=SIM_COLUMNS)
+
+    pos, pnl, traded = _trade(predicted, actual, thresholds, fee + slippage, allow_short)
+
+    equity = np.cumprod(1 + pnl, axis=1)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=1), 1.0)
+    held = (pos != 0).sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = pnl.std(axis=1, ddof=1) if len(predicted) > 1 else np.full(len(thresholds), np.nan)
+        sharpe = np.where(std > 0, pnl.mean(axis=1) / std, np.nan)
+        if periods_per_year:
+            sharpe *= np.sqrt(periods_per_year)
+        hit_rate = (pos * np.nan_to_num(actual) > 0).sum(axis=1) / held
+
+    return pd.DataFrame({
+        "threshold": thresholds,
+        "trades": (np.diff(pos, axis=1, prepend=0.0) != 0).sum(axis=1),
+        "exposure": held / len(predicted),
+        "turnover": traded.sum(axis=1),
+        "total_return": equity[:, -1] - 1,
+        "max_drawdown": (equity / peak - 1).min(axis=1),
+        "sharpe": sharpe,
+        "hit_rate": hit_rate,
+    }, columns=SIM_COLUMNS)
+
+def periods_per_year(timestamps: pd.Series) -> float | None:
+    """
+    Signals per year at the median spacing of `timestamps`.
+    """
+    if len(timestamps) < 2:
+        return None
+    spacing = pd.Series(pd.to_datetime(timestamps)).diff().median()
+    return YEAR / spacing if spacing > pd.Timedelta(0) else None
+
+def simulate_frame(df: pd.DataFrame, thresholds: list[float] = (0.0,), fee: float = 0.001,
+                   slippage: float = 0.0005, allow_short: bool = True) -> pd.DataFrame:
+    """
+    simulate() on a backtest_one / backtest_batch frame, with Sharpe
+    annualized from the spacing of its timestamps.
+    """
+    return simulate(df["predicted"], df["actual"], thresholds=thresholds, fee=fee, slippage=slippage,
+                    allow_short=allow_short, periods_per_year=periods_per_year(df["timestamp"]))
+
+def equity_curve(df: pd.DataFrame, threshold: float = 0.0, fee: float = 0.001, slippage: float = 0.0005,
+                 allow_short: bool = True) -> pd.DataFrame:
+    """
+    Per-signal position, net return, equity and drawdown of one threshold
+    on a backtest frame.
+
+    Returns:
+        DataFrame with columns: timestamp, position, pnl, equity, drawdown
+    """
+    pos, pnl, _ = _trade(df["predicted"].to_numpy(dtype=float), df["actual"].to_numpy(dtype=float),
+                         np.array([threshold]), fee + slippage, allow_short)
+    equity = np.cumprod(1 + pnl[0])
+    return pd.DataFrame({
+        "timestamp": df["timestamp"].to_numpy(),
+        "position": pos[0],
+        "pnl": pnl[0],
+        "equity": equity,
+        "drawdown": equity / np.maximum(np.maximum.accumulate(equity), 1.0) - 1,
+    }, columns=CURVE_COLUMNS)
+
+def simulate_all(series_dict: dict[str, pd.Series], horizon: str = "1h", method: str = "linear",
+                 step_minutes: int = 60, lookback_minutes: int = 60, distance: int = 10,
+                 thresholds: list[float] = (0.0,), **costs) -> pd.DataFrame:
+    """
+    Backtest every coin once (vectorized) and simulate all thresholds on
+    its signals. `costs` are passed to simulate_frame.
+
+    Returns:
+        DataFrame with a `coin` column followed by the simulate() columns
+    """
+    tables = []
+    for coin, series in series_dict.items():
+        if series.empty:
+            continue
+        df = BacktestContext(series).backtest(horizon=horizon, method=method, step_minutes=step_minutes,
+                                              lookback_minutes=lookback_minutes, distance=distance)
+        if df.empty:
+            continue
+        tables.append(simulate_frame(df, thresholds=thresholds, **costs).assign(coin=coin))
+    if not tables:
+        return pd.DataFrame(columns=["coin", *SIM_COLUMNS])
+    return pd.concat(tables, ignore_index=True)[["coin", *SIM_COLUMNS]]
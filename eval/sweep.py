@@ -0,0 +1,67 @@
+# eval/sweep.py
+
+import itertools
+import pandas as pd
+from eval.backtest import BacktestContext, Horizon
+
+CUBE_COLUMNS = ["coin", "method", "horizon", "step", "lookback", "distance", "points", "mae", "hit_rate"]
+
+# Methods whose predictions depend on the peak/valley `distance` parameter
+DISTANCE_METHODS = {"momentum_wave", "ensemble"}
+
+def sweep(
+    series: pd.Series,
+    horizon: Horizon = "1h",
+    methods: list[str] = ("linear",),
+    steps: list[int] = (10,),
+    lookbacks: list[int] = (60,),
+    distances: list[int] = (10,),
+    coin: str | None = None
+) -> pd.DataFrame:
+    """
+    Backtest every combination of the parameter grid on one series.
+
+    The 1-minute series, future returns, prefix sums and regression fits are
+    built once in a BacktestContext and reused by every configuration. A step
+    only selects which windows are scored, and per-window momentum_wave
+    predictions are shared across steps with the same lookback and distance.
+    `distance` is only swept for methods that use it.
+
+    Returns:
+        Results cube, one row per configuration:
+        coin, method, horizon, step, lookback, distance, points, mae, hit_rate
+    """
+    ctx = BacktestContext(series)
+    coin = coin or series.name
+
+    rows = []
+    for method in methods:
+        method_distances = distances if method in DISTANCE_METHODS else [None]
+        for lookback, distance, step in itertools.product(lookbacks, method_distances, steps):
+            points, mae, hit_rate = ctx.score(horizon=horizon, method=method, step_minutes=step,
+                                              lookback_minutes=lookback, distance=distance or 10)
+            rows.append((coin, method, horizon, step, lookback, distance, points, mae, hit_rate))
+
+    cube = pd.DataFrame(rows, columns=CUBE_COLUMNS)
+    cube["distance"] = cube["distance"].astype("Int64")
+    return cube
+
+def sweep_all(series_dict: dict[str, pd.Series], **grid) -> pd.DataFrame:
+    """
+    Run `sweep` for every coin and stack the cubes.
+    """
+    cubes = [sweep(series, coin=coin, **grid) for coin, series in series_dict.items() if not series.empty]
+    if not cubes:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+    return pd.concat(cubes, ignore_index=True)
+
+def rank_sweep(cube: pd.DataFrame, top: int | None = None) -> pd.DataFrame:
+    """
+    Rank configurations per coin by MAE (lower is better), breaking ties on
+    hit rate (higher is better). Adds a 1-based `rank` column.
+    """
+    ranked = cube.dropna(subset=["mae"]).sort_values(["coin", "mae", "hit_rate"], ascending=[True, True, False])
+    ranked = ranked.assign(rank=ranked.groupby("coin").cumcount() + 1)
+    if top is not None:
+        ranked = ranked[ranked["rank"] <= top]
+    return ranked.reset_index(drop=True)
@@ -0,0 +1,193 @@
+# eval/tune.py
+
+import hashlib
+import itertools
+import json
+import numpy as np
+import pandas as pd
+from eval.backtest import BacktestContext, Horizon
+from eval.sweep import DISTANCE_METHODS
+from instrument import count, stage
+from model.baseline import HORIZON_MINUTES
+from storage.memo import MemoStore
+
+FOLD_COLUMNS = ["coin", "train_start", "test_start", "test_end", "method", "lookback", "distance",
+                "train_mae", "train_hit_rate", "test_points", "test_mae", "test_hit_rate"]
+
+def fold_bounds(start: pd.Timestamp, end: pd.Timestamp, train_hours: int = 48,
+                test_hours: int = 24) -> list[tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp]]:
+    """
+    Walk-forward (train_start, test_start, test_end) windows over [start, end).
+
+    Test windows are `test_hours` long, aligned to multiples of `test_hours`
+    since the epoch, and each follows `train_hours` of training data. The
+    last test window ends at `end` and may be partial. Because boundaries
+    are aligned rather than counted from `start`, an earlier fold covers
+    the same data on every run, so its results can be memoized.
+    """
+    train, test = pd.Timedelta(hours=train_hours), pd.Timedelta(hours=test_hours)
+    bounds = []
+    test_start = (start + train).ceil(test)
+    while test_start < end:
+        bounds.append((test_start - train, test_start, min(test_start + test, end)))
+        test_start += test
+    return bounds
+
+def _digest(series: pd.Series) -> str:
+    h = hashlib.sha1(series.to_numpy(dtype=float).tobytes())
+    h.update(series.index.asi8[:1].tobytes())
+    return h.hexdigest()[:16]
+
+def _score(ctx: BacktestContext, first: pd.Timestamp, config: tuple, horizon: Horizon,
+           step_minutes: int) -> list:
+    # [points, MAE, hit rate] of one (method, lookback, distance) over the
+    # windows of ctx whose last point is at or after `first`
+    method, lookback, distance = config
+    points, mae, hit_rate = ctx.score(horizon, method, step_minutes, lookback, distance=distance or 10, first=first)
+    return [points, mae, hit_rate] if points else [0, None, None]
+
+def check_folds(horizon: Horizon, train_hours: int, test_hours: int) -> None:
+    """
+    Raise ValueError if training or test windows are no longer than the
+    horizon: a window is only scored once its horizon has passed inside
+    the same fold window, so such folds have next to nothing to score.
+    """
+    for name, hours in (("train", train_hours), ("test", test_hours)):
+        if hours * 60 <= HORIZON_MINUTES[horizon]:
+            raise ValueError(f"{hours}h {name} windows leave the {horizon} horizon almost nothing to score; "
+                             f"use more than {HORIZON_MINUTES[horizon] // 60} {name} hours")
+
+def evaluate(series: pd.Series, coin: str, first: pd.Timestamp, stop: pd.Timestamp, configs: list[tuple],
+             horizon: Horizon = "1h", step_minutes: int = 10, context_minutes: int = 0,
+             memo: MemoStore | None = None) -> dict[tuple, list]:
+    """
+    Score every config on the windows ending in [first, stop), seeing data
+    from `context_minutes` before `first` and nothing from `stop` on.
+
+    Results are memoized under (coin, hash of the data range, params), so
+    a range seen by an earlier run is not backtested again. The
+    BacktestContext is only built if some config is missing.
+
+    Returns:
+        {config: [points, MAE, hit rate]}
+    """
+    memo = memo if memo is not None else MemoStore()
+    index = series.index
+    block = series.iloc[index.searchsorted(first - pd.Timedelta(minutes=context_minutes)) : index.searchsorted(stop)]
+    if len(block) < 3:
+        return {config: [0, None, None] for config in configs}
+    prefix = f"{coin}|{_digest(block)}|{first.value}|{horizon}|{step_minutes}|"
+
+    results, ctx = {}, None
+    for config in configs:
+        key = prefix + json.dumps(list(config))
+        result = memo.get(key)
+        if result is None:
+            if ctx is None:
+                ctx = BacktestContext(block)
+            result = _score(ctx, first, config, horizon, step_minutes)
+            memo.put(key, result)
+            count("tune.computed")
+        results[config] = result
+    return results
+
+def _best(results: dict[tuple, list]) -> tuple | None:
+    # Lowest MAE, ties broken on hit rate, as rank_sweep ranks
+    scored = [(mae, -hit_rate, i, config) for i, (config, (points, mae, hit_rate)) in enumerate(results.items())
+              if points and mae is not None and not np.isnan(mae)]
+    return min(scored)[3] if scored else None
+
+def grid(methods: list[str], lookbacks: list[int], distances: list[int]) -> list[tuple]:
+    """
+    (method, lookback, distance) configs; distance is None for methods that
+    don't use it.
+    """
+    return [(method, lookback, distance)
+            for method in methods
+            for lookback, distance in itertools.product(lookbacks, distances if method in DISTANCE_METHODS else [None])]
+
+def walk_forward(
+    series: pd.Series,
+    coin: str | None = None,
+    horizon: Horizon = "1h",
+    methods: list[str] = ("mean", "linear", "momentum_wave"),
+    lookbacks: list[int] = (30, 60, 120),
+    distances: list[int] = (5, 10, 20),
+    step_minutes: int = 10,
+    train_hours: int = 48,
+    test_hours: int = 24,
+    memo: MemoStore | None = None
+) -> pd.DataFrame:
+    """
+    Walk-forward tuning of one series: on each fold's training window,
+    pick the (method, lookback, distance) with the lowest MAE, then score
+    that choice on the following test window. Training windows only use
+    outcomes known before the test window starts. Raises ValueError if
+    train or test windows are no longer than the horizon (check_folds).
+
+    Returns:
+        One row per fold: coin, train_start, test_start, test_end, method,
+        lookback, distance, train_mae, train_hit_rate, test_points,
+        test_mae, test_hit_rate
+    """
+    check_folds(horizon, train_hours, test_hours)
+    coin = coin or series.name
+    memo = memo if memo is not None else MemoStore()
+    configs = grid(methods, lookbacks, distances)
+    context = max(lookbacks)
+    if series.empty:
+        return pd.DataFrame(columns=FOLD_COLUMNS)
+
+    step = pd.Timedelta(series.index.freq or series.index.inferred_freq or "1min")
+    rows = []
+    for train_start, test_start, test_end in fold_bounds(series.index[0], series.index[-1] + step,
+                                                         train_hours, test_hours):
+        with stage("tune.train"):
+            train = evaluate(series, coin, train_start, test_start, configs, horizon=horizon,
+                             step_minutes=step_minutes, context_minutes=context, memo=memo)
+        best = _best(train)
+        if best is None:
+            continue
+        with stage("tune.test"):
+            test = evaluate(series, coin, test_start, test_end, [best], horizon=horizon,
+                            step_minutes=step_minutes, context_minutes=context, memo=memo)
+        _, train_mae, train_hit_rate = train[best]
+        rows.append((coin, train_start, test_start, test_end, *best, train_mae, train_hit_rate, *test[best]))
+
+    folds = pd.DataFrame(rows, columns=FOLD_COLUMNS)
+    folds["distance"] = folds["distance"].astype("Int64")
+    return folds
+
+def walk_forward_all(series_dict: dict[str, pd.Series], memo: MemoStore | None = None, **params) -> pd.DataFrame:
+    """
+    Run `walk_forward` for every coin with one shared memo, then flush it.
+    """
+    memo = memo if memo is not None else MemoStore()
+    tables = [walk_forward(series, coin=coin, memo=memo, **params)
+              for coin, series in series_dict.items() if not series.empty]
+    memo.flush()
+    tables = [t for t in tables if not t.empty]
+    if not tables:
+        return pd.DataFrame(columns=FOLD_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+def tuned_configs(folds: pd.DataFrame) -> dict[str, dict]:
+    """
+    Each coin's configuration from its latest fold, for
+    model.baseline.predict_all(configs=...).
+    """
+    latest = folds.sort_values("test_start").groupby("coin").tail(1)
+    return {
+        r.coin: {"method": r.method, "lookback": int(r.lookback),
+                 "distance": None if pd.isna(r.distance) else int(r.distance)}
+        for r in latest.itertuples()
+    }
+
+def save_tuned(configs: dict[str, dict], horizon: Horizon, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump({"horizon": horizon, "configs": configs}, f, indent=2)
+
+def load_tuned(path: str) -> tuple[Horizon, dict[str, dict]]:
+    with open(path, "r") as f:
+        tuned = json.load(f)
+    return tuned["horizon"], tuned["configs"]
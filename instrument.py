@@ -0,0 +1,233 @@
+# instrument.py
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+ENV_VAR = "CRYPTO_PROFILE"              # set to 1 to profile any runner
+TRACE_ENV_VAR = "CRYPTO_PROFILE_TRACE"  # JSON trace path (default: profile_trace.json)
+DEFAULT_TRACE = "profile_trace.json"
+SAMPLE_INTERVAL = 0.01  # Seconds between RSS samples while profiling
+MAX_EVENTS = 100_000     # Newest stage events kept for the trace; summaries cover every call
+
+_NULL = nullcontext()
+
+def _page_size() -> int:
+    try:
+        return os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return 4096
+
+_PAGE = _page_size()
+
+def current_rss() -> int | None:
+    """
+    Resident set size of this process in bytes (Linux), else the peak RSS
+    so far as reported by getrusage, else None.
+    """
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+        import sys
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except (ImportError, OSError):
+        return None
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start", "peak")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.peak = current_rss() or 0
+        self.profiler._open.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        p = self.profiler
+        p._open.remove(self)
+        rss = current_rss() or 0
+        self.peak = max(self.peak, rss)
+        for outer in p._open:
+            outer.peak = max(outer.peak, self.peak)
+        p._record(self.name, self.start, end - self.start, self.peak, len(p._open))
+        return False
+
+class Profiler:
+    """
+    Stage timers, counters and peak-RSS sampling.
+
+    Disabled, stage() hands back a shared no-op context manager and count()
+    returns after one attribute check, so instrumented code can stay
+    instrumented in production. Enabled, every stage records its wall time
+    and the peak RSS seen while it was open (sampled by a background thread
+    and at stage boundaries); nested stages are kept in the trace.
+
+    Per-stage totals are aggregated as stages close, so the summary covers
+    every call. The trace keeps only the newest `max_events` events, which
+    bounds memory in long-running loops (scan, stream, chart).
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = MAX_EVENTS):
+        self.enabled = False
+        self.origin = time.perf_counter()
+        self.stages: dict[str, list] = {}   # name -> [calls, total s, max s, peak RSS]
+        self.counters: dict[str, int] = {}
+        self.events: deque[tuple] = deque(maxlen=max_events)  # (name, start, duration, peak RSS, depth)
+        self.dropped = 0  # events pushed out of `events`
+        self._open: list[_Stage] = []
+        self._sampler: threading.Thread | None = None
+        if enabled:
+            self.enable()
+
+    def enable(self) -> None:
+        if self.enabled:
+            return
+        self.enabled = True
+        if self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample, name="profile-rss", daemon=True)
+            self._sampler.start()
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def _sample(self):
+        while True:
+            time.sleep(SAMPLE_INTERVAL)
+            if not self.enabled or not self._open:
+                continue
+            rss = current_rss()
+            if rss is None:
+                return
+            for stage in list(self._open):
+                if rss > stage.peak:
+                    stage.peak = rss
+
+    def stage(self, name: str):
+        """
+        Context manager timing one stage: `with profiler.stage("load.parse"): ...`
+        """
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, name)
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def _record(self, name: str, start: float, duration: float, peak: int, depth: int):
+        stats = self.stages.get(name)
+        if stats is None:
+            self.stages[name] = [1, duration, duration, peak]
+        else:
+            stats[0] += 1
+            stats[1] += duration
+            stats[2] = max(stats[2], duration)
+            stats[3] = max(stats[3], peak)
+        if len(self.events) == self.events.maxlen:
+            self.dropped += 1
+        self.events.append((name, start - self.origin, duration, peak, depth))
+
+    def reset(self) -> None:
+        self.origin = time.perf_counter()
+        self.stages.clear()
+        self.counters.clear()
+        self.events.clear()
+        self.dropped = 0
+
+    # === Output ===
+
+    def summary(self) -> str:
+        """
+        Per-stage table: calls, total / mean / max time, peak RSS.
+        """
+        if not self.stages:
+            return "No stages recorded."
+
+        lines = [f"{'Stage':<32} {'Calls':>7} {'Total s':>10} {'Mean ms':>10} {'Max ms':>10} {'Peak MB':>9}",
+                 "-" * 83]
+        for name, (calls, total, longest, peak) in sorted(self.stages.items(), key=lambda kv: -kv[1][1]):
+            lines.append(f"{name:<32} {calls:>7} {total:>10.3f} {total / calls * 1000:>10.2f} "
+                         f"{longest * 1000:>10.2f} {peak / 1e6:>9.1f}")
+
+        if self.counters:
+            lines += ["", f"{'Counter':<32} {'Value':>12}", "-" * 45]
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<32} {value:>12}")
+        return "\n".join(lines)
+
+    def trace(self) -> dict:
+        """
+        Trace in the Chrome trace-event format (chrome://tracing, Perfetto),
+        with the summary and counters alongside.
+        """
+        pid = os.getpid()
+        return {
+            "traceEvents": [
+                {
+                    "name": name, "ph": "X", "pid": pid, "tid": 0,
+                    "ts": start * 1e6, "dur": duration * 1e6,
+                    "args": {"peak_rss": peak, "depth": depth},
+                }
+                for name, start, duration, peak, depth in self.events
+            ],
+            "droppedEvents": self.dropped,
+            "stages": {
+                name: {"calls": calls, "total": total, "max": longest, "peak_rss": peak}
+                for name, (calls, total, longest, peak) in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def report(self, trace_path: str | None = DEFAULT_TRACE) -> None:
+        print(f"\n⏱️ Profile\n\n{self.summary()}")
+        if trace_path:
+            with open(trace_path, "w") as f:
+                json.dump(self.trace(), f)
+            print(f"\n💾 Wrote trace to {trace_path}")
+
+PROFILER = Profiler(enabled=os.environ.get(ENV_VAR, "") not in ("", "0"))
+_reporting = False
+
+def stage(name: str):
+    return PROFILER.stage(name)
+
+def count(name: str, n: int = 1) -> None:
+    PROFILER.count(name, n)
+
+def add_profile_args(parser) -> None:
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Print per-stage timings and memory on exit (or set {ENV_VAR}=1)")
+    parser.add_argument("--profile-trace", default=None,
+                        help=f"JSON trace path (default: {DEFAULT_TRACE})")
+
+def setup_profiling(args=None) -> bool:
+    """
+    Turn profiling on if --profile or the environment asks for it, and
+    report when the process exits. Returns whether profiling is on.
+    """
+    global _reporting
+    if getattr(args, "profile", False):
+        PROFILER.enable()
+    if not PROFILER.enabled:
+        return False
+
+    if not _reporting:
+        trace_path = getattr(args, "profile_trace", None) or os.environ.get(TRACE_ENV_VAR) or DEFAULT_TRACE
+        atexit.register(PROFILER.report, trace_path)
+        _reporting = True
+    return True
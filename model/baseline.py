@@ -3,20 +3,30 @@
 import pandas as pd
 import numpy as np
 from typing import Literal
-from model.momentum import momentum_wave_predict
+from instrument import count, stage
 from model.projection import linear_projection
 
 Horizon = Literal["1h", "1d"]
-Method = Literal["last", "mean", "linear"]
+Method = Literal["last", "mean", "linear", "momentum_wave", "ensemble"]
 
-def predict_next(prices: pd.Series, horizon: Horizon = "1h", method: Method = "linear") -> float:
+HORIZON_MINUTES = {"1h": 60, "1d": 1440}
+MATRIX_METHODS = {"last", "mean", "linear"}  # Closed form in predict_matrix
+
+def window_points(freq, horizon: Horizon) -> int:
+    """
+    Points of a grid with spacing `freq` that predict_next looks at.
+    """
+    return int(HORIZON_MINUTES[horizon] * 60 // pd.Timedelta(freq).total_seconds())
+
+def predict_next(prices: pd.Series, horizon: Horizon = "1h", method: Method = "linear", distance: int = 10) -> float:
     """
     Predicts % change from current price for a given coin.
 
     Args:
-        prices: pd.Series with datetime index and price values
+        prices: pd.Series on a regular grid (1-minute points or coarser bars)
         horizon: "1h" or "1d"
         method: prediction strategy to use
+        distance: minimum spacing between peaks/valleys (momentum_wave only)
 
     Returns:
         Predicted % change (e.g. 0.02 = +2%)
@@ -25,11 +35,10 @@ def predict_next(prices: pd.Series, horizon: Horizon = "1h", method: Method = "l
     if freq is None:
         raise ValueError("Time series has no frequency set or inferable.")
 
-    step = {"1h": 60, "1d": 1440}[horizon]
-    num_points = step // pd.Timedelta(freq).seconds * 60
+    num_points = window_points(freq, horizon)
 
     # Restrict to recent window
-    window = prices[-num_points:]
+    window = prices.iloc[max(0, len(prices) - num_points):]
 
     if len(window) < 2:
         return 0.0
@@ -47,19 +56,175 @@ def predict_next(prices: pd.Series, horizon: Horizon = "1h", method: Method = "l
         return linear_projection(window, horizon=horizon)
 
     elif method == "momentum_wave":
-        return momentum_wave_predict(window, horizon=horizon)
+        # Imported here: scipy is only needed by this method
+        from model.momentum import momentum_wave_predict
+        return momentum_wave_predict(window, horizon=horizon, distance=distance)
+
+    elif method == "ensemble":
+        from model.ensemble import DEFAULT_ENSEMBLE
+        return DEFAULT_ENSEMBLE.predict(window, horizon=horizon, distance=distance)
 
     else:
         raise ValueError(f"Unknown method: {method}")
 
+def price_matrix(series_dict: dict[str, pd.Series]) -> pd.DataFrame:
+    """
+    Aligns per-coin series on their shared regular grid: a time-by-coin
+    frame, NaN where a coin has no data. Empty series are left out.
+    """
+    series_dict = {coin: prices for coin, prices in series_dict.items() if not prices.empty}
+    if not series_dict:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="timestamp"))
+
+    freqs = {pd.Timedelta(prices.index.freq or prices.index.inferred_freq or 0) for prices in series_dict.values()}
+    freqs.discard(pd.Timedelta(0))
+    if len(freqs) != 1:
+        raise ValueError("Series must share one regular grid.")
+    step = freqs.pop()
+
+    with stage("predict.align"):
+        # Every series sits on the same grid, so rows are integer offsets
+        start = min(prices.index[0] for prices in series_dict.values())
+        offsets = [(prices.index[0] - start) // step for prices in series_dict.values()]
+        n_rows = max(o + len(prices) for o, prices in zip(offsets, series_dict.values()))
+        matrix = np.full((n_rows, len(series_dict)), np.nan)
+        for j, (o, prices) in enumerate(zip(offsets, series_dict.values())):
+            matrix[o : o + len(prices), j] = prices.to_numpy(dtype=float)
+
+    index = pd.date_range(start, periods=n_rows, freq=step, name="timestamp")
+    return pd.DataFrame(matrix, index=index, columns=list(series_dict))
+
+def predict_matrix(prices: pd.DataFrame,
+                   horizons: list[Horizon] = ("1h", "1d"),
+                   methods: list[str] = ("linear",),
+                   distance: int = 10) -> pd.DataFrame:
+    """
+    Predicts % change for every coin, horizon and method at once.
+
+    Each coin is predicted from the window ending at its own last valid
+    point, as predict_next would on that coin's series. `last`, `mean` and
+    `linear` are closed forms over masked window sums: the widest window is
+    gathered once and every horizon's sums are a few matrix-vector
+    products over its trailing rows. Missing points drop out
+    of the sums, with the line fitted at their grid positions. Other
+    methods fall back to predict_next per coin.
+
+    Args:
+        prices: time-by-coin frame on a regular grid (see price_matrix),
+            NaN where a coin has no data
+        horizons: horizons to predict
+        methods: prediction strategies to use
+        distance: minimum spacing between peaks/valleys (momentum_wave only)
+
+    Returns:
+        DataFrame indexed by coin with one column per (method, horizon).
+        Coins without any data are left out.
+    """
+    freq = prices.index.freq or prices.index.inferred_freq
+    if freq is None and len(prices.index) > 1:
+        raise ValueError("Price matrix has no frequency set or inferable.")
+
+    values = prices.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    has_data = valid.any(axis=0)
+    if not has_data.all():
+        values, valid = values[:, has_data], valid[:, has_data]
+    coins = prices.columns[has_data]
+    columns = pd.MultiIndex.from_product([list(methods), list(horizons)], names=["method", "horizon"])
+    result = pd.DataFrame(0.0, index=pd.Index(coins, name="coin"), columns=columns)
+    if not len(coins):
+        return result
+
+    n_rows, n_coins = values.shape
+    last = n_rows - 1 - valid[::-1].argmax(axis=0)
+    current = values[last, np.arange(n_coins)]
+    points = {h: window_points(freq, h) if freq is not None else 1 for h in horizons}
+
+    closed = [m for m in methods if m in MATRIX_METHODS]
+    width = max(points.values())
+    if width >= 2 and {"mean", "linear"} & set(closed):
+        with stage("predict.matrix"):
+            # The window's last row is each coin's last point, at x = 0
+            width = min(width, n_rows)
+            if np.all(last == n_rows - 1):
+                mask = valid[n_rows - width:]
+                y = np.nan_to_num(values[n_rows - width:] - current, copy=False)
+            else:
+                rows = last + np.arange(1 - width, 1)[:, None]
+                inside = rows >= 0
+                rows = np.maximum(rows, 0)
+                mask = inside & valid[rows, np.arange(n_coins)]
+                y = np.where(mask, values[rows, np.arange(n_coins)] - current, 0.0)
+            w = mask.astype(float)
+            x = np.arange(1 - width, 1, dtype=float)
+            powers = np.stack([np.ones_like(x), x, x * x])
+
+            for horizon, num in points.items():
+                if num < 2:
+                    continue
+                num = min(num, width)
+                n, sx, sxx = powers[:, -num:] @ w[-num:]
+                sy, sxy = powers[:2, -num:] @ y[-num:]
+                enough = n >= 2
+                n = np.where(enough, n, 1.0)
+                if "mean" in closed:
+                    result[("mean", horizon)] = np.where(enough, sy / n / current, 0.0)
+                if "linear" in closed:
+                    with np.errstate(invalid="ignore", divide="ignore"):
+                        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+                        # Line value one point after the last (x = 1), relative to it
+                        next_val = slope + (sy - slope * sx) / n
+                    result[("linear", horizon)] = np.where(enough, next_val / current, 0.0)
+
+    for method in methods:
+        if method in MATRIX_METHODS or method == "ensemble":
+            continue
+        with stage(f"predict.{method}"):
+            first = valid.argmax(axis=0)
+            for j, coin in enumerate(coins):
+                series = prices[coin].iloc[first[j] : last[j] + 1]
+                for horizon in horizons:
+                    result.loc[coin, (method, horizon)] = predict_next(series, horizon=horizon, method=method,
+                                                                       distance=distance)
+
+    if "ensemble" in methods:
+        from model.ensemble import DEFAULT_ENSEMBLE
+        ensemble = DEFAULT_ENSEMBLE
+        missing = [m for m in ensemble.members if m not in methods]
+        members = predict_matrix(prices, horizons, missing, distance) if missing else None
+        for horizon in horizons:
+            columns = {m: (result if m in methods else members)[(m, horizon)].to_numpy() for m in ensemble.members}
+            result[("ensemble", horizon)] = ensemble.combine(columns)
+    return result
+
 def predict_all(series_dict: dict[str, pd.Series],
                 horizon: Horizon = "1h",
-                method: Method = "linear") -> dict[str, float]:
+                method: Method = "linear",
+                configs: dict[str, dict] | None = None) -> dict[str, float]:
     """
     Predicts next % change for all coins in the dict.
+
+    `configs` maps coins to their own {"method", "lookback" (minutes),
+    "distance"}, e.g. from eval.tune.tuned_configs; each such coin is
+    predicted from its last `lookback` minutes with its method. Other coins
+    use `method`. Coins sharing a method and distance are predicted in one
+    predict_matrix call.
     """
-    return {
-        coin: predict_next(prices, horizon=horizon, method=method)
-        for coin, prices in series_dict.items()
-        if not prices.empty
-    }
+    configs = configs or {}
+    groups: dict[tuple[str, int], dict[str, pd.Series]] = {}
+    for coin, prices in series_dict.items():
+        config = configs.get(coin, {})
+        lookback = config.get("lookback")
+        freq = (prices.index.freq or prices.index.inferred_freq) if len(prices) > 2 else None
+        if lookback and freq is not None:
+            points = max(1, int(pd.Timedelta(minutes=lookback) // pd.Timedelta(freq)))
+            prices = prices.iloc[-points:]
+        groups.setdefault((config.get("method", method), config.get("distance") or 10), {})[coin] = prices
+
+    predictions = {}
+    with stage("predict"):
+        for (group_method, distance), group in groups.items():
+            table = predict_matrix(price_matrix(group), horizons=[horizon], methods=[group_method], distance=distance)
+            predictions.update(table[(group_method, horizon)].to_dict())
+    count("predict.coins", len(predictions))
+    return predictions
@@ -1,31 +1,131 @@
 # model/data_health.py
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from storage.coverage import MINUTE_NS, Coverage
+
+WINDOWS = ("1h", "24h", "7d")
+GAP_COLUMNS = ["coin", "start", "end", "minutes"]
 
 def compute_health(df: pd.DataFrame, hours: int = 24) -> pd.DataFrame:
     """
     Evaluate data coverage for each coin in a given hour window.
+    A minute counts as present if the coin has at least one point in it.
     Returns a DataFrame with: coin, % filled, number of points, expected points
     """
     cutoff = datetime.utcnow() - timedelta(hours=hours)
     df = df[df.index >= cutoff]
-
-    results = []
+    columns = [col for col in df.columns if col.startswith("prices.") and col.endswith(".usd")]
     expected_points = hours * 60  # 1-minute intervals
 
-    for col in df.columns:
-        if col.startswith("prices.") and col.endswith(".usd"):
-            coin = col.split(".")[1]
-            series = df[col].dropna()
-            actual = len(series)
-            fill_pct = actual / expected_points
-
-            results.append({
-                "coin": coin,
-                "minutes_present": actual,
-                "expected": expected_points,
-                "fill_pct": round(fill_pct * 100, 2)
-            })
-
-    return pd.DataFrame(results).sort_values("fill_pct", ascending=False)
+    # Rows grouped by minute, then one presence flag per (minute, coin) for all coins at once
+    present = df[columns].notna().to_numpy()
+    minutes = df.index.asi8 // MINUTE_NS
+    if len(minutes):
+        order = np.argsort(minutes, kind="stable")
+        minutes, present = minutes[order], present[order]
+        starts = np.flatnonzero(np.r_[True, minutes[1:] != minutes[:-1]])
+        actual = np.logical_or.reduceat(present, starts, axis=0).sum(axis=0)
+    else:
+        actual = np.zeros(len(columns), dtype=int)
+
+    return pd.DataFrame({
+        "coin": [col.split(".")[1] for col in columns],
+        "minutes_present": actual,
+        "expected": expected_points,
+        "fill_pct": np.round(actual / expected_points * 100, 2),
+    }).sort_values("fill_pct", ascending=False)
+
+def _end_minute(end) -> int:
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.utcnow())
+    return end.value // MINUTE_NS + 1  # window ends are exclusive
+
+def _index(coverages: dict[str, Coverage]) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Every coin's bounds and every gap, flattened into arrays with a coin number per gap
+    coins = [coin for coin, c in coverages.items() if c.first is not None]
+    first = np.array([coverages[coin].first for coin in coins], dtype="<i8")
+    last = np.array([coverages[coin].last for coin in coins], dtype="<i8")
+    gaps = [coverages[coin].gaps() for coin in coins]
+    starts = np.concatenate([s for s, _ in gaps]) if gaps else np.empty(0, dtype="<i8")
+    ends = np.concatenate([e for _, e in gaps]) if gaps else np.empty(0, dtype="<i8")
+    owner = np.repeat(np.arange(len(coins)), [len(s) for s, _ in gaps])
+    return coins, first, last, starts, ends, owner
+
+def fill_rates(coverages: dict[str, Coverage], windows: list = WINDOWS, end=None) -> pd.DataFrame:
+    """
+    Fraction of minutes with data in each window ending at `end` (default
+    now), for every coin at once: the window's overlap with the coin's
+    span minus its overlap with every gap. A window of None runs from
+    each coin's first minute.
+
+    Returns:
+        DataFrame indexed by coin with one column per window
+    """
+    coins, first, last, starts, ends, owner = _index(coverages)
+    stop = _end_minute(end)
+    lengths = np.array([pd.Timedelta(w) // pd.Timedelta("1min") if w is not None else -1 for w in windows])
+    begin = np.where(lengths >= 0, stop - lengths, first[:, None])  # (coin, window)
+
+    span = np.clip(np.minimum(last + 1, stop)[:, None] - np.maximum(first[:, None], begin), 0, None)
+    missing = np.zeros(span.shape)
+    if len(owner):
+        overlap = np.clip(np.minimum(ends, stop)[:, None] - np.maximum(starts[:, None], begin[owner]), 0, None)
+        np.add.at(missing, owner, overlap)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = (span - missing) / (stop - begin)
+    return pd.DataFrame(rates, index=pd.Index(coins, name="coin"), columns=[str(w) for w in windows])
+
+def gap_index(coverages: dict[str, Coverage], window="24h", end=None) -> pd.DataFrame:
+    """
+    Every missing stretch on the minute grid within the window ending at
+    `end` (default now): gaps between a coin's points, plus the stretch
+    before its first and after its last point, clipped to the window.
+
+    Returns:
+        DataFrame with columns: coin, start, end (exclusive), minutes
+    """
+    coins, first, last, starts, ends, owner = _index(coverages)
+    stop = _end_minute(end)
+    begin = stop - pd.Timedelta(window) // pd.Timedelta("1min")
+
+    lead_end = np.clip(first, begin, stop)
+    trail_start = np.clip(last + 1, begin, stop)
+    s = np.concatenate((np.maximum(starts, begin), np.full(len(coins), begin), trail_start))
+    e = np.concatenate((np.minimum(ends, stop), lead_end, np.full(len(coins), stop)))
+    who = np.concatenate((owner, np.arange(len(coins)), np.arange(len(coins))))
+    keep = e > s
+    s, e, who = s[keep], e[keep], who[keep]
+
+    order = np.lexsort((s, who))
+    return pd.DataFrame({
+        "coin": np.array(coins, dtype=object)[who[order]],
+        "start": pd.to_datetime(s[order] * MINUTE_NS),
+        "end": pd.to_datetime(e[order] * MINUTE_NS),
+        "minutes": (e - s)[order],
+    }, columns=GAP_COLUMNS)
+
+def health_report(coverages: dict[str, Coverage], windows: list = WINDOWS, end=None) -> pd.DataFrame:
+    """
+    Per coin: % filled in every window, the number of missing stretches
+    and the longest one (minutes) in the longest window, and the last
+    minute with data.
+    """
+    rates = fill_rates(coverages, windows, end=end)
+    longest = max(windows, key=lambda w: pd.Timedelta(w))
+    gaps = gap_index(coverages, longest, end=end).groupby("coin")["minutes"].agg(["size", "max"])
+
+    report = (rates * 100).round(2).add_prefix("fill_")
+    report["gaps"] = gaps["size"].reindex(report.index, fill_value=0)
+    report["longest_gap"] = gaps["max"].reindex(report.index, fill_value=0)
+    report["last_seen"] = pd.to_datetime([coverages[coin].last * MINUTE_NS for coin in report.index])
+    return report.reset_index().sort_values(f"fill_{longest}", ascending=False)
+
+def sparse_coins(coverages: dict[str, Coverage], window="24h", min_fill: float = 0.8, end=None) -> list[str]:
+    """
+    Coins with less than `min_fill` of the minutes in the window (or none
+    at all), to skip or mask before predicting.
+    """
+    rates = fill_rates(coverages, [window], end=end).iloc[:, 0]
+    return [coin for coin in coverages if not rates.get(coin, 0.0) >= min_fill]
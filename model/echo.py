@@ -0,0 +1,141 @@
+# model/echo.py
+
+import numpy as np
+import pandas as pd
+
+ECHO_COLUMNS = ["coin", "agreement", "amplification", "score", "lag", "lag_corr"]
+
+def returns_frame(series_dict: dict[str, pd.Series]) -> pd.DataFrame:
+    """
+    Per-minute returns of each coin normalized to its first price in the
+    window (the diff of the % change curves the chart plots), one column per
+    coin on a shared index. Minutes a coin has no data for are NaN.
+    """
+    normed = {
+        coin: series / series.iloc[0] - 1
+        for coin, series in series_dict.items()
+        if not series.empty
+    }
+    return pd.DataFrame(normed).diff().iloc[1:]
+
+def echo_matrix(returns: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """
+    Directional echo statistics for every ordered pair of coins at once.
+
+    For reference coin i (row) and coin j (column), over the minutes both
+    have a return:
+        agreement      share of minutes moving in the same direction
+        amplification  std of j's returns / std of i's returns, both over
+                       the same-direction minutes (0 if i's std is 0 or
+                       undefined)
+        score          agreement * amplification
+
+    Counts and sums are matrix products of the up/down indicator matrices,
+    so all pairs cost a few (coins x minutes) @ (minutes x coins) products
+    instead of a DataFrame per pair.
+    """
+    coins = list(returns.columns)
+    values = returns.to_numpy(dtype=float)
+    valid = ~np.isnan(values)
+    r = np.where(valid, values, 0.0)
+    up = (r > 0).astype(float)
+    down = (r < 0).astype(float)
+    v = valid.astype(float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        overlap = v.T @ v
+        same = up.T @ up + down.T @ down
+        agreement = same / overlap
+
+        # [i, j] = sum of j's returns (and squares) over minutes where i and j agree
+        s1 = up.T @ (up * r) + down.T @ (down * r)
+        s2 = up.T @ (up * r * r) + down.T @ (down * r * r)
+        var = np.maximum(s2 - s1 * s1 / same, 0.0) / (same - 1)
+        var[same < 2] = np.nan
+        alt_std = np.sqrt(var)
+        ref_std = alt_std.T
+        amplification = np.where(ref_std > 0, alt_std / ref_std, 0.0)
+
+    score = agreement * amplification
+
+    def frame(matrix):
+        return pd.DataFrame(matrix, index=coins, columns=coins)
+
+    return {
+        "agreement": frame(agreement),
+        "amplification": frame(amplification),
+        "score": frame(score),
+    }
+
+def cross_correlation(returns: pd.DataFrame, max_lag: int = 30) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Lagged cross-correlation of every pair of coins via FFT.
+
+    Returns (lags, corr) where corr[k, i, j] is the correlation between
+    coin i's return at minute t and coin j's at t + lags[k], so a peak at a
+    positive lag means i leads j. Each column is demeaned over its valid
+    minutes and missing minutes count as zero.
+    """
+    values = returns.to_numpy(dtype=float)
+    n, c = values.shape
+    max_lag = min(max_lag, max(n - 1, 0))
+    lags = np.arange(-max_lag, max_lag + 1)
+
+    with np.errstate(invalid="ignore"):
+        x = values - np.nanmean(values, axis=0)
+    x = np.nan_to_num(x)
+    norms = np.sqrt((x * x).sum(axis=0))
+
+    # Zero-padded to avoid circular wrap-around within +/- max_lag
+    nfft = 1 << int(np.ceil(np.log2(max(n + max_lag, 1))))
+    spectra = np.fft.rfft(x, n=nfft, axis=0)
+
+    corr = np.empty((len(lags), c, c))
+    for i in range(c):
+        cc = np.fft.irfft(np.conj(spectra[:, i:i + 1]) * spectra, n=nfft, axis=0)
+        corr[:, i, :] = cc[lags % nfft]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr /= np.outer(norms, norms)
+    return lags, corr
+
+def lead_lag(returns: pd.DataFrame, max_lag: int = 30) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Lag (in minutes) at which each pair correlates most, and that correlation.
+    lag[i, j] > 0 means j echoes i that many minutes later.
+    """
+    coins = list(returns.columns)
+    lags, corr = cross_correlation(returns, max_lag=max_lag)
+    best = np.argmax(np.where(np.isnan(corr), -np.inf, corr), axis=0)
+    best_corr = np.take_along_axis(corr, best[None], axis=0)[0]
+    return (
+        pd.DataFrame(lags[best], index=coins, columns=coins),
+        pd.DataFrame(best_corr, index=coins, columns=coins),
+    )
+
+def echo_ranking(returns: pd.DataFrame, reference: str = "bitcoin", max_lag: int = 30) -> pd.DataFrame:
+    """
+    How closely every other coin echoes `reference`, best score first.
+    """
+    echo = echo_matrix(returns)
+    lag, lag_corr = lead_lag(returns, max_lag=max_lag)
+
+    ranking = pd.DataFrame({
+        "coin": returns.columns,
+        "agreement": echo["agreement"].loc[reference].to_numpy(),
+        "amplification": echo["amplification"].loc[reference].to_numpy(),
+        "score": echo["score"].loc[reference].to_numpy(),
+        "lag": lag.loc[reference].to_numpy(),
+        "lag_corr": lag_corr.loc[reference].to_numpy(),
+    }, columns=ECHO_COLUMNS)
+    ranking = ranking[ranking["coin"] != reference]
+    return ranking.sort_values("score", ascending=False, kind="stable").reset_index(drop=True)
+
+def top_pairs(score: pd.DataFrame, top: int = 10) -> pd.DataFrame:
+    """
+    Highest-scoring (reference, coin) pairs from an echo score matrix.
+    """
+    pairs = score.stack().rename("score").reset_index()
+    pairs.columns = ["reference", "coin", "score"]
+    pairs = pairs[pairs["reference"] != pairs["coin"]]
+    return pairs.sort_values("score", ascending=False, kind="stable").head(top).reset_index(drop=True)
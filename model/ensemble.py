@@ -0,0 +1,161 @@
+# model/ensemble.py
+
+import numpy as np
+import pandas as pd
+from functools import cached_property
+from model.baseline import Horizon, window_points
+from model.projection import linear_fit
+from storage.resample import grid_resolution, resample_series
+
+DEFAULT_MEMBERS = ["mean", "linear", "momentum_wave"]
+VOTES = ["mean", "majority"]
+
+class WindowFeatures:
+    """
+    Intermediate results for one prediction window, each computed on first
+    use and then shared by every member: the trailing `horizon` window
+    (as predict_next takes it), its mean and least-squares line, and for
+    momentum_wave the resampled grid, its line, recent trend labels and
+    extrema.
+    The grid's line is the window's when resampling was a no-op.
+    """
+
+    def __init__(self, prices: pd.Series, horizon: Horizon = "1h", distance: int = 10):
+        freq = prices.index.freq or prices.index.inferred_freq
+        if freq is None:
+            raise ValueError("Time series has no frequency set or inferable.")
+
+        num_points = window_points(freq, horizon)
+        self.window = prices.iloc[max(0, len(prices) - num_points):]
+        self.horizon = horizon
+        self.distance = distance
+
+    @cached_property
+    def current(self) -> float:
+        return float(self.window.iloc[-1])
+
+    @cached_property
+    def mean(self) -> float:
+        return float(self.window.mean())
+
+    @cached_property
+    def fit(self) -> tuple[float, float]:
+        return linear_fit(self.window.values)
+
+    @cached_property
+    def grid(self) -> pd.Series:
+        return resample_series(self.window, grid_resolution(self.window))
+
+    @cached_property
+    def grid_fit(self) -> tuple[float, float]:
+        return self.fit if self.grid is self.window else linear_fit(self.grid.values)
+
+    @cached_property
+    def trend(self) -> pd.Series:
+        # Imported here: model.momentum pulls in scipy, which only momentum_wave needs
+        from model.momentum import classify_trend
+        # wave_adjust only reads the last 5 labels; each needs one point before it
+        return classify_trend(self.grid.iloc[-6:])
+
+    @cached_property
+    def extrema(self) -> tuple[list[pd.Timestamp], list[pd.Timestamp]]:
+        from model.momentum import find_peaks_and_valleys
+        return find_peaks_and_valleys(self.grid, distance=self.distance)
+
+def _projection(fit: tuple[float, float], values: np.ndarray) -> float:
+    # Same as model.projection.linear_projection, from a fit already made
+    slope, intercept = fit
+    next_val = slope * len(values) + intercept
+    return (next_val - values[-1]) / values[-1]
+
+def _last(f: WindowFeatures) -> float:
+    return 0.0
+
+def _mean(f: WindowFeatures) -> float:
+    return (f.mean - f.current) / f.current
+
+def _linear(f: WindowFeatures) -> float:
+    return _projection(f.fit, f.window.values)
+
+def _momentum_wave(f: WindowFeatures) -> float:
+    from model.momentum import wave_adjust
+    if len(f.grid) < 10:
+        return 0.0
+    peaks, valleys = f.extrema
+    return wave_adjust(f.grid, _projection(f.grid_fit, f.grid.values), f.trend, peaks, valleys)
+
+PREDICTORS = {"last": _last, "mean": _mean, "linear": _linear, "momentum_wave": _momentum_wave}
+MEMBERS = list(PREDICTORS)
+
+class Ensemble:
+    """
+    Combines the predictions of several methods into one.
+
+    Members listed in `invert` have their predictions negated first: a
+    model that is reliably wrong about direction still carries signal
+    (see with_inversions). Then, with weights defaulting to 1:
+
+        vote="mean":     weighted mean of the member predictions
+        vote="majority": the direction with the larger total weight of
+                         members predicting it, sized by the weighted mean
+                         of those members; 0 on a tie
+
+    `combine` works on scalars or on equally shaped arrays (one value per
+    window or coin), so precomputed member arrays combine in one step.
+    """
+
+    def __init__(self, members: list[str] = DEFAULT_MEMBERS, weights: dict[str, float] | None = None,
+                 invert: list[str] = (), vote: str = "mean"):
+        unknown = [m for m in [*members, *invert] if m not in PREDICTORS]
+        if unknown:
+            raise ValueError(f"Unknown ensemble member(s): {', '.join(unknown)}")
+        if vote not in VOTES:
+            raise ValueError(f"Unknown vote: {vote}")
+        if not members:
+            raise ValueError("An ensemble needs at least one member.")
+
+        self.members = list(members)
+        self.weights = dict(weights or {})
+        self.invert = frozenset(invert)
+        self.vote = vote
+
+    def __repr__(self) -> str:
+        return (f"Ensemble(members={self.members}, weights={self.weights}, "
+                f"invert={sorted(self.invert)}, vote={self.vote!r})")
+
+    def predict_members(self, features: WindowFeatures) -> dict[str, float]:
+        """
+        Every member's prediction for one window, as predict_next would
+        make it, from intermediates computed once.
+        """
+        if len(features.window) < 2:
+            return {m: 0.0 for m in self.members}
+        return {m: float(PREDICTORS[m](features)) for m in self.members}
+
+    def combine(self, predictions: dict[str, float | np.ndarray]) -> float | np.ndarray:
+        p = np.array([-np.asarray(predictions[m]) if m in self.invert else predictions[m] for m in self.members],
+                     dtype=float)
+        w = np.array([self.weights.get(m, 1.0) for m in self.members]).reshape(-1, *[1] * (p.ndim - 1))
+
+        if self.vote == "mean":
+            combined = (w * p).sum(axis=0) / w.sum()
+        else:
+            sign = np.sign(p)
+            agree = w * (sign == np.sign((w * sign).sum(axis=0)))
+            total = agree.sum(axis=0)
+            combined = np.where(total > 0, (agree * p).sum(axis=0) / np.where(total > 0, total, 1.0), 0.0)
+
+        return float(combined) if combined.ndim == 0 else combined
+
+    def predict(self, prices: pd.Series, horizon: Horizon = "1h", distance: int = 10) -> float:
+        return self.combine(self.predict_members(WindowFeatures(prices, horizon=horizon, distance=distance)))
+
+    def with_inversions(self, hit_rates: dict[str, float], threshold: float = 0.5) -> "Ensemble":
+        """
+        A copy that inverts every member whose directional hit rate (e.g.
+        from eval.backtest.member_scores) is below `threshold`.
+        """
+        weak = [m for m in self.members if hit_rates.get(m, threshold) < threshold]
+        return Ensemble(self.members, self.weights, invert=weak, vote=self.vote)
+
+DEFAULT_ENSEMBLE = Ensemble()
@@ -0,0 +1,248 @@
+# model/extrema.py
+
+import math
+from bisect import bisect_left
+from heapq import heappop, heappush
+
+class _PeakSelector:
+    """
+    Candidate peaks (local maxima) in position order, with the subset that
+    survives scipy.signal.find_peaks' `distance` filter.
+
+    find_peaks visits peaks from highest to lowest and drops every
+    not-yet-visited peak closer than `distance` to a kept one. Equivalently,
+    a peak is kept iff no kept peak of higher priority lies within
+    `distance`. Adding or removing a candidate only re-evaluates the
+    lower-priority neighbours whose blocker changed, in priority order.
+    Equal heights are ordered by position (the later peak wins).
+    """
+
+    def __init__(self, distance: float):
+        if distance < 1:
+            raise ValueError("`distance` must be greater or equal to 1")
+        self.distance = math.ceil(distance)
+        self.cands: list[list] = []  # [position, left_neighbor, height, kept]
+        self.kept_count = 0
+
+    def push(self, position: int, left: int, height: float) -> None:
+        self.cands.append([position, left, height, False])
+        self._resolve([len(self.cands) - 1])
+
+    def push_left(self, cand: list) -> None:
+        self.cands.insert(0, [cand[0], cand[1], cand[2], False])
+        self._resolve([0])
+
+    def pop(self) -> list:
+        return self._remove(len(self.cands) - 1)
+
+    def pop_left(self) -> list:
+        return self._remove(0)
+
+    def _remove(self, j: int) -> list:
+        cand = self.cands.pop(j)
+        if cand[3]:
+            self.kept_count -= 1
+            # Peaks it was suppressing may come back
+            self._resolve(self._lower_neighbors(cand, j))
+        return cand
+
+    def _lower_neighbors(self, cand: list, j: int) -> list[int]:
+        """
+        Indices of candidates within distance of `cand` with lower priority.
+        `j` is where cand sits (or would be inserted) in self.cands.
+        """
+        prio = (cand[2], cand[0])
+        found = []
+        k = j - 1
+        while k >= 0 and cand[0] - self.cands[k][0] < self.distance:
+            if (self.cands[k][2], self.cands[k][0]) < prio:
+                found.append(k)
+            k -= 1
+        k = j if j < len(self.cands) and self.cands[j] is not cand else j + 1
+        while k < len(self.cands) and self.cands[k][0] - cand[0] < self.distance:
+            if (self.cands[k][2], self.cands[k][0]) < prio:
+                found.append(k)
+            k += 1
+        return found
+
+    def _blocked(self, j: int) -> bool:
+        cand = self.cands[j]
+        prio = (cand[2], cand[0])
+        k = j - 1
+        while k >= 0 and cand[0] - self.cands[k][0] < self.distance:
+            other = self.cands[k]
+            if other[3] and (other[2], other[0]) > prio:
+                return True
+            k -= 1
+        k = j + 1
+        while k < len(self.cands) and self.cands[k][0] - cand[0] < self.distance:
+            other = self.cands[k]
+            if other[3] and (other[2], other[0]) > prio:
+                return True
+            k += 1
+        return False
+
+    def _resolve(self, seeds: list[int]) -> None:
+        # Highest priority first: when a candidate is evaluated, every
+        # candidate that could block it is already settled.
+        heap = []
+        for j in seeds:
+            cand = self.cands[j]
+            heappush(heap, (-cand[2], -cand[0]))
+        done = set()
+
+        while heap:
+            _, neg_pos = heappop(heap)
+            position = -neg_pos
+            if position in done:
+                continue
+            done.add(position)
+
+            j = self._index(position)
+            cand = self.cands[j]
+            kept = not self._blocked(j)
+            if kept == cand[3]:
+                continue
+
+            cand[3] = kept
+            self.kept_count += 1 if kept else -1
+            for k in self._lower_neighbors(cand, j):
+                heappush(heap, (-self.cands[k][2], -self.cands[k][0]))
+
+    def _index(self, position: int) -> int:
+        return bisect_left(self.cands, position, key=lambda c: c[0])
+
+    # === Queries ===
+
+    def positions(self) -> list[int]:
+        return [c[0] for c in self.cands if c[3]]
+
+    def first(self) -> int | None:
+        return next((c[0] for c in self.cands if c[3]), None)
+
+    def last(self) -> int | None:
+        return next((c[0] for c in reversed(self.cands) if c[3]), None)
+
+    def period(self) -> float | None:
+        """
+        Mean spacing between kept peaks, in samples.
+        """
+        if self.kept_count < 2:
+            return None
+        return (self.last() - self.first()) / (self.kept_count - 1)
+
+class ExtremaDetector:
+    """
+    Online equivalent of
+
+        find_peaks(x, distance=distance)   # peaks
+        find_peaks(-x, distance=distance)  # valleys
+
+    over every sample appended so far, or over the last `window` samples.
+    Positions are sample indices counted from the first append.
+
+    Samples appended with provisional=True (e.g. a minute bucket that is
+    still open) can be taken back with rollback(), which restores the exact
+    previous state, including candidates that slid out of the window.
+    """
+
+    def __init__(self, distance: float = 10, window: int | None = None):
+        self.peaks = _PeakSelector(distance)
+        self.valleys = _PeakSelector(distance)
+        self.window = window
+        self.count = 0
+        # Run of equal values ending at the newest sample:
+        # (value, start index, whether the sample before it was lower)
+        self._run: tuple[float, int, bool | None] | None = None
+        self._undo: list[tuple] = []
+
+    @property
+    def start(self) -> int:
+        """
+        Position of the oldest sample inside the window.
+        """
+        return 0 if self.window is None else max(0, self.count - self.window)
+
+    def append(self, value: float, provisional: bool = False) -> None:
+        if self._undo and not provisional:
+            raise ValueError("Roll back provisional samples before appending final ones")
+
+        run = self._run
+        i = self.count
+        self.count += 1
+        added_peak = added_valley = False
+
+        if run is None or math.isnan(value):
+            self._run = None if math.isnan(value) else (value, i, None)
+        elif value == run[0]:
+            pass
+        else:
+            run_value, run_start, rising = run
+            if rising is not None:
+                middle = (run_start + i - 1) // 2
+                if rising and value < run_value:
+                    self.peaks.push(middle, run_start - 1, run_value)
+                    added_peak = True
+                elif not rising and value > run_value:
+                    self.valleys.push(middle, run_start - 1, -run_value)
+                    added_valley = True
+            self._run = (value, i, value > run_value)
+
+        # A window edge cuts off any extremum whose rising/falling sample left the window
+        expired_peaks = self._expire(self.peaks)
+        expired_valleys = self._expire(self.valleys)
+
+        if provisional:
+            self._undo.append((run, added_peak, added_valley, expired_peaks, expired_valleys))
+
+    def _expire(self, selector: _PeakSelector) -> list[list]:
+        expired = []
+        while selector.cands and selector.cands[0][1] < self.start:
+            expired.append(selector.pop_left())
+        return expired
+
+    def rollback(self) -> None:
+        """
+        Undo every provisional append, newest first.
+        """
+        while self._undo:
+            run, added_peak, added_valley, expired_peaks, expired_valleys = self._undo.pop()
+            for cand in reversed(expired_peaks):
+                self.peaks.push_left(cand)
+            for cand in reversed(expired_valleys):
+                self.valleys.push_left(cand)
+            if added_peak:
+                self.peaks.pop()
+            if added_valley:
+                self.valleys.pop()
+            self._run = run
+            self.count -= 1
+
+    # === Queries ===
+
+    def peak_positions(self) -> list[int]:
+        return self.peaks.positions()
+
+    def valley_positions(self) -> list[int]:
+        return self.valleys.positions()
+
+    def last_peak(self) -> int | None:
+        return self.peaks.last()
+
+    def last_valley(self) -> int | None:
+        return self.valleys.last()
+
+    def next_trend_shift(self) -> float | None:
+        """
+        Position of the next expected peak or valley: the latest one plus
+        the mean spacing, as model.frequency.predict_next_trend_shift.
+        None if neither lies beyond the newest sample.
+        """
+        last_index = self.count - 1
+        candidates = []
+        for selector in (self.peaks, self.valleys):
+            last, period = selector.last(), selector.period()
+            if last is not None and period:
+                candidates.append(last + period)
+        candidates = [c for c in candidates if c > last_index]
+        return min(candidates) if candidates else None
@@ -1,13 +1,15 @@
 import pandas as pd
 from scipy.signal import find_peaks
 import numpy as np
+from model.extrema import ExtremaDetector
+from storage.resample import resample_series
 
 def estimate_cycle_frequency(series: pd.Series, distance: int = 10) -> dict:
     """
     Estimate the average frequency of peaks and valleys in a time series.
     Returns the average interval in minutes between peaks and valleys.
     """
-    series = series.dropna().resample('1min').mean().interpolate()
+    series = resample_series(series)
 
     peaks, _ = find_peaks(series.values, distance=distance)
     valleys, _ = find_peaks(-series.values, distance=distance)
@@ -40,4 +42,86 @@ def predict_next_trend_shift(series: pd.Series, distance: int = 10) -> pd.Timest
     next_valley = (cycle_info["last_valley"] + pd.Timedelta(minutes=cycle_info["valley_period"])) if cycle_info["last_valley"] and cycle_info["valley_period"] else None
 
     candidates = [t for t in [next_peak, next_valley] if t and t > last_time]
-    return min(candidates) if candidates else None
\ No newline at end of file
+    return min(candidates) if candidates else None
+
+class CycleTracker:
+    """
+    Online counterpart of estimate_cycle_frequency / predict_next_trend_shift
+    for a 1-minute series fed point by point.
+
+    Peaks and valleys come from an ExtremaDetector, which keeps find_peaks'
+    `distance` selection up to date as points arrive, so cycle_info() and
+    next_trend_shift() don't rescan the series. With `window`, only the last
+    `window` points count, as if the functions were called on that slice.
+    """
+
+    def __init__(self, distance: int = 10, window: int | None = None):
+        self.distance = distance
+        self.window = window
+        self._reset()
+
+    def _reset(self):
+        self.detector = ExtremaDetector(distance=self.distance, window=self.window)
+        self.start: pd.Timestamp | None = None
+        self.last_final: pd.Timestamp | None = None
+
+    def _time(self, position: float) -> pd.Timestamp:
+        return self.start + pd.Timedelta(minutes=position)
+
+    def _append(self, timestamp: pd.Timestamp, value: float, provisional: bool = False):
+        if self.start is None:
+            self.start = timestamp
+        if timestamp != self._time(self.detector.count):
+            raise ValueError(f"Expected the 1-minute point at {self._time(self.detector.count)}, got {timestamp}")
+        self.detector.append(float(value), provisional=provisional)
+        if not provisional:
+            self.last_final = timestamp
+
+    def update(self, timestamp, value: float) -> None:
+        """
+        Append the next point of the 1-minute grid.
+        """
+        self.detector.rollback()
+        self._append(pd.Timestamp(timestamp), value)
+
+    def extend(self, series: pd.Series) -> None:
+        """
+        Feed the points of a resampled series newer than those already seen.
+        Its last point is treated as provisional (an open minute bucket) and is
+        replaced by the next call. A series that doesn't continue the points
+        already seen restarts the tracker.
+        """
+        self.detector.rollback()
+        new = series if self.last_final is None else series[series.index > self.last_final]
+        if self.last_final is not None and not new.empty and new.index[0] != self._time(self.detector.count):
+            self._reset()
+            new = series
+        for ts, value in new.iloc[:-1].items():
+            self._append(ts, value)
+        if not new.empty:
+            self._append(new.index[-1], new.iloc[-1], provisional=True)
+
+    def peak_times(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex([self._time(p) for p in self.detector.peak_positions()])
+
+    def valley_times(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex([self._time(p) for p in self.detector.valley_positions()])
+
+    def cycle_info(self) -> dict:
+        """
+        Same dict as estimate_cycle_frequency.
+        """
+        last_peak, last_valley = self.detector.last_peak(), self.detector.last_valley()
+        return {
+            "peak_period": self.detector.peaks.period(),
+            "valley_period": self.detector.valleys.period(),
+            "last_peak": self._time(last_peak) if last_peak is not None else None,
+            "last_valley": self._time(last_valley) if last_valley is not None else None
+        }
+
+    def next_trend_shift(self) -> pd.Timestamp | None:
+        """
+        Same result as predict_next_trend_shift on the points seen so far.
+        """
+        position = self.detector.next_trend_shift()
+        return self._time(position) if position is not None else None
@@ -2,44 +2,52 @@ import pandas as pd
 import numpy as np
 from scipy.signal import find_peaks
 from model.projection import linear_projection
+from storage.resample import grid_resolution, resample_series
 
 def classify_trend(series: pd.Series, threshold=0.0) -> pd.Series:
     diff = series.diff()
-    return diff.apply(lambda x: 'up' if x > threshold else 'down')
+    return pd.Series(np.where(diff > threshold, 'up', 'down'), index=series.index)
 
 def find_peaks_and_valleys(series: pd.Series, distance: int = 10) -> tuple[list[pd.Timestamp], list[pd.Timestamp]]:
     peaks, _ = find_peaks(series.values, distance=distance)
     valleys, _ = find_peaks(-series.values, distance=distance)
     return list(series.index[peaks]), list(series.index[valleys])
 
-def momentum_wave_predict(series: pd.Series, horizon: str = '1h') -> float:
+def momentum_wave_predict(series: pd.Series, horizon: str = '1h', distance: int = 10) -> float:
     """
     Custom prediction logic:
     - Start with linear regression forecast
     - Adjust based on recent trend reversals and peak/valley proximity
     """
-    series = series.dropna().resample('1min').mean().interpolate()
+    series = resample_series(series, grid_resolution(series))
     if len(series) < 10:
         return 0.0
 
     base_pred = linear_projection(series, horizon)
+    peaks, valleys = find_peaks_and_valleys(series, distance=distance)
+    return wave_adjust(series, base_pred, classify_trend(series), peaks, valleys)
 
+def wave_adjust(series: pd.Series, base_pred: float, trend: pd.Series,
+                peaks: list[pd.Timestamp], valleys: list[pd.Timestamp]) -> float:
+    """
+    The momentum_wave adjustment of a linear forecast, given the series'
+    trend labels and extrema (shared with other predictors by model.ensemble).
+    """
     # Step 1: Classify trend
-    trend = classify_trend(series)
-    recent_trend = trend[-5:]  # Last 5 minutes
+    recent_trend = np.asarray(trend)[-5:]  # Last 5 minutes
 
-    # Step 2: Detect recent reversal
-    reversals = recent_trend.ne(recent_trend.shift()).sum()
-    last_trend = recent_trend.iloc[-1]
+    # Step 2: Detect recent reversal (the first label always counts, as ne(shift()) would)
+    reversals = 1 + np.count_nonzero(recent_trend[1:] != recent_trend[:-1])
+    last_trend = recent_trend[-1]
 
     # Step 3: Find distance to last peak/valley
-    peaks, valleys = find_peaks_and_valleys(series)
     if not peaks or not valleys:
         return base_pred
 
+    # Extrema come back in time order and never past the last sample
     last_time = series.index[-1]
-    last_peak = max([t for t in peaks if t <= last_time], default=None)
-    last_valley = max([t for t in valleys if t <= last_time], default=None)
+    last_peak = peaks[-1]
+    last_valley = valleys[-1]
 
     time_since_turn = min(
         (last_time - last_peak).seconds / 60 if last_peak else float('inf'),
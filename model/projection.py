@@ -1,5 +1,169 @@
 import numpy as np
 import pandas as pd
+from collections import deque
+
+PREFIX_BLOCK = 256  # windows per prefix-sum block in rolling_linear_fit / rolling_mean
+
+def linear_fit(values: np.ndarray) -> tuple[float, float]:
+    """
+    Least-squares line through values at x = 0..n-1.
+    Returns (slope, intercept); same fit as np.polyfit(x, values, 1).
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    x = np.arange(n) - (n - 1) / 2
+    y_mean = y.mean()
+    slope = (x @ y) / (x @ x)
+    return slope, y_mean - slope * (n - 1) / 2
+
+def rolling_linear_fit(values: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Least-squares slope and intercept for every full window of `values`,
+    in one pass over prefix sums.
+
+    Element j describes values[j : j + window] with x = 0..window-1, so the
+    arrays have len(values) - window + 1 entries.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if window < 2 or n < window:
+        return np.empty(0), np.empty(0)
+
+    count = n - window + 1
+    slope = np.empty(count)
+    intercept = np.empty(count)
+    sxx = window * (window ** 2 - 1) / 12
+
+    # Prefix sums are built per block with a local offset and local x so
+    # their magnitude stays small and differencing them keeps precision
+    # over long, drifting histories.
+    block = max(PREFIX_BLOCK, window)
+    for b in range(0, count, block):
+        m = min(block, count - b)
+        seg = y[b : b + m + window - 1]
+        offset = seg[0]
+        seg = seg - offset
+        i = np.arange(len(seg))
+
+        sum_y = np.concatenate(([0.0], np.cumsum(seg)))
+        sum_iy = np.concatenate(([0.0], np.cumsum(i * seg)))
+
+        start = np.arange(m)
+        sy = sum_y[start + window] - sum_y[start]
+        # sum of (x - x_mean) * y over the window, with x = i - start
+        sxy = (sum_iy[start + window] - sum_iy[start]) - (start + (window - 1) / 2) * sy
+
+        slope[b : b + m] = sxy / sxx
+        intercept[b : b + m] = sy / window + offset - slope[b : b + m] * (window - 1) / 2
+
+    return slope, intercept
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of every full window of `values`: element j is the mean of
+    values[j : j + window]. Prefix sums are built per block with a local
+    offset, as in rolling_linear_fit, so a window's mean only depends on
+    the values of its block.
+    """
+    y = np.asarray(values, dtype=float)
+    n = len(y)
+    if window < 1 or n < window:
+        return np.empty(0)
+
+    count = n - window + 1
+    mean = np.empty(count)
+    block = max(PREFIX_BLOCK, window)
+    for b in range(0, count, block):
+        m = min(block, count - b)
+        seg = y[b : b + m + window - 1]
+        offset = seg[0]
+        sum_y = np.concatenate(([0.0], np.cumsum(seg - offset)))
+        mean[b : b + m] = (sum_y[window : window + m] - sum_y[:m]) / window + offset
+    return mean
+
+class RollingLinearFit:
+    """
+    Online least-squares fit over the last `window` samples.
+
+    Keeps running sums of y and x*y (x = position in the window), so each
+    update and each slope/intercept query is O(1). The sums are rebuilt from
+    the buffer once per `window` updates to stop rounding drift.
+    """
+
+    def __init__(self, window: int):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+        self.window = window
+        self.values: deque[float] = deque(maxlen=window)
+        self._sum_y = 0.0
+        self._sum_xy = 0.0
+        self._updates = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def update(self, value: float) -> None:
+        value = float(value)
+        full = len(self.values) == self.window
+        if full:
+            # Drop x = 0 and shift every remaining x down by one
+            self._sum_y -= self.values[0]
+            self._sum_xy -= self._sum_y
+
+        position = self.window - 1 if full else len(self.values)
+        self._sum_xy += position * value
+        self._sum_y += value
+        self.values.append(value)
+
+        self._updates += 1
+        if self._updates % self.window == 0:
+            y = np.fromiter(self.values, dtype=float)
+            self._sum_y = y.sum()
+            self._sum_xy = np.arange(len(y)) @ y
+
+    def replace_last(self, value: float, back: int = 0) -> None:
+        """
+        Overwrite a recent sample, `back` positions before the newest one,
+        e.g. while a resample bucket is still open.
+        """
+        if not self.values:
+            self.update(value)
+            return
+        value = float(value)
+        position = len(self.values) - 1 - back
+        delta = value - self.values[position]
+        self._sum_y += delta
+        self._sum_xy += position * delta
+        self.values[position] = value
+
+    def mean(self) -> float:
+        n = len(self.values)
+        return self._sum_y / n if n else 0.0
+
+    def slope(self) -> float:
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2
+        sxx = n * (n ** 2 - 1) / 12
+        return (self._sum_xy - sum_x * self._sum_y / n) / sxx
+
+    def intercept(self) -> float:
+        n = len(self.values)
+        if n == 0:
+            return 0.0
+        return self._sum_y / n - self.slope() * (n - 1) / 2
+
+    def projection(self) -> float:
+        """
+        Predicted % change of the next sample, as linear_projection.
+        """
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        next_val = self.slope() * n + self.intercept()
+        current_price = self.values[-1]
+        return (next_val - current_price) / current_price
 
 def linear_projection(window: pd.Series, horizon: str = "1h") -> float:
     """
@@ -9,9 +173,8 @@ def linear_projection(window: pd.Series, horizon: str = "1h") -> float:
     if len(window) < 2:
         return 0.0
 
-    x = np.arange(len(window))
     y = window.values
-    coef = np.polyfit(x, y, 1)  # linear fit
-    next_val = coef[0] * (x[-1] + 1) + coef[1]
+    slope, intercept = linear_fit(y)
+    next_val = slope * len(y) + intercept
     current_price = y[-1]
     return (next_val - current_price) / current_price
@@ -0,0 +1,172 @@
+# model/streaming.py
+
+import math
+import pandas as pd
+from model.extrema import ExtremaDetector
+from model.projection import RollingLinearFit
+
+# Points predict_next looks at on a 1-minute grid
+HORIZON_POINTS = {"1h": 60, "1d": 1440}
+
+class StreamingPredictor:
+    """
+    Stateful per-coin forecaster fed one tick at a time.
+
+    Ticks are bucketed onto the 1-minute grid the batch predictors use: the
+    current minute's mean is kept as a provisional last point, gaps between
+    minutes are linearly interpolated. Rolling regression sums for the 1h and
+    1d windows, the last trend labels and the latest peak/valley are kept as
+    state, so each update and prediction is O(1) (amortized over gap fills).
+    For `momentum_wave`, an ExtremaDetector per window keeps find_peaks'
+    peak/valley selection up to date incrementally.
+
+    Matches predict_next on the resampled history seen so far.
+    """
+
+    def __init__(self, method: str = "linear", distance: int = 10):
+        if method not in ("last", "mean", "linear", "momentum_wave"):
+            raise ValueError(f"Unknown method: {method}")
+        self.method = method
+        self.distance = distance
+        self.fits = {h: RollingLinearFit(points) for h, points in HORIZON_POINTS.items()}
+        self.detectors = {
+            h: ExtremaDetector(distance=distance, window=points)
+            for h, points in HORIZON_POINTS.items()
+        } if method == "momentum_wave" else {}
+        self._final = 0  # closed (non-provisional) minutes
+        self.last_timestamp: pd.Timestamp | None = None
+        # Open minute, its running mean, and the interpolated minutes between
+        # the last closed minute (`_anchor`) and it. Both stay provisional
+        # until the next minute starts.
+        self._minute: pd.Timestamp | None = None
+        self._sum = 0.0
+        self._count = 0
+        self._anchor: float | None = None
+        self._gap = 0
+
+    @property
+    def points(self) -> int:
+        """
+        Number of 1-minute points seen, including provisional ones.
+        """
+        return self._final + (self._gap + 1 if self._minute is not None else 0)
+
+    def update(self, timestamp, price: float) -> dict[str, float]:
+        """
+        Feed one tick. Returns the current {"1h": ..., "1d": ...} predictions.
+        Ticks older than the open minute are ignored.
+        """
+        price = float(price)
+        ts = pd.Timestamp(timestamp)
+        if math.isnan(price):
+            return self.predictions()
+
+        minute = ts.floor("1min")
+
+        if self._minute is None:
+            self._open(minute, price, gap=0)
+        elif minute == self._minute:
+            self._sum += price
+            self._count += 1
+            mean = self._sum / self._count
+            for fit in self.fits.values():
+                fit.replace_last(mean)
+                for k in range(1, self._gap + 1):
+                    fit.replace_last(self._interpolate(k, mean), back=self._gap + 1 - k)
+            self._detect(mean, provisional=True)
+        elif minute > self._minute:
+            closed = self._sum / self._count
+            self._detect(closed, provisional=False)
+            self._final += self._gap + 1
+
+            self._anchor = closed
+            gap = int((minute - self._minute) / pd.Timedelta("1min")) - 1
+            self._open(minute, price, gap=gap)
+        else:
+            return self.predictions()
+
+        if self.last_timestamp is None or ts > self.last_timestamp:
+            self.last_timestamp = ts
+        return self.predictions()
+
+    def _interpolate(self, k: int, value: float) -> float:
+        # k-th missing minute between the anchor and the open minute's value
+        return self._anchor + (value - self._anchor) * k / (self._gap + 1)
+
+    def _open(self, minute: pd.Timestamp, price: float, gap: int):
+        self._minute = minute
+        self._sum = price
+        self._count = 1
+        self._gap = gap
+        for fit in self.fits.values():
+            for k in range(1, gap + 1):
+                fit.update(self._interpolate(k, price))
+            fit.update(price)
+        self._detect(price, provisional=True)
+
+    def _detect(self, value: float, provisional: bool):
+        # (Re)append the gap minutes and the open minute with its current value
+        for detector in self.detectors.values():
+            detector.rollback()
+            for k in range(1, self._gap + 1):
+                detector.append(self._interpolate(k, value), provisional=provisional)
+            detector.append(value, provisional=provisional)
+
+    def predictions(self) -> dict[str, float]:
+        return {h: self.predict(h) for h in HORIZON_POINTS}
+
+    def predict(self, horizon: str = "1h") -> float:
+        """
+        Predicted % change for the horizon, as predict_next would return for
+        the resampled history seen so far.
+        """
+        fit = self.fits[horizon]
+        n = len(fit)
+        if n < 2 or self.method == "last":
+            return 0.0
+
+        current_price = fit.values[-1]
+
+        if self.method == "mean":
+            return (fit.mean() - current_price) / current_price
+
+        if self.method == "linear":
+            return fit.projection()
+
+        return self._momentum_wave(horizon)
+
+    def _momentum_wave(self, horizon: str) -> float:
+        # Mirrors model.momentum.momentum_wave_predict on the window in `fit`
+        fit = self.fits[horizon]
+        n = len(fit)
+        if n < 10:
+            return 0.0
+
+        base_pred = fit.projection()
+
+        # Trend labels of the last 5 minutes; the first label always counts
+        # as a change, as in `recent_trend.ne(recent_trend.shift()).sum()`
+        values = [fit.values[-6 + k] for k in range(6)]
+        trend = ["up" if values[k + 1] - values[k] > 0 else "down" for k in range(5)]
+        reversals = 1 + sum(trend[k] != trend[k - 1] for k in range(1, 5))
+        last_trend = trend[-1]
+
+        detector = self.detectors[horizon]
+        last_peak, last_valley = detector.last_peak(), detector.last_valley()
+        if last_peak is None or last_valley is None:
+            return base_pred
+
+        last_index = detector.count - 1
+        time_since_turn = min(last_index - last_peak, last_index - last_valley)
+
+        boost = 1.0
+        if reversals >= 2:
+            if last_trend == "up":
+                boost += 0.5
+            elif last_trend == "down":
+                boost -= 0.5
+
+        if time_since_turn < 5:
+            boost *= 0.5
+
+        return base_pred * boost
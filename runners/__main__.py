@@ -0,0 +1,51 @@
+# runner/__main__.py
+
+import argparse
+import importlib
+import sys
+from runners import config
+
+# Subcommand -> (module, summary). A command's module is only imported when
+# it runs, so pandas, scipy and matplotlib load only for commands that use them.
+COMMANDS = {
+    "scan": ("runners.scan", "Collect per-minute prices into the log"),
+    "chart": ("runners.load", "Live chart of prices, trends and the BTC echo ranking"),
+    "health": ("runners.data_health_runner", "Per-coin data coverage report"),
+    "baseline": ("runners.baseline_runner", "Next-hour and next-day predictions per coin"),
+    "backtest": ("runners.backtest_runner", "Backtest prediction methods and horizons"),
+    "sweep": ("runners.sweep_runner", "Tune backtest parameters per coin"),
+    "tune": ("runners.tune_runner", "Walk-forward per-coin tuning, memoized across runs"),
+    "simulate": ("runners.simulate_runner", "Trade on backtest signals with fees and slippage"),
+    "echo": ("runners.echo_runner", "Echo matrix and lead/lag between coins"),
+    "stream": ("runners.stream_runner", "Streaming predictions while the log grows"),
+    "convert": ("runners.convert_runner", "Convert the log to the columnar store"),
+    "partition": ("runners.partition_runner", "Split a single JSONL log into daily partitions"),
+    "bench": ("runners.bench_runner", "Benchmark the pipeline on synthetic data"),
+}
+
+def build_parser() -> argparse.ArgumentParser:
+    commands = "\n".join(f"  {name:<11} {summary}" for name, (_, summary) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog="python -m runners",
+        description="Crypto signal scanner. Run `python -m runners <command> --help` for a command's options.",
+        epilog=f"commands:\n{commands}",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--log-file", default=None,
+                        help=f"Price log for every command (default: ${config.LOGFILE_ENV_VAR} or {config.DEFAULT_LOGFILE})")
+    parser.add_argument("command", choices=COMMANDS, metavar="command", help="One of the commands below")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    return parser
+
+def main(argv: list[str] | None = None):
+    args = build_parser().parse_args(argv)
+    if args.log_file:
+        config.LOGFILE = args.log_file
+
+    module_name, _ = COMMANDS[args.command]
+    module = importlib.import_module(module_name)
+    sys.argv[0] = f"python -m runners {args.command}"  # argparse prog in the command's help
+    return module.main(args.args)
+
+if __name__ == "__main__":
+    sys.exit(main())
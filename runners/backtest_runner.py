@@ -1,57 +1,71 @@
 # runner/backtest_runner.py
 
 import argparse
-import json
-import pandas as pd
-from model.baseline import predict_next
-from eval.backtest import backtest_one
+from datetime import timedelta
+from eval.chunked import backtest_chunked
+from eval.parallel import backtest_matrix
+from instrument import add_profile_args, setup_profiling, stage
+from runners.config import LOGFILE
+from storage.loader import load_series_dict
+from storage.pyramid import LEVELS, check_resolution, resolution_for
 
-def load_series_dict(logfile_path: str, hours: int) -> dict[str, pd.Series]:
-    with open(logfile_path, "r") as f:
-        data = [json.loads(line) for line in f]
+METHODS = ["last", "mean", "linear", "momentum_wave", "ensemble"]
+HORIZONS = ["1h", "1d"]
 
-    df = pd.json_normalize(data)
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df.set_index("timestamp", inplace=True)
-    df.index = df.index.tz_localize("UTC")
-
-
-    cutoff = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=hours)
-    df = df[df.index >= cutoff]
-
-    series_dict = {}
-    for col in df.columns:
-        if col.startswith("prices.") and col.endswith(".usd"):
-            coin = col.split(".")[1]
-            series = df[col].dropna()
-            series = series.resample("1min").mean().interpolate()
-            series_dict[coin] = series
-
-    return series_dict
-
-def main():
+def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--hours", type=int, default=72, help="How many hours of history to backtest")
-    parser.add_argument("--horizon", choices=["1h", "1d"], default="1h", help="Prediction horizon")
-    parser.add_argument("--method", choices=["last", "mean", "linear", "momentum_wave"], default="linear", help="Prediction method")
-    args = parser.parse_args()
+    parser.add_argument("--horizon", choices=HORIZONS, default="1h", help="Prediction horizon")
+    parser.add_argument("--method", choices=METHODS, default="linear", help="Prediction method")
+    parser.add_argument("--horizons", nargs="+", choices=HORIZONS, help="Backtest several horizons in one run")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, help="Backtest several methods in one run")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count, 1 = in-process)")
+    parser.add_argument("--step", type=int, default=10, help="Minutes between backtested windows")
+    parser.add_argument("--lookback", type=int, default=60, help="Minutes of history per prediction")
+    parser.add_argument("--resolution", choices=[*LEVELS, "auto"], default="1min",
+                        help="Backtest on pyramid bars of this size (auto: finest that fits --hours in ~1000 bars, "
+                             "keeping 2+ bars per horizon and lookback)")
+    parser.add_argument("--chunk-hours", type=float, default=None,
+                        help="Stream the log in chunks of this many hours, with memory bounded by the chunk (1min only)")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
 
-    print(f"📥 Loading last {args.hours} hours of data...")
-    series_dict = load_series_dict("crypto_prices_log.jsonl", hours=args.hours)
+    methods = args.methods or [args.method]
+    horizons = args.horizons or [args.horizon]
+    matrix = len(methods) > 1 or len(horizons) > 1
 
-    print(f"\n🔁 Backtesting {args.method} predictor with horizon = {args.horizon}...\n")
+    if args.chunk_hours:
+        if args.resolution != "1min":
+            parser.error("--chunk-hours backtests the 1-minute grid; drop --resolution")
+        print(f"\n🔁 Streaming the last {args.hours} hours in {args.chunk_hours:g}h chunks: "
+              f"{', '.join(methods)} predictor(s) with horizon = {', '.join(horizons)}...\n")
+        with stage("backtest.chunked"):
+            results_df = backtest_chunked(LOGFILE, methods, horizons, hours=args.hours, chunk_hours=args.chunk_hours,
+                                          step_minutes=args.step, lookback_minutes=args.lookback)
+    else:
+        windows = {f"{h} horizon": h for h in horizons} | {f"{args.lookback}min lookback": timedelta(minutes=args.lookback)}
+        try:
+            if args.resolution == "auto":
+                resolution = resolution_for(timedelta(hours=args.hours), windows=windows)
+            else:
+                resolution = args.resolution
+                check_resolution(resolution, windows)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"📥 Loading last {args.hours} hours of data ({resolution} bars)...")
+        series_dict = load_series_dict(LOGFILE, hours=args.hours, resolution=resolution)
 
-    results = []
+        print(f"\n🔁 Backtesting {', '.join(methods)} predictor(s) with horizon = {', '.join(horizons)}...\n")
 
-    for coin, series in series_dict.items():
-        df = backtest_one(series, horizon=args.horizon, method=args.method)
-        if not df.empty:
-            mae = df["error"].abs().mean()
-            hit_rate = df["hit"].mean()
-            results.append((coin, len(df), mae, hit_rate))
+        with stage("backtest.matrix"):
+            results_df = backtest_matrix(series_dict, methods, horizons, workers=args.workers,
+                                         step_minutes=args.step, lookback_minutes=args.lookback)
 
-    results_df = pd.DataFrame(results, columns=["Coin", "Points", "MAE", "Hit Rate"])
-    results_df = results_df.sort_values("Hit Rate", ascending=False)
+    if matrix:
+        results_df = results_df.sort_values(["Method", "Horizon", "Hit Rate"], ascending=[True, True, False])
+    else:
+        results_df = results_df.drop(columns=["Method", "Horizon"]).sort_values("Hit Rate", ascending=False)
 
     print(results_df.to_string(index=False, float_format="%.4f"))
 
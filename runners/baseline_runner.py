@@ -1,48 +1,57 @@
 # runner/baseline_runner.py
 
-import json
 import argparse
-import pandas as pd
-from datetime import datetime, timedelta
-from model.baseline import predict_all
+from datetime import timedelta
+from eval.tune import load_tuned
+from instrument import add_profile_args, setup_profiling
+from model.baseline import predict_all, predict_matrix, price_matrix
+from model.data_health import sparse_coins
+from runners.config import LOGFILE
+from storage.loader import load_coverage, load_series_dict
+from storage.pyramid import LEVELS, check_resolution, resolution_for
 
-LOGFILE = "crypto_prices_log.jsonl"
-
-def load_series_dict(logfile_path: str, hours: int) -> dict[str, pd.Series]:
-    with open(logfile_path, 'r') as f:
-        data = [json.loads(line) for line in f]
-
-    df = pd.json_normalize(data)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.set_index('timestamp', inplace=True)
-
-    cutoff = datetime.utcnow() - timedelta(hours=hours)
-    df = df[df.index >= cutoff]
-
-    # Explode into separate series per coin
-    series_dict = {}
-    for col in df.columns:
-        if col.startswith('prices.') and col.endswith('.usd'):
-            coin = col.split('.')[1]
-            series = df[col].dropna()
-            series = series.resample('1min').mean().interpolate()
-            series_dict[coin] = series
-
-    return series_dict
-
-def main():
+def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser()
     parser.add_argument("--hours", type=int, default=48, help="How many hours of history to use")
-    args = parser.parse_args()
+    parser.add_argument("--resolution", choices=[*LEVELS, "auto"], default="1min",
+                        help="Predict from pyramid bars of this size (auto: finest that fits --hours in ~1000 bars, "
+                             "keeping 2+ bars per horizon)")
+    parser.add_argument("--tuned", default=None, help="Per-coin configurations from `tune` (tuned.json) for their horizon")
+    parser.add_argument("--min-fill", type=float, default=None,
+                        help="Skip coins with data in less than this fraction of the minutes in --hours (e.g. 0.8)")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    windows = {"1h horizon": "1h", "1d horizon": "1d"}
+    try:
+        if args.resolution == "auto":
+            resolution = resolution_for(timedelta(hours=args.hours), windows=windows)
+        else:
+            resolution = args.resolution
+            check_resolution(resolution, windows)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"📥 Loading last {args.hours}h of data ({resolution} bars)...")
+    series_dict = load_series_dict(LOGFILE, hours=args.hours, resolution=resolution)
 
-    print(f"📥 Loading last {args.hours}h of data...")
-    series_dict = load_series_dict(LOGFILE, hours=args.hours)
+    if args.min_fill is not None:
+        sparse = sparse_coins(load_coverage(LOGFILE), window=f"{args.hours}h", min_fill=args.min_fill)
+        skipped = sorted(coin for coin in sparse if coin in series_dict)
+        if skipped:
+            print(f"🕳️ Skipping {len(skipped)} sparse coin(s) under {args.min_fill:.0%} filled: {', '.join(skipped)}")
+        series_dict = {coin: prices for coin, prices in series_dict.items() if coin not in sparse}
 
-    print("\n🔮 Predicting next-hour % change...")
-    next_hour = predict_all(series_dict, horizon='1h', method='linear')
+    print("\n🔮 Predicting next-hour and next-day % change...")
+    predictions = predict_matrix(price_matrix(series_dict), horizons=["1h", "1d"], methods=["linear"])
+    next_hour = predictions[("linear", "1h")].to_dict()
+    next_day = predictions[("linear", "1d")].to_dict()
 
-    print("\n📆 Predicting next-day % change...")
-    next_day = predict_all(series_dict, horizon='1d', method='linear')
+    if args.tuned:
+        horizon, configs = load_tuned(args.tuned)
+        print(f"🎛️ Using tuned per-coin configurations from {args.tuned} for {horizon}")
+        tuned = predict_all(series_dict, horizon=horizon, configs=configs)
+        (next_hour if horizon == "1h" else next_day).update(tuned)
 
     print("\n=== Predicted Returns ===")
     print(f"{'Coin':<10} {'Next 1h':>10} {'Next 1d':>10}")
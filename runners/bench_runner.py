@@ -0,0 +1,68 @@
+# runner/bench_runner.py
+
+import argparse
+import os
+import sys
+import tempfile
+from bench.suite import METHODS, compare, load_report, make_report, run_suite, save_report
+from bench.synthetic import DEFAULT_COINS, generate_log
+from instrument import add_profile_args, setup_profiling
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=float, default=2, help="Days of synthetic history to generate")
+    parser.add_argument("--coins", type=int, default=len(DEFAULT_COINS), help="Number of synthetic coins")
+    parser.add_argument("--volatility", type=float, default=0.001, help="Per-minute log-return std")
+    parser.add_argument("--gap-rate", type=float, default=0.001, help="Chance per minute of an outage starting")
+    parser.add_argument("--drop-rate", type=float, default=0.01, help="Chance of a coin missing from a record")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generator")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS, help="Prediction methods to time")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage (best time is reported)")
+    parser.add_argument("--log", default=None, help="Benchmark this existing log instead of generating one")
+    parser.add_argument("--out", default="bench_report.json", help="Where to write the JSON report")
+    parser.add_argument("--baseline", default=None, help="Report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Relative slowdown flagged as a regression")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    coins = DEFAULT_COINS[:args.coins] + [f"coin{i}" for i in range(len(DEFAULT_COINS), args.coins)]
+    params = {
+        "days": args.days, "coins": args.coins, "volatility": args.volatility, "gap_rate": args.gap_rate,
+        "drop_rate": args.drop_rate, "seed": args.seed, "repeat": args.repeat, "methods": args.methods,
+        "log": args.log,
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        logfile = args.log
+        if logfile is None:
+            logfile = os.path.join(workdir, "crypto_prices_log.jsonl")
+            print(f"🧬 Generating {args.days:g} days x {len(coins)} coins...")
+            records = generate_log(logfile, coins=coins, days=args.days, volatility=args.volatility,
+                                   gap_rate=args.gap_rate, drop_rate=args.drop_rate, seed=args.seed)
+            print(f"   {records} records, {os.path.getsize(logfile) / 1e6:.1f} MB\n")
+
+        print(f"⏱️ Timing stages (best of {args.repeat})...")
+        results = run_suite(logfile, workdir, repeat=args.repeat, methods=args.methods, reference=coins[0],
+                            on_stage=lambda name, r: print(f"{name:<32} {r['best'] * 1000:>10.2f} ms"))
+
+    report = make_report(results, params)
+    save_report(report, args.out)
+    print(f"\n💾 Wrote {args.out}")
+
+    if args.baseline:
+        baseline = load_report(args.baseline)
+        if baseline["params"] != params:
+            print("[WARN] Baseline was run with different parameters; timings may not be comparable.")
+
+        diff = compare(report, baseline, threshold=args.threshold)
+        print(f"\n📊 Compared to {args.baseline}:\n")
+        print(diff.to_string(index=False, float_format="%.4f"))
+
+        regressions = diff[diff["status"] == "slower"]
+        if not regressions.empty:
+            print(f"\n❌ {len(regressions)} stage(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
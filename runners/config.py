@@ -0,0 +1,22 @@
+# runner/config.py
+
+import os
+
+# Settings shared by every runner. Environment variables override the
+# defaults; `python -m runners --log-file ...` overrides LOGFILE for one run.
+# Kept free of heavy imports so the CLI can read it before picking a command.
+
+LOGFILE_ENV_VAR = "CRYPTO_LOG_FILE"
+COINS_ENV_VAR = "CRYPTO_COINS"      # comma-separated CoinGecko ids
+API_URL_ENV_VAR = "CRYPTO_API_URL"
+
+DEFAULT_LOGFILE = "crypto_prices_log.jsonl"
+DEFAULT_API_URL = "https://api.coingecko.com/api/v3/simple/price"
+DEFAULT_COINS = [
+    "bitcoin", "ethereum", "litecoin", "binancecoin", "cardano",
+    "solana", "dogecoin", "shibainu", "polygon", "chainlink"
+]
+
+LOGFILE = os.environ.get(LOGFILE_ENV_VAR) or DEFAULT_LOGFILE
+API_URL = os.environ.get(API_URL_ENV_VAR) or DEFAULT_API_URL
+COINS = [c.strip() for c in os.environ.get(COINS_ENV_VAR, "").split(",") if c.strip()] or DEFAULT_COINS
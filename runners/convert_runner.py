@@ -0,0 +1,32 @@
+# runner/convert_runner.py
+
+import argparse
+from instrument import add_profile_args, setup_profiling, stage
+from runners.config import LOGFILE
+from storage.loader import open_partitions, store_path_for
+from storage.partitioned import convert_partitions
+from storage.price_store import convert_jsonl
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Convert the JSONL price log into the columnar price store")
+    parser.add_argument("--logfile", default=LOGFILE, help="JSONL log (or the partitioned log replacing it) to convert")
+    parser.add_argument("--store", default=None, help="Store directory (default: <logfile>.store)")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    store_path = args.store or store_path_for(args.logfile)
+
+    partitions = open_partitions(args.logfile)
+    source = partitions.path if partitions is not None else args.logfile
+
+    print(f"📦 Converting {source} -> {store_path}...")
+    with stage("convert"):
+        if partitions is not None:
+            added = convert_partitions(partitions.path, store_path)
+        else:
+            added = convert_jsonl(args.logfile, store_path)
+    print(f"✅ Appended {added} rows")
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,35 @@
 # runner/data_health_runner.py
 
 import argparse
-import json
 import pandas as pd
-from model.data_health import compute_health
+from instrument import add_profile_args, setup_profiling, stage
+from model.data_health import WINDOWS, gap_index, health_report
+from runners.config import LOGFILE
+from storage.loader import load_coverage
 
-def load_dataframe(logfile: str = "crypto_prices_log.jsonl") -> pd.DataFrame:
-    with open(logfile, "r") as f:
-        lines = [json.loads(line) for line in f]
-
-    df = pd.json_normalize(lines)
-    df["timestamp"] = pd.to_datetime(df["timestamp"])
-    df.set_index("timestamp", inplace=True)
-    return df
-
-def main():
+def main(argv: list[str] | None = None):
     parser = argparse.ArgumentParser()
-    parser.add_argument("--hours", type=int, default=24, help="How many hours back to check")
-    args = parser.parse_args()
+    parser.add_argument("--windows", nargs="+", default=list(WINDOWS), help="Windows to report fill rates for")
+    parser.add_argument("--hours", type=int, default=None, help="Only check the last N hours (overrides --windows)")
+    parser.add_argument("--gaps", type=int, default=0, help="Also list the N longest missing stretches")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
 
-    df = load_dataframe()
-    health_df = compute_health(df, hours=args.hours)
+    windows = [f"{args.hours}h"] if args.hours else args.windows
+    coverages = load_coverage(LOGFILE)
+    with stage("health"):
+        health_df = health_report(coverages, windows)
 
-    print(f"\n📊 Data Health Report (last {args.hours} hours)\n")
+    print(f"\n📊 Data Health Report (last {', '.join(windows)})\n")
     print(health_df.to_string(index=False))
 
+    if args.gaps:
+        longest = max(windows, key=lambda w: pd.Timedelta(w))
+        with stage("health.gaps"):
+            gaps_df = gap_index(coverages, longest).nlargest(args.gaps, "minutes")
+        print(f"\n🕳️ Longest gaps (last {longest})\n")
+        print(gaps_df.to_string(index=False))
+
 if __name__ == "__main__":
     main()
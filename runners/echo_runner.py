@@ -0,0 +1,54 @@
+# runner/echo_runner.py
+
+import argparse
+from instrument import add_profile_args, setup_profiling, stage
+from model.echo import echo_matrix, echo_ranking, lead_lag, returns_frame, top_pairs
+from runners.config import LOGFILE
+from storage.loader import load_series_dict
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=int, default=3, help="How many hours of history to compare")
+    parser.add_argument("--reference", default=None, help="Rank every coin against this one (e.g. bitcoin)")
+    parser.add_argument("--max-lag", type=int, default=30, help="Minutes of lead/lag to search")
+    parser.add_argument("--top", type=int, default=10, help="Pairs to show when no reference is given")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    print(f"📥 Loading last {args.hours} hours of data...")
+    returns = returns_frame(load_series_dict(LOGFILE, hours=args.hours))
+
+    if returns.empty:
+        print("No data.")
+        return
+
+    if args.reference:
+        if args.reference not in returns.columns:
+            print(f"No data for {args.reference}.")
+            return
+        print(f"\n🔍 {args.reference.capitalize()} Echo Ranking:\n")
+        with stage("echo"):
+            ranking = echo_ranking(returns, reference=args.reference, max_lag=args.max_lag)
+        print(ranking.to_string(index=False, float_format="%.4f"))
+        return
+
+    with stage("echo.matrix"):
+        echo = echo_matrix(returns)
+    with stage("echo.lead_lag"):
+        lag, lag_corr = lead_lag(returns, max_lag=args.max_lag)
+
+    print("\n📊 Echo score (row = reference, column = follower):\n")
+    print(echo["score"].to_string(float_format="%.2f"))
+
+    print("\n⏱️ Best lag in minutes (> 0: column follows row):\n")
+    print(lag.to_string())
+
+    pairs = top_pairs(echo["score"], top=args.top)
+    pairs["lag"] = [lag.loc[r, c] for r, c in zip(pairs["reference"], pairs["coin"])]
+    pairs["lag_corr"] = [lag_corr.loc[r, c] for r, c in zip(pairs["reference"], pairs["coin"])]
+    print(f"\n🏆 Top {len(pairs)} pairs:\n")
+    print(pairs.to_string(index=False, float_format="%.4f"))
+
+if __name__ == "__main__":
+    main()
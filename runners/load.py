@@ -1,159 +1,116 @@
-import pandas as pd
+# runner/load.py
+
+import argparse
+import os
+import time
 import matplotlib.pyplot as plt
-from scipy.signal import find_peaks
 from datetime import timedelta
-import matplotlib.ticker as tickr
-import json
+from instrument import add_profile_args, setup_profiling, stage
+from model.echo import echo_ranking, returns_frame
+from model.frequency import CycleTracker
+from runners.config import COINS, LOGFILE
+from storage.pyramid import resolution_for
+from storage.resample import RESOLUTION, resample_series
+from storage.tail import JsonlTail
+from view.chart import CHARTS, frame_image, make_chart
 
 N = 3  # Hours of data to display
 REFRESH_INTERVAL = 15  # Seconds between updates
-
-def classify_trend(x, threshold=0):
-    if x > threshold:
-        return 'up'
-    elif x < -threshold:
-        return 'down'
+MAX_LAG = 30  # Minutes of lead/lag searched in the echo ranking
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=int, default=N, help="Hours of data to display")
+    parser.add_argument("--refresh", type=float, default=REFRESH_INTERVAL, help="Seconds between updates")
+    parser.add_argument("--render", choices=list(CHARTS), default="blit",
+                        help="blit: update artists in place; full: clear and redraw everything each update")
+    parser.add_argument("--headless", metavar="DIR", default=None,
+                        help="Render without a display, writing each frame to DIR as a PNG")
+    parser.add_argument("--frames", type=int, default=0, help="Stop after this many frames (0: run forever)")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)  # or CRYPTO_PROFILE=1: per-stage timings on exit
+
+    hours = args.hours
+    plot_resolution = resolution_for(timedelta(hours=hours))  # 1-minute points up to ~16h, coarser bars beyond
+    last_seen_timestamp = None
+
+    if args.headless:
+        plt.switch_backend("Agg")
+        os.makedirs(args.headless, exist_ok=True)
+        wait = time.sleep
     else:
-        return 'flat'
-
-last_seen_timestamp = None
-
-plt.ion()
-fig, ax = plt.subplots(figsize=(14, 6))
-
-coins = [
-    'bitcoin',
-    'ethereum',
-    'litecoin',
-    'binancecoin',
-    'cardano',
-    'solana',
-    'dogecoin',
-    'shibainu',
-    'polygon',
-    'chainlink'
-]
-
-while True:
-    with open('crypto_prices_log.jsonl') as f:
-        data = [json.loads(line) for line in f]
-
-    df = pd.json_normalize(data)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.set_index('timestamp', inplace=True)
-
-    if 'prices.bitcoin.usd' not in df.columns:
-        print("No BTC data yet.")
-        continue
-
-    btc = df['prices.bitcoin.usd'].dropna()
-    latest_timestamp = btc.index.max()
-
-    if last_seen_timestamp == latest_timestamp:
-        print(f"No new data — waiting... (last seen: {latest_timestamp})")
-        plt.pause(REFRESH_INTERVAL)
-        continue
-
-    last_seen_timestamp = latest_timestamp
-
-    coin_series = {}
-    for coin in coins:
-        col = f'prices.{coin}.usd'
-        if col in df.columns:
-            resampled = df[col].dropna().resample('1min').mean().interpolate()
-            coin_series[coin] = resampled
-
-    end_time = latest_timestamp
-    start_time = end_time - timedelta(hours=N)
-
-    sliced_coins = {}
-    for coin, series in coin_series.items():
-        sliced = series[start_time:end_time]
-        if not sliced.empty:
-            normed = (sliced / sliced.iloc[0]) - 1
-            sliced_coins[coin] = normed
-
-    btc_slice = sliced_coins['bitcoin']
-    peaks, _ = find_peaks(btc_slice, distance=10)
-    valleys, _ = find_peaks(-btc_slice, distance=10)
-
-    velocity = btc_slice.diff()
-    acceleration = velocity.diff()
-
-    trend_df = pd.DataFrame({
-        'price': btc_slice,
-        'momentum': velocity,
-        'acceleration': acceleration
-    })
-    trend_df['trend'] = trend_df['momentum'].apply(classify_trend)
-    trend_df['trend_shift'] = trend_df['trend'].ne(trend_df['trend'].shift())
-
-    # === Correlation Scoring ===
-    btc_returns = btc_slice.diff().dropna()
-    correlation_results = []
-
-    for coin, series in sliced_coins.items():
-        if coin == 'bitcoin':
+        plt.ion()
+        wait = plt.pause
+    fig, ax = plt.subplots(figsize=(14, 6))
+    chart = make_chart(fig, ax, hours, render=args.render)
+    frames = 0
+
+    tail = JsonlTail(LOGFILE, hours=hours, coins=COINS)
+    btc_cycles = CycleTracker(distance=10, window=hours * 60)
+
+    while True:
+        tail.poll()
+        latest_timestamp = tail.latest_timestamp
+
+        if latest_timestamp is None or last_seen_timestamp == latest_timestamp:
+            print(f"No new data — waiting... (last seen: {latest_timestamp})")
+            wait(args.refresh)
             continue
 
-        coin_returns = series.diff().dropna()
-        combined = pd.DataFrame({'btc': btc_returns, 'alt': coin_returns}).dropna()
-
-        same_direction = (combined['btc'] * combined['alt']) > 0
-        agreement_rate = same_direction.sum() / len(combined)
-
-        btc_std = combined['btc'][same_direction].std()
-        alt_std = combined['alt'][same_direction].std()
-        amplification = (alt_std / btc_std) if btc_std > 0 else 0
-
-        score = agreement_rate * amplification
-
-        correlation_results.append({
-            'coin': coin,
-            'agreement': round(agreement_rate * 100, 1),
-            'amplification': round(amplification, 2),
-            'score': round(score, 2),
-        })
-
-    correlation_results.sort(key=lambda x: x['score'], reverse=True)
-    best_tracking_coin = correlation_results[0]['coin']
-
-    print("\n🔍 BTC Echo Ranking:")
-    for r in correlation_results:
-        print(f"{r['coin'].capitalize():<12} | Agreement: {r['agreement']:>5.1f}% | Amplification: {r['amplification']:>4.2f}x | Score: {r['score']:>4.2f}")
-
-    # === Plotting ===
-    ax.clear()
-    ax.yaxis.set_major_formatter(tickr.PercentFormatter(xmax=1.0))
+        coin_series = tail.series_dict()
 
-    for coin, series in sliced_coins.items():
-        if coin == 'bitcoin':
+        if 'bitcoin' not in coin_series:
+            print("No BTC data yet.")
+            wait(args.refresh)
             continue
 
-        style = {'linewidth': 1.2, 'alpha': 0.4}
-        if coin == best_tracking_coin:
-            style = {'linewidth': 2.5, 'alpha': 0.9, 'linestyle': '--'}
-
-        ax.plot(series.index, series.values, label=coin.capitalize(), **style)
-
-    # Plot BTC itself
-    ax.plot(btc_slice.index, btc_slice.values, label='Bitcoin', color='blue', linewidth=2.5, zorder=5)
-    ax.plot(btc_slice.rolling(5).mean(), label='Smoothed BTC', color='gray', linestyle='--')
-
-    ax.plot(btc_slice.index[peaks], btc_slice.iloc[peaks], 'g^', label='BTC Peaks')
-    ax.plot(btc_slice.index[valleys], btc_slice.iloc[valleys], 'rv', label='BTC Valleys')
-
-    ax.scatter(trend_df[trend_df['trend'] == 'up'].index,
-               trend_df[trend_df['trend'] == 'up']['price'],
-               color='limegreen', s=30, label='BTC Uptrend', zorder=3)
-    ax.scatter(trend_df[trend_df['trend'] == 'down'].index,
-               trend_df[trend_df['trend'] == 'down']['price'],
-               color='red', s=30, label='BTC Downtrend', zorder=3)
-    ax.scatter(trend_df[trend_df['trend_shift']].index,
-               trend_df[trend_df['trend_shift']]['price'],
-               color='purple', s=50, marker='x', label='BTC Trend Shift')
-
-    ax.set_title(f'Crypto % Change — Last {N} Hours (Updated: {end_time:%Y-%m-%d %H:%M:%S})')
-    ax.legend(loc='upper left', ncol=2, fontsize='small')
-    plt.tight_layout()
-    plt.pause(REFRESH_INTERVAL)
+        last_seen_timestamp = latest_timestamp
+
+        end_time = latest_timestamp
+        start_time = end_time - timedelta(hours=hours)
+
+        raw_slices = {}
+        sliced_coins = {}
+        for coin, series in coin_series.items():
+            sliced = series[start_time:end_time]
+            if plot_resolution != RESOLUTION:
+                sliced = resample_series(sliced, plot_resolution)
+            if not sliced.empty:
+                raw_slices[coin] = sliced
+                normed = (sliced / sliced.iloc[0]) - 1
+                sliced_coins[coin] = normed
+
+        btc_slice = sliced_coins['bitcoin']
+
+        # Normalizing is monotonic, so peaks of the raw series are peaks of the slice
+        with stage("chart.cycles"):
+            btc_cycles.extend(coin_series['bitcoin'])
+        peaks = btc_cycles.peak_times().intersection(btc_slice.index)
+        valleys = btc_cycles.valley_times().intersection(btc_slice.index)
+
+        # === Correlation Scoring ===
+        with stage("chart.echo"):
+            ranking = echo_ranking(returns_frame(raw_slices), reference='bitcoin', max_lag=MAX_LAG)
+        best_tracking_coin = ranking['coin'].iloc[0] if not ranking.empty else None
+
+        print("\n🔍 BTC Echo Ranking:")
+        for r in ranking.itertuples():
+            print(f"{r.coin.capitalize():<12} | Agreement: {r.agreement * 100:>5.1f}% | Amplification: {r.amplification:>4.2f}x | Score: {r.score:>4.2f} | Lag: {r.lag:>+3d}m ({r.lag_corr:>5.2f})")
+
+        # === Plotting ===
+        start = time.perf_counter()
+        with stage("chart.plot"):
+            chart.update(sliced_coins, peaks, valleys, best_tracking_coin, end_time)
+        frames += 1
+
+        if args.headless:
+            path = os.path.join(args.headless, f"frame_{frames:05d}.png")
+            plt.imsave(path, frame_image(fig))
+            print(f"🖼️ Frame {frames} rendered in {(time.perf_counter() - start) * 1000:.1f} ms -> {path}")
+        if args.frames and frames >= args.frames:
+            break
+        wait(args.refresh)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+# runner/partition_runner.py
+
+import argparse
+from instrument import add_profile_args, setup_profiling, stage
+from runners.config import LOGFILE
+from storage.loader import partitions_path_for
+from storage.partitioned import split_jsonl
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Split the single JSONL price log into daily partitions with sparse indexes")
+    parser.add_argument("--logfile", default=LOGFILE, help="JSONL log to split")
+    parser.add_argument("--out", default=None, help="Partition directory (default: <logfile>.days)")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    parts_path = args.out or partitions_path_for(args.logfile)
+
+    print(f"🗂️ Splitting {args.logfile} -> {parts_path}...")
+    with stage("partition"):
+        added = split_jsonl(args.logfile, parts_path)
+    print(f"✅ Appended {added} records")
+    print(f"Loaders now read {parts_path}; {args.logfile} can be archived.")
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,176 @@
+import argparse
+import asyncio
+import math
+import os
 import requests
 import time
-import json
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from instrument import add_profile_args, count, setup_profiling, stage
+from runners.config import API_URL, COINS, LOGFILE
+from storage.loader import jsonl_latest_timestamp, partitions_path_for, store_path_for
+from storage.partitioned import PartitionedLog, convert_partitions, split_jsonl
+from storage.price_store import PriceStore, convert_jsonl
+from storage.writer import BufferedLogWriter
 
-API_URL = "https://api.coingecko.com/api/v3/simple/price"
-PARAMS = {
-    "ids": "bitcoin,ethereum,litecoin,binancecoin,cardano,solana,dogecoin,shibainu,polygon,chainlink",
-    "vs_currencies": "usd"
-}
+RETRY_BASE = 2.0  # Seconds before the first retry; doubles each attempt
 
-LOG_FILE = "crypto_prices_log.jsonl"
+def make_session(pool_size: int) -> requests.Session:
+    """
+    One pooled HTTP session, reused for every request of every tick.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
-while True:
+async def fetch_batch(session: requests.Session, limiter: asyncio.Semaphore, api_url: str,
+                      coins: list[str], timeout: float, retries: int, deadline: float) -> dict:
+    """
+    Fetch one batch of coins, retrying with exponential backoff as long as the
+    retry still fits before `deadline` (the next tick). Returns {} on failure.
+    """
+    params = {"ids": ",".join(coins), "vs_currencies": "usd"}
+    delay = RETRY_BASE
+
+    for attempt in range(retries + 1):
+        try:
+            async with limiter:
+                response = await asyncio.to_thread(session.get, api_url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            if attempt == retries or time.monotonic() + delay >= deadline:
+                print(f"[ERROR] {datetime.utcnow().isoformat()} - {len(coins)} coins dropped this tick: {e}")
+                return {}
+            print(f"[WARN] {datetime.utcnow().isoformat()} - {e}; retrying in {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay *= 2
+
+    return {}
+
+async def scan(coins: list[str], writer: BufferedLogWriter, api_url: str = API_URL, interval: float = 60,
+               batch_size: int = 50, concurrency: int = 4, timeout: float = 10, retries: int = 3,
+               max_ticks: int | None = None):
+    """
+    Sample every coin once per `interval` seconds.
+
+    Ticks are scheduled on a monotonic clock (start + k * interval), so slow
+    responses don't push later samples back; a tick that overruns its slot
+    makes the scanner skip to the next free one. Coins are split into
+    batches fetched concurrently over one pooled session.
+    """
+    batches = [coins[i:i + batch_size] for i in range(0, len(coins), batch_size)]
+    session = make_session(concurrency)
+    limiter = asyncio.Semaphore(concurrency)
+
+    start = time.monotonic()
+    tick = 0
     try:
-        response = requests.get(API_URL, params=PARAMS, timeout=10)
-        response.raise_for_status()
-        prices = response.json()
+        while max_ticks is None or tick < max_ticks:
+            scheduled = start + tick * interval
+            await asyncio.sleep(max(0.0, scheduled - time.monotonic()))
+
+            timestamp = datetime.utcnow().isoformat()
+            with stage("scan.fetch"):
+                results = await asyncio.gather(*(
+                    fetch_batch(session, limiter, api_url, batch, timeout, retries, scheduled + interval)
+                    for batch in batches
+                ))
 
-        timestamp = datetime.utcnow().isoformat()
-        data_point = {'timestamp': timestamp, 'prices': prices}
+            prices = {}
+            for result in results:
+                prices.update(result)
 
-        with open(LOG_FILE, 'a') as f:
-            f.write(json.dumps(data_point) + '\n')
+            count("scan.prices", len(prices))
+            if prices:
+                writer.write({"timestamp": timestamp, "prices": prices})
+                print(f"Logged at {timestamp} ({len(prices)}/{len(coins)} coins)")
+            writer.flush_if_due()
 
-        print(f"Logged at {timestamp}")
-        print(prices)
+            next_tick = max(tick + 1, math.ceil((time.monotonic() - start) / interval))
+            if next_tick > tick + 1:
+                print(f"[WARN] Tick overran its slot; skipping {next_tick - tick - 1} tick(s)")
+            tick = next_tick
+    finally:
+        session.close()
 
-    except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-        print(f"[ERROR] {datetime.utcnow().isoformat()} - {e}")
-        print("Waiting 30 seconds before retrying...\n")
-        time.sleep(30)
-        continue
+def load_coins(coins_arg: str | None, coins_file: str | None) -> list[str]:
+    if coins_file:
+        with open(coins_file, "r") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    if coins_arg:
+        return [c.strip() for c in coins_arg.split(",") if c.strip()]
+    return COINS
+
+def open_partitions(logfile: str) -> PartitionedLog:
+    """
+    Open the daily-partitioned log that replaces `logfile`, first migrating
+    anything in the single JSONL log it doesn't have yet.
+    """
+    parts_dir = partitions_path_for(logfile)
+    partitions = PartitionedLog(parts_dir, create=True)
+    log_last = jsonl_latest_timestamp(logfile)
+    parts_last = partitions.latest_timestamp()
+    if log_last is not None and (parts_last is None or parts_last < log_last):
+        print(f"Migrating {logfile} -> {parts_dir}...")
+        split_jsonl(logfile, parts_dir)
+        partitions = PartitionedLog(parts_dir)
+    return partitions
+
+def open_store(logfile: str, partitions: PartitionedLog | None = None) -> PriceStore:
+    """
+    Open the columnar store next to the log, catching it up with anything
+    logged while it wasn't being written.
+    """
+    store_dir = store_path_for(logfile)
+    store = PriceStore(store_dir, create=True)
+    log_last = partitions.latest_timestamp() if partitions is not None else jsonl_latest_timestamp(logfile)
+    if log_last is not None and (store.last_timestamp() is None or store.last_timestamp() < log_last):
+        source = partitions.path if partitions is not None else logfile
+        print(f"Catching up {store_dir} from {source}...")
+        if partitions is not None:
+            convert_partitions(partitions.path, store_dir)
+        else:
+            convert_jsonl(logfile, store_dir)
+        store = PriceStore(store_dir)
+    return store
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--coins", default=None, help="Comma-separated CoinGecko ids")
+    parser.add_argument("--coins-file", default=None, help="File with one CoinGecko id per line")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between samples")
+    parser.add_argument("--batch-size", type=int, default=50, help="Coins per request")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--timeout", type=float, default=10, help="Request timeout in seconds")
+    parser.add_argument("--retries", type=int, default=3, help="Retries per batch within a tick")
+    parser.add_argument("--flush-interval", type=float, default=60, help="Seconds between log flushes")
+    parser.add_argument("--api-url", default=API_URL, help="Price endpoint (e.g. a local stub for testing)")
+    parser.add_argument("--log-file", default=LOGFILE, help="JSONL log to append to")
+    parser.add_argument("--layout", choices=["daily", "single"], default=None,
+                        help="single: append to --log-file; daily: one indexed file per UTC day in <log>.days/ "
+                             "(default: daily if that directory exists, else single)")
+    parser.add_argument("--ticks", type=int, default=None, help="Stop after this many ticks")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    coins = load_coins(args.coins, args.coins_file)
+    layout = args.layout or ("daily" if os.path.isdir(partitions_path_for(args.log_file)) else "single")
+    partitions = open_partitions(args.log_file) if layout == "daily" else None
+    writer = BufferedLogWriter(args.log_file, store=open_store(args.log_file, partitions),
+                               flush_interval=args.flush_interval, partitions=partitions)
+
+    try:
+        asyncio.run(scan(coins, writer, api_url=args.api_url, interval=args.interval,
+                         batch_size=args.batch_size, concurrency=args.concurrency,
+                         timeout=args.timeout, retries=args.retries, max_ticks=args.ticks))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
 
-    time.sleep(60)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# runner/simulate_runner.py
+
+import argparse
+from eval.simulate import simulate_all
+from instrument import add_profile_args, setup_profiling, stage
+from model.baseline import HORIZON_MINUTES
+from runners.config import LOGFILE
+from storage.loader import load_series_dict
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=int, default=72, help="How many hours of history to trade over")
+    parser.add_argument("--horizon", choices=["1h", "1d"], default="1h", help="Prediction horizon (holding period)")
+    parser.add_argument("--method", choices=["last", "mean", "linear", "momentum_wave", "ensemble"], default="linear",
+                        help="Prediction method")
+    parser.add_argument("--step", type=int, default=None,
+                        help="Minutes between signals (default: the horizon, so trades don't overlap)")
+    parser.add_argument("--lookback", type=int, default=60, help="Minutes of history per prediction")
+    parser.add_argument("--thresholds", nargs="+", type=float, default=[0.0, 0.001, 0.002, 0.005, 0.01],
+                        help="Minimum |predicted change| to take a position (0.001 = 0.1%%)")
+    parser.add_argument("--fee", type=float, default=0.001, help="Fee per unit traded (0.001 = 0.1%%)")
+    parser.add_argument("--slippage", type=float, default=0.0005, help="Slippage per unit traded")
+    parser.add_argument("--long-only", action="store_true", help="Never go short")
+    parser.add_argument("--top", type=int, default=3, help="Thresholds to show per coin, best Sharpe first")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    step = args.step or HORIZON_MINUTES[args.horizon]
+
+    print(f"📥 Loading last {args.hours} hours of data...")
+    series_dict = load_series_dict(LOGFILE, hours=args.hours)
+
+    print(f"\n💸 Trading {args.method} signals every {step}m, horizon = {args.horizon}, "
+          f"fee = {args.fee:.2%}, slippage = {args.slippage:.2%}...\n")
+    with stage("simulate"):
+        table = simulate_all(series_dict, horizon=args.horizon, method=args.method, step_minutes=step,
+                             lookback_minutes=args.lookback, thresholds=args.thresholds, fee=args.fee,
+                             slippage=args.slippage, allow_short=not args.long_only)
+
+    table = table.sort_values(["coin", "sharpe"], ascending=[True, False], na_position="last")
+    print(table.groupby("coin").head(args.top).to_string(index=False, float_format="%.4f"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# runner/stream_runner.py
+
+import argparse
+import time
+import pandas as pd
+from instrument import add_profile_args, count, setup_profiling, stage
+from model.streaming import StreamingPredictor
+from runners.config import LOGFILE
+from storage.tail import JsonlTail
+
+def feed(predictors: dict[str, StreamingPredictor], records: list[dict], method: str, distance: int) -> None:
+    with stage("stream.feed"):
+        _feed(predictors, records, method, distance)
+    count("stream.records", len(records))
+
+def _feed(predictors: dict[str, StreamingPredictor], records: list[dict], method: str, distance: int) -> None:
+    for record in records:
+        ts = pd.Timestamp(record["timestamp"])
+        for coin, quote in record.get("prices", {}).items():
+            price = quote.get("usd") if isinstance(quote, dict) else None
+            if price is None:
+                continue
+            if coin not in predictors:
+                predictors[coin] = StreamingPredictor(method=method, distance=distance)
+            predictors[coin].update(ts, price)
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--method", choices=["last", "mean", "linear", "momentum_wave"], default="linear", help="Prediction method")
+    parser.add_argument("--distance", type=int, default=10, help="Peak/valley distance (momentum_wave)")
+    parser.add_argument("--hours", type=float, default=24, help="Hours of history to warm up from")
+    parser.add_argument("--interval", type=float, default=15, help="Seconds between log polls")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    tail = JsonlTail(LOGFILE, hours=args.hours)
+    predictors: dict[str, StreamingPredictor] = {}
+
+    print(f"📥 Warming up {args.method} predictors from the last {args.hours}h...")
+    with stage("tail.read"):
+        records = tail.read()
+    feed(predictors, records, args.method, args.distance)
+
+    while True:
+        if predictors:
+            latest = max(p.last_timestamp for p in predictors.values())
+            print(f"\n=== Predicted Returns ({latest:%Y-%m-%d %H:%M:%S}) ===")
+            print(f"{'Coin':<10} {'Next 1h':>10} {'Next 1d':>10}")
+            print("-" * 34)
+            for coin in sorted(predictors):
+                pred = predictors[coin].predictions()
+                print(f"{coin:<10} {pred['1h']:>9.2%} {pred['1d']:>9.2%}")
+
+        records = []
+        while not records:
+            time.sleep(args.interval)
+            with stage("tail.read"):
+                records = tail.read()
+        feed(predictors, records, args.method, args.distance)
+
+if __name__ == "__main__":
+    main()
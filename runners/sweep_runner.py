@@ -0,0 +1,38 @@
+# runner/sweep_runner.py
+
+import argparse
+from eval.sweep import rank_sweep, sweep_all
+from instrument import add_profile_args, setup_profiling, stage
+from runners.config import LOGFILE
+from storage.loader import load_series_dict
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=int, default=72, help="How many hours of history to sweep over")
+    parser.add_argument("--horizon", choices=["1h", "1d"], default="1h", help="Prediction horizon")
+    parser.add_argument("--methods", nargs="+", choices=["last", "mean", "linear", "momentum_wave", "ensemble"], default=["mean", "linear"], help="Prediction methods")
+    parser.add_argument("--steps", nargs="+", type=int, default=[5, 10, 30], help="step_minutes values")
+    parser.add_argument("--lookbacks", nargs="+", type=int, default=[15, 30, 60, 120], help="lookback_minutes values")
+    parser.add_argument("--distances", nargs="+", type=int, default=[5, 10, 20], help="Peak/valley distance values (momentum_wave)")
+    parser.add_argument("--top", type=int, default=3, help="Configurations to show per coin")
+    parser.add_argument("--out", default=None, help="Write the full results cube to this CSV")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    setup_profiling(args)
+
+    print(f"📥 Loading last {args.hours} hours of data...")
+    series_dict = load_series_dict(LOGFILE, hours=args.hours)
+
+    print(f"\n🧪 Sweeping {', '.join(args.methods)} with horizon = {args.horizon}...\n")
+    with stage("sweep"):
+        cube = sweep_all(series_dict, horizon=args.horizon, methods=args.methods, steps=args.steps,
+                         lookbacks=args.lookbacks, distances=args.distances)
+
+    if args.out:
+        cube.to_csv(args.out, index=False)
+        print(f"💾 Wrote {len(cube)} configurations to {args.out}\n")
+
+    print(rank_sweep(cube, top=args.top).to_string(index=False, float_format="%.4f"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# runner/tune_runner.py
+
+import argparse
+from instrument import add_profile_args, setup_profiling, stage
+from eval.tune import check_folds, save_tuned, tuned_configs, walk_forward_all
+from runners.config import LOGFILE
+from storage.loader import load_series_dict, memo_path
+from storage.memo import MemoStore
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=int, default=24 * 7, help="How many hours of history to walk forward over")
+    parser.add_argument("--horizon", choices=["1h", "1d"], default="1h", help="Prediction horizon")
+    parser.add_argument("--methods", nargs="+", choices=["last", "mean", "linear", "momentum_wave", "ensemble"],
+                        default=["mean", "linear", "momentum_wave"], help="Methods to choose from")
+    parser.add_argument("--lookbacks", nargs="+", type=int, default=[30, 60, 120], help="lookback_minutes values")
+    parser.add_argument("--distances", nargs="+", type=int, default=[5, 10, 20], help="Peak/valley distance values (momentum_wave)")
+    parser.add_argument("--step", type=int, default=10, help="Minutes between backtested windows")
+    parser.add_argument("--train-hours", type=int, default=48, help="Training window before each test window")
+    parser.add_argument("--test-hours", type=int, default=24, help="Out-of-sample window length (folds align to it); must be longer than the horizon")
+    parser.add_argument("--out", default="tuned.json", help="Where to write each coin's latest tuned configuration")
+    parser.add_argument("--no-memo", action="store_true", help="Don't read or write the memo of earlier results")
+    add_profile_args(parser)
+    args = parser.parse_args(argv)
+    try:
+        check_folds(args.horizon, args.train_hours, args.test_hours)
+    except ValueError as e:
+        parser.error(str(e))
+    setup_profiling(args)
+
+    print(f"📥 Loading last {args.hours} hours of data...")
+    series_dict = load_series_dict(LOGFILE, hours=args.hours)
+
+    memo = MemoStore(None if args.no_memo else memo_path(LOGFILE))
+    known = len(memo)
+    print(f"\n🎛️ Walk-forward tuning ({args.train_hours}h train / {args.test_hours}h test, horizon = {args.horizon}), "
+          f"{known} memoized results...\n")
+    with stage("tune"):
+        folds = walk_forward_all(series_dict, memo=memo, horizon=args.horizon, methods=args.methods,
+                                 lookbacks=args.lookbacks, distances=args.distances, step_minutes=args.step,
+                                 train_hours=args.train_hours, test_hours=args.test_hours)
+
+    if folds.empty:
+        print("Not enough history for a single fold; try more --hours or a shorter --train-hours.")
+        return
+
+    print(folds.drop(columns=["train_start"]).to_string(index=False, float_format="%.4f"))
+
+    summary = folds.groupby("coin").agg(folds=("test_start", "size"), test_mae=("test_mae", "mean"),
+                                        test_hit_rate=("test_hit_rate", "mean"))
+    print("\n📊 Out-of-sample, mean over folds:\n")
+    print(summary.to_string(float_format="%.4f"))
+
+    save_tuned(tuned_configs(folds), args.horizon, args.out)
+    print(f"\n💾 Wrote tuned configurations to {args.out} ({len(memo) - known} new results memoized)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# storage/coverage.py
+
+import numpy as np
+from storage.resample import _append
+
+MINUTE_NS = 60 * 10**9
+COVERAGE = "coverage"  # ResampleCache layer holding the gap indexes
+
+class Coverage:
+    """
+    Which minutes of one coin have at least one point, kept as a gap
+    index: the first and last such minute, how many there are, and every
+    missing stretch between them as [start, end) in minutes since the
+    epoch. New points only add the gaps before them.
+    """
+
+    __slots__ = ("first", "last", "present", "starts", "ends", "n")
+
+    def __init__(self):
+        self.first: int | None = None
+        self.last: int | None = None
+        self.present = 0  # minutes with points
+        self.starts = np.empty(0, dtype="<i8")
+        self.ends = np.empty(0, dtype="<i8")
+        self.n = 0        # gaps used
+
+    @property
+    def nbytes(self) -> int:
+        return self.starts.nbytes + self.ends.nbytes
+
+    def extend(self, ts: np.ndarray, values: np.ndarray) -> bool:
+        """
+        Add points from the last minute on. Returns False (and changes
+        nothing) if any point is older, in which case the index must be rebuilt.
+        """
+        minutes = np.unique(ts[~np.isnan(values)] // MINUTE_NS)
+        if not len(minutes):
+            return True
+        if self.last is not None and minutes[0] < self.last:
+            return False
+
+        if self.last is None:
+            self.first = int(minutes[0])
+        else:
+            # Start from the last known minute, which is counted again below
+            if minutes[0] != self.last:
+                minutes = np.concatenate(([self.last], minutes))
+            self.present -= 1
+
+        gaps = np.flatnonzero(np.diff(minutes) > 1)
+        self.starts = _append(self.starts, self.n, minutes[gaps] + 1)
+        self.ends = _append(self.ends, self.n, minutes[gaps + 1])
+        self.n += len(gaps)
+        self.present += len(minutes)
+        self.last = int(minutes[-1])
+        return True
+
+    def gaps(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.starts[:self.n], self.ends[:self.n]
+
+    # === Cache state ===
+
+    def state(self) -> dict[str, np.ndarray]:
+        # One array per bound: the cache only lets a saved array change in its last element
+        bounds = {} if self.first is None else {"first": self.first, "last": self.last, "present": self.present}
+        state = {name: np.array([bounds[name]] if bounds else [], dtype="<i8") for name in ("first", "last", "present")}
+        return state | {"starts": self.starts[:self.n], "ends": self.ends[:self.n]}
+
+    def restore(self, state) -> None:
+        if len(state["first"]):
+            self.first, self.last, self.present = (int(state[name][0]) for name in ("first", "last", "present"))
+        else:
+            self.first, self.last, self.present = None, None, 0
+        self.starts, self.ends = state["starts"], state["ends"]
+        self.n = len(self.starts)
+
+def coverage_dict(cache, source, coins: list[str] | None = None) -> dict[str, Coverage]:
+    """
+    Gap index per coin for a resample cache source, synced with it.
+    """
+    return cache.layers(source, COVERAGE, Coverage, coins)
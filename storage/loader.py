@@ -0,0 +1,366 @@
+# storage/loader.py
+
+import itertools
+import json
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime, timedelta
+from typing import Iterator
+from instrument import count, stage
+from storage.coverage import Coverage, coverage_dict
+from storage.partitioned import DAY_FORMAT, PartitionedLog
+from storage.price_store import META_FILE, PriceStore, records_to_arrays
+from storage.pyramid import LEVELS, pyramid_dict
+from storage.resample import CACHE_ENV_VAR, RESOLUTION, JsonlSource, PartitionSource, ResampleCache, StoreSource
+
+LOGFILE = "crypto_prices_log.jsonl"
+MEMO_FILE = "tune_memo.jsonl"
+
+def store_path_for(logfile: str) -> str:
+    """
+    Columnar store that shadows a JSONL log, e.g.
+    crypto_prices_log.jsonl -> crypto_prices_log.store
+    """
+    return os.path.splitext(logfile)[0] + ".store"
+
+def partitions_path_for(logfile: str) -> str:
+    """
+    Daily-partitioned log that replaces a single JSONL log, e.g.
+    crypto_prices_log.jsonl -> crypto_prices_log.days
+    """
+    return os.path.splitext(logfile)[0] + ".days"
+
+def cache_path_for(logfile: str) -> str:
+    """
+    On-disk resample cache next to a log, e.g.
+    crypto_prices_log.jsonl -> crypto_prices_log.cache
+    """
+    return os.path.splitext(logfile)[0] + ".cache"
+
+def is_store(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+def open_store(source: str) -> PriceStore | None:
+    """
+    Returns the PriceStore for a store directory or for a log (single JSONL
+    or partitioned) that has been converted, otherwise None.
+    """
+    path = source if is_store(source) else store_path_for(source)
+    return PriceStore(path) if is_store(path) else None
+
+def open_partitions(source: str) -> PartitionedLog | None:
+    """
+    Returns the PartitionedLog for a partition directory or for the JSONL
+    log it replaces, otherwise None.
+    """
+    if os.path.isdir(source) and not is_store(source):
+        return PartitionedLog(source)
+    path = partitions_path_for(source)
+    return PartitionedLog(path) if os.path.isdir(path) else None
+
+def latest_timestamp(source: str = LOGFILE) -> pd.Timestamp | None:
+    """
+    Timestamp of the most recent record, without reading the full history.
+    """
+    store = open_store(source)
+    if store is not None:
+        return store.last_timestamp()
+    return log_latest_timestamp(source)
+
+def log_latest_timestamp(source: str = LOGFILE) -> pd.Timestamp | None:
+    """
+    Timestamp of the newest logged record, from the partitioned log if
+    there is one, else from the single JSONL log.
+    """
+    partitions = open_partitions(source)
+    if partitions is not None:
+        return partitions.latest_timestamp()
+    return jsonl_latest_timestamp(source)
+
+def jsonl_latest_timestamp(logfile: str) -> pd.Timestamp | None:
+    """
+    Timestamp of the last line of a JSONL log, read backwards from the end.
+    """
+    if not os.path.exists(logfile):
+        return None
+
+    with open(logfile, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b""
+        while pos > 0 and tail.count(b"\n") < 2:
+            step = min(4096, pos)
+            pos -= step
+            f.seek(pos)
+            tail = f.read(step) + tail
+
+    lines = [line for line in tail.splitlines() if line.strip()]
+    if not lines:
+        return None
+    return pd.Timestamp(json.loads(lines[-1])["timestamp"])
+
+def load_dataframe(source: str = LOGFILE, hours: int | None = None, end=None) -> pd.DataFrame:
+    """
+    Load the price log as a DataFrame indexed by timestamp (naive UTC) with
+    'prices.<coin>.usd' columns.
+
+    Args:
+        source: JSONL log, partition or store directory; a converted store is
+            preferred, then a partitioned log, then the single JSONL file
+        hours: keep only the last N hours before `end` (None = full history)
+        end: window end, defaults to now
+    """
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.utcnow())
+    start = end - timedelta(hours=hours) if hours is not None else None
+
+    store = open_store(source)
+    if store is not None:
+        with stage("load.store_read"):
+            df = store.read(start=start, end=end)
+        count("load.rows", len(df))
+        return df
+
+    partitions = open_partitions(source)
+    if partitions is not None:
+        # Only the days in the window, and only from the indexed offset on
+        with stage("load.partition_read"):
+            data = partitions.read_records(start=start, end=end)
+        count("load.rows", len(data))
+        return _records_frame(data)
+
+    # Legacy path: parse the whole JSONL file
+    with stage("load.json_parse"):
+        with open(source, "r") as f:
+            data = [json.loads(line) for line in f if line.strip()]
+    count("load.rows", len(data))
+
+    df = _records_frame(data)
+    if start is not None:
+        df = df[(df.index >= start) & (df.index <= end)]
+    return df
+
+def _records_frame(data: list[dict]) -> pd.DataFrame:
+    if not data:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="timestamp"))
+    with stage("load.json_normalize"):
+        df = pd.json_normalize(data)
+    with stage("load.parse_timestamps"):
+        df["timestamp"] = pd.to_datetime(df["timestamp"], format="ISO8601")
+        df.set_index("timestamp", inplace=True)
+    return df
+
+def load_series_dict(source: str = LOGFILE, hours: int | None = None, end=None,
+                     cache: bool = True, resolution: str = RESOLUTION) -> dict[str, pd.Series]:
+    """
+    Load the price log and explode it into one resampled Series per coin,
+    on a 1-minute grid unless a coarser `resolution` is asked for.
+
+    With `cache`, grids come from the resample cache for the source, which
+    only parses and resamples what was appended since the last call (in
+    this process or, through <log>.cache/, an earlier one). Pyramid levels
+    coarser than 1 minute are the mean bars of the OHLC pyramid, so the
+    first and last bar cover their whole bucket.
+    """
+    if not cache:
+        return resample_frame(load_dataframe(source, hours=hours, end=end), resolution)
+
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.utcnow())
+    start = end - timedelta(hours=hours) if hours is not None else None
+    if resolution == RESOLUTION or resolution not in LEVELS:
+        return resample_cache(source).series_dict(cache_source(source), start=start, end=end, resolution=resolution)
+
+    series_dict = {}
+    with stage("pyramid.window"):
+        for coin, pyramid in pyramid_dict(resample_cache(source), cache_source(source), start=start).items():
+            series = pyramid.series(resolution, start, end, name=f"prices.{coin}.usd")
+            if series is not None:
+                series_dict[coin] = series
+    return series_dict
+
+def iter_chunks(source: str = LOGFILE, hours: int | None = None, end=None,
+                chunk_hours: float = 24) -> Iterator[tuple[np.ndarray, dict[str, np.ndarray]]]:
+    """
+    The points load_series_dict would read for the last `hours` before
+    `end`, in consecutive time chunks of `chunk_hours`. Each chunk is a
+    pair of epoch-ns timestamps in order and one price array per coin
+    aligned with them, NaN where a record has no price.
+
+    Chunk boundaries fall on whole minutes, so each 1-minute bucket lies
+    in a single chunk. The source is read in batches (a chunk of store
+    rows, one partition day or a block of JSONL lines), so only one batch
+    and one chunk are held at a time.
+    """
+    step = int(pd.Timedelta(hours=chunk_hours).value)
+    minute = pd.Timedelta("1min").value
+    if step < minute or step % minute:
+        raise ValueError("chunk_hours must be a whole number of minutes.")
+
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.utcnow())
+    start = end - timedelta(hours=hours) if hours is not None else None
+    lo = start.value if start is not None else None
+
+    pieces: list[tuple[np.ndarray, dict[str, np.ndarray]]] = []
+    boundary = None
+    for ts, columns in _batches(source, start, end, step):
+        keep = (ts <= end.value) if lo is None else (ts >= lo) & (ts <= end.value)
+        if not keep.all():
+            ts, columns = ts[keep], {coin: v[keep] for coin, v in columns.items()}
+        if not len(ts):
+            continue
+        if boundary is None:
+            boundary = (int(ts[0]) // step + 1) * step
+
+        # Cut the batch at every chunk boundary it crosses
+        while len(ts) and ts[-1] >= boundary:
+            i = int(np.searchsorted(ts, boundary, side="left"))
+            if i:
+                pieces.append((ts[:i], {coin: v[:i] for coin, v in columns.items()}))
+            if pieces:
+                count("load.chunks")
+                yield _join(pieces)
+                pieces = []
+            ts, columns = ts[i:], {coin: v[i:] for coin, v in columns.items()}
+            boundary = (int(ts[0]) // step + 1) * step if len(ts) else boundary + step
+        if len(ts):
+            pieces.append((ts, columns))
+
+    if pieces:
+        count("load.chunks")
+        yield _join(pieces)
+
+def _batches(source: str, start: pd.Timestamp | None, end: pd.Timestamp, step: int,
+             lines: int = 10_000) -> Iterator[tuple[np.ndarray, dict[str, np.ndarray]]]:
+    # (timestamps, columns) of the source's records from `start` on, in order:
+    # store rows a chunk at a time, one partition day, or a block of JSONL lines
+    store = open_store(source)
+    if store is not None:
+        i0, i1 = store.locate(start, end)
+        ts = store.timestamps()
+        while i0 < i1:
+            j = min(i1, int(np.searchsorted(ts, (int(ts[i0]) // step + 1) * step, side="left")))
+            with stage("load.store_read"):
+                yield (np.array(ts[i0:j]), {coin: np.array(store.column(coin)[i0:j]) for coin in store.coins})
+            i0 = j
+        return
+
+    partitions = open_partitions(source)
+    if partitions is not None:
+        first_day = start.strftime(DAY_FORMAT) if start is not None else ""
+        for day in partitions.partitions():
+            if day < first_day or day > end.strftime(DAY_FORMAT):
+                continue
+            with stage("load.partition_read"):
+                records = partitions.read_day(day, start if day == first_day else None)
+            yield records_to_arrays(records)
+        return
+
+    # Imported here: storage.tail imports this module
+    from storage.tail import seek_timestamp
+    with open(source, "rb") as f:
+        if start is not None:
+            f.seek(seek_timestamp(source, start))
+        while True:
+            with stage("load.json_parse"):
+                block = list(itertools.islice(f, lines))
+                records = [json.loads(line) for line in block if line.strip()]
+            if not block:
+                return
+            yield records_to_arrays(records)
+
+def _join(pieces: list[tuple[np.ndarray, dict[str, np.ndarray]]]) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    # One (timestamps, columns) from consecutive pieces, NaN where a piece lacks a coin
+    if len(pieces) == 1:
+        return pieces[0]
+    ts = np.concatenate([t for t, _ in pieces])
+    coins = dict.fromkeys(coin for _, columns in pieces for coin in columns)
+    return ts, {
+        coin: np.concatenate([columns.get(coin, np.full(len(t), np.nan)) for t, columns in pieces])
+        for coin in coins
+    }
+
+def load_bars(source: str = LOGFILE, hours: int | None = None, end=None,
+              resolution: str = "1h", coins: list[str] | None = None) -> dict[str, pd.DataFrame]:
+    """
+    OHLC + mean bars per coin at one pyramid level (see storage.pyramid),
+    over the last `hours` before `end`, kept up to date through the
+    resample cache.
+    """
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp(datetime.utcnow())
+    start = end - timedelta(hours=hours) if hours is not None else None
+    with stage("pyramid.window"):
+        bars = {
+            coin: pyramid.bars(resolution, start, end)
+            for coin, pyramid in pyramid_dict(resample_cache(source), cache_source(source), coins, start).items()
+        }
+    return {coin: frame for coin, frame in bars.items() if not frame.empty}
+
+def load_coverage(source: str = LOGFILE, coins: list[str] | None = None) -> dict[str, Coverage]:
+    """
+    Gap index per coin (see storage.coverage), kept up to date through the
+    resample cache: each call only scans records appended since the last.
+    """
+    with stage("coverage.sync"):
+        return coverage_dict(resample_cache(source), cache_source(source), coins)
+
+def cache_source(source: str):
+    """
+    What the resample cache reads for a source: the store if converted,
+    else the partitioned log, else the single JSONL file.
+    """
+    store = open_store(source)
+    if store is not None:
+        return StoreSource(store)
+    partitions = open_partitions(source)
+    if partitions is not None:
+        return PartitionSource(partitions)
+    return JsonlSource(source)
+
+_caches: dict[str | None, ResampleCache] = {}
+
+def cache_dir(source: str = LOGFILE) -> str | None:
+    """
+    <log>.cache/, the directory set in CRYPTO_RESAMPLE_CACHE, or None if
+    that is "off".
+    """
+    setting = os.environ.get(CACHE_ENV_VAR, "")
+    if setting.lower() in ("off", "0", "false"):
+        return None
+    return setting or cache_path_for(source[:-1] if source.endswith(os.sep) else source)
+
+def memo_path(source: str = LOGFILE) -> str | None:
+    """
+    Tuning memo (see storage.memo) kept in the cache directory; None
+    (memory only) when the disk cache is off.
+    """
+    disk_dir = cache_dir(source)
+    return os.path.join(disk_dir, MEMO_FILE) if disk_dir else None
+
+def resample_cache(source: str = LOGFILE) -> ResampleCache:
+    """
+    Process-wide resample cache, saved to <log>.cache/ unless
+    CRYPTO_RESAMPLE_CACHE is "off" (or a directory to use instead).
+    """
+    disk_dir = cache_dir(source)
+    if disk_dir not in _caches:
+        _caches[disk_dir] = ResampleCache(disk_dir=disk_dir)
+    return _caches[disk_dir]
+
+def resample_frame(df: pd.DataFrame, resolution: str = RESOLUTION) -> dict[str, pd.Series]:
+    """
+    One resampled (1-minute by default), interpolated Series per
+    'prices.<coin>.usd' column.
+    """
+    series_dict = {}
+    with stage("resample"):
+        for col in df.columns:
+            if col.startswith("prices.") and col.endswith(".usd"):
+                coin = col.split(".")[1]
+                series = df[col].dropna()
+                if series.empty:
+                    continue
+                series = series.resample(resolution).mean().interpolate()
+                series_dict[coin] = series
+    count("resample.coins", len(series_dict))
+
+    return series_dict
@@ -0,0 +1,65 @@
+# storage/memo.py
+
+import json
+import os
+from instrument import count
+
+class MemoStore:
+    """
+    Persistent memo of computed results: string keys to JSON values.
+
+    Kept as an append-only JSONL file of [key, value] lines that is read
+    once when opened; new entries are buffered and appended on flush. A
+    later line for the same key wins, and lines that don't parse (e.g. a
+    write cut short) are skipped. With no path it lives in memory only.
+    """
+
+    def __init__(self, path: str | None = None):
+        self.path = path
+        self.entries: dict[str, object] = {}
+        self.pending: dict[str, object] = {}
+        if path is not None:
+            self._read()
+
+    def _read(self) -> None:
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        key, value = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[key] = value
+        except FileNotFoundError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def get(self, key: str, default=None):
+        if key in self.entries:
+            count("memo.hits")
+            return self.entries[key]
+        count("memo.misses")
+        return default
+
+    def put(self, key: str, value) -> None:
+        self.entries[key] = value
+        self.pending[key] = value
+
+    def flush(self) -> None:
+        if not self.pending or self.path is None:
+            self.pending.clear()
+            return
+
+        lines = "".join(json.dumps([key, value]) + "\n" for key, value in self.pending.items())
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(lines)
+        except OSError as e:
+            print(f"[WARN] Memo not saved to {self.path}: {e}")
+        self.pending.clear()
@@ -0,0 +1,300 @@
+# storage/partitioned.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from storage.price_store import PriceStore
+
+LOG_SUFFIX = ".jsonl"
+INDEX_SUFFIX = ".idx"
+INDEX_STRIDE = 64 * 1024  # Bytes of log between sparse index entries
+DAY_FORMAT = "%Y-%m-%d"
+
+class PartitionedLog:
+    """
+    Scan log split into one JSONL file per UTC day, each with a sparse index.
+
+    A log is a directory holding, per day:
+        YYYY-MM-DD.jsonl   scan records of that day, in timestamp order
+        YYYY-MM-DD.idx     int64 pairs (epoch ns, byte offset), one per
+                           INDEX_STRIDE bytes of log
+
+    A time range only touches the partitions of the days it overlaps, and
+    inside those a binary search on the index finds the byte range to parse,
+    so reading the last hour costs at most one stride more than the hour.
+    """
+
+    def __init__(self, path: str, create: bool = False):
+        self.path = path
+        if not os.path.isdir(path):
+            if not create:
+                raise FileNotFoundError(f"No partitioned log at {path}")
+            os.makedirs(path)
+        self._last: pd.Timestamp | None = None
+
+    def partitions(self) -> list[str]:
+        """
+        Days with a log file, oldest first.
+        """
+        return sorted(name[:-len(LOG_SUFFIX)] for name in os.listdir(self.path) if name.endswith(LOG_SUFFIX))
+
+    def log_path(self, day: str) -> str:
+        return os.path.join(self.path, day + LOG_SUFFIX)
+
+    def index_path(self, day: str) -> str:
+        return os.path.join(self.path, day + INDEX_SUFFIX)
+
+    def index(self, day: str) -> np.ndarray:
+        """
+        (n, 2) array of (timestamp ns, byte offset) entries for one day.
+        """
+        try:
+            entries = np.fromfile(self.index_path(day), dtype="<i8")
+        except FileNotFoundError:
+            return np.empty((0, 2), dtype="<i8")
+        return entries[: len(entries) // 2 * 2].reshape(-1, 2)
+
+    # === Reading ===
+
+    def latest_timestamp(self) -> pd.Timestamp | None:
+        """
+        Timestamp of the newest record, parsing at most one index stride.
+        """
+        for day in reversed(self.partitions()):
+            index = self.index(day)
+            start = int(index[-1, 1]) if len(index) else 0
+            records, _ = self._read_range(day, start)
+            if records:
+                return pd.Timestamp(records[-1]["timestamp"])
+        return None
+
+    def seek(self, start) -> tuple[str, int] | None:
+        """
+        Position (day, byte offset) at or shortly before the first record
+        with timestamp >= start. None if the log is empty.
+        """
+        days = self.partitions()
+        if not days:
+            return None
+
+        start = pd.Timestamp(start)
+        day = start.strftime(DAY_FORMAT)
+        later = [d for d in days if d >= day]
+        if not later:
+            return days[-1], os.path.getsize(self.log_path(days[-1]))
+        if later[0] != day:
+            return later[0], 0
+
+        index = self.index(day)
+        k = int(np.searchsorted(index[:, 0], start.value, side="left")) - 1
+        return day, int(index[k, 1]) if k >= 0 else 0
+
+    def read_records(self, start=None, end=None) -> list[dict]:
+        """
+        Records with start <= timestamp <= end, in order.
+        """
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+        first_day = start.strftime(DAY_FORMAT) if start is not None else None
+        last_day = end.strftime(DAY_FORMAT) if end is not None else None
+
+        records = []
+        for day in self.partitions():
+            if (first_day is not None and day < first_day) or (last_day is not None and day > last_day):
+                continue
+            records.extend(self.read_day(day, start if day == first_day else None, end if day == last_day else None))
+        return records
+
+    def read_day(self, day: str, start=None, end=None) -> list[dict]:
+        """
+        Records of one partition with start <= timestamp <= end. Only the
+        byte range between the bracketing index entries is parsed.
+        """
+        index = self.index(day)
+        lo, hi = 0, None
+        if start is not None:
+            k = int(np.searchsorted(index[:, 0], pd.Timestamp(start).value, side="left")) - 1
+            lo = int(index[k, 1]) if k >= 0 else 0
+        if end is not None:
+            k = int(np.searchsorted(index[:, 0], pd.Timestamp(end).value, side="right"))
+            hi = int(index[k, 1]) if k < len(index) else None
+
+        records, _ = self._read_range(day, lo, hi)
+        if records and (start is not None or end is not None):
+            ts = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601")
+            keep = np.ones(len(records), dtype=bool)
+            if start is not None:
+                keep &= ts >= pd.Timestamp(start)
+            if end is not None:
+                keep &= ts <= pd.Timestamp(end)
+            records = [r for r, k in zip(records, keep) if k]
+        return records
+
+    def read_from(self, position: tuple[str, int]) -> tuple[list[dict], tuple[str, int]]:
+        """
+        Records written at or after `position`, through every later partition,
+        and the position just past the last complete line (for tailing).
+        """
+        day, offset = position
+        records = []
+        for d in self.partitions():
+            if d < day:
+                continue
+            chunk, end = self._read_range(d, offset if d == day else 0)
+            records.extend(chunk)
+            position = (d, end)
+        return records, position
+
+    def _read_range(self, day: str, lo: int, hi: int | None = None) -> tuple[list[dict], int]:
+        # Complete lines in [lo, hi) and the offset after the last one
+        with open(self.log_path(day), "rb") as f:
+            f.seek(lo)
+            chunk = f.read() if hi is None else f.read(max(0, hi - lo))
+        end = chunk.rfind(b"\n") + 1
+        records = [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+        return records, lo + end
+
+    # === Writing ===
+
+    def append_records(self, records: list[dict]) -> None:
+        """
+        Append scan records in timestamp order, one write per day touched.
+        Raises ValueError if they aren't strictly after the newest record.
+        """
+        if not records:
+            return
+        ts = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601")
+        if np.any(np.diff(ts.asi8) <= 0):
+            raise ValueError("Timestamps must be strictly increasing")
+
+        if self._last is None:
+            self._last = self.latest_timestamp()
+        if self._last is not None and ts[0] <= self._last:
+            raise ValueError(f"Timestamp {ts[0]} is not after last logged {self._last}")
+
+        days = ts.strftime(DAY_FORMAT)
+        start = 0
+        for i in range(1, len(records) + 1):
+            if i == len(records) or days[i] != days[start]:
+                self._append_day(days[start], records[start:i], ts.asi8[start:i])
+                start = i
+        self._last = ts[-1]
+
+    def _append_day(self, day: str, records: list[dict], ts: np.ndarray):
+        path = self.log_path(day)
+        offset = self._repair(day)
+        index = self.index(day)
+        last_indexed = int(index[-1, 1]) if len(index) else None
+
+        lines = []
+        entries = []
+        for record, t in zip(records, ts):
+            line = (json.dumps(record) + "\n").encode()
+            if last_indexed is None or offset - last_indexed >= INDEX_STRIDE:
+                entries.append((t, offset))
+                last_indexed = offset
+            lines.append(line)
+            offset += len(line)
+
+        # Log first, index second: an index entry never points past the data
+        with open(path, "ab") as f:
+            f.write(b"".join(lines))
+        if entries:
+            with open(self.index_path(day), "ab") as f:
+                np.asarray(entries, dtype="<i8").tofile(f)
+
+    def _repair(self, day: str) -> int:
+        """
+        Drop a torn last line (and a torn index entry) left by an
+        interrupted append. Returns the log size.
+        """
+        path = self.log_path(day)
+        if not os.path.exists(path):
+            return 0
+
+        index_path = self.index_path(day)
+        if os.path.exists(index_path) and os.path.getsize(index_path) % 16:
+            with open(index_path, "r+b") as f:
+                f.truncate(os.path.getsize(index_path) // 16 * 16)
+
+        with open(path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                f.seek(pos - step)
+                block = f.read(step)
+                newline = block.rfind(b"\n")
+                if newline >= 0:
+                    pos = pos - step + newline + 1
+                    break
+                pos -= step
+            if pos < size:
+                f.truncate(pos)
+        return pos
+
+def split_jsonl(jsonl_path: str, parts_path: str, chunk_lines: int = 50_000) -> int:
+    """
+    Migrate a single crypto_prices_log.jsonl into a PartitionedLog. Records
+    at or before the log's newest timestamp (and duplicates) are skipped, so
+    re-running only appends what is new. Returns the number of records added.
+    """
+    log = PartitionedLog(parts_path, create=True)
+    last = log.latest_timestamp()
+    last = last.value if last is not None else None
+    added = 0
+
+    def flush(records):
+        nonlocal last, added
+        if not records:
+            return
+        ts = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601").asi8
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.ones(len(ts), dtype=bool)
+        keep[1:] = np.diff(ts) > 0
+        if last is not None:
+            keep &= ts > last
+        if not keep.any():
+            return
+
+        log.append_records([records[i] for i in order[keep]])
+        last = ts[keep][-1]
+        added += int(keep.sum())
+
+    records = []
+    with open(jsonl_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            records.append(json.loads(line))
+            if len(records) >= chunk_lines:
+                flush(records)
+                records = []
+    flush(records)
+
+    return added
+
+def convert_partitions(parts_path: str, store_path: str) -> int:
+    """
+    Append everything in a PartitionedLog newer than the store's last row to
+    a PriceStore, one day at a time. Returns the number of rows added.
+    """
+    log = PartitionedLog(parts_path)
+    store = PriceStore(store_path, create=True)
+    last = store.last_timestamp()
+    added = 0
+
+    for day in log.partitions():
+        if last is not None and day < last.strftime(DAY_FORMAT):
+            continue
+        records = log.read_day(day, start=last)
+        if last is not None and records:
+            ts = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601")
+            records = [r for r, t in zip(records, ts) if t > last]
+        store.append_records(records)
+        added += len(records)
+
+    return added
@@ -0,0 +1,231 @@
+# storage/price_store.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+META_FILE = "meta.json"
+TIMESTAMP_FILE = "timestamps.i8"
+COLUMN_SUFFIX = ".f8"
+FORMAT_VERSION = 1
+
+class PriceStore:
+    """
+    Columnar on-disk price history.
+
+    A store is a directory holding one raw little-endian array per column:
+        timestamps.i8   int64 epoch nanoseconds (naive UTC), ascending
+        <coin>.f8       float64 USD price per row, NaN where the coin is missing
+        meta.json       format version and coin list
+
+    Columns are memory-mapped, so a time range is located with a binary
+    search on the timestamps and only the matching rows are read.
+    """
+
+    def __init__(self, path: str, create: bool = False):
+        self.path = path
+        if not os.path.isdir(path):
+            if not create:
+                raise FileNotFoundError(f"No price store at {path}")
+            os.makedirs(path)
+            self._write_meta([])
+            open(os.path.join(path, TIMESTAMP_FILE), "ab").close()
+
+        with open(os.path.join(path, META_FILE), "r") as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported price store version: {meta.get('version')}")
+        self.coins: list[str] = meta["coins"]
+
+    def __len__(self) -> int:
+        return os.path.getsize(self._timestamp_path()) // 8
+
+    # === Reading ===
+
+    def timestamps(self) -> np.ndarray:
+        return self._map(self._timestamp_path(), "<i8", len(self))
+
+    def column(self, coin: str) -> np.ndarray:
+        return self._map(self._column_path(coin), "<f8", len(self))
+
+    def last_timestamp(self) -> pd.Timestamp | None:
+        ts = self.timestamps()
+        return pd.Timestamp(ts[-1]) if len(ts) else None
+
+    def locate(self, start=None, end=None) -> tuple[int, int]:
+        """
+        Row range [i0, i1) covering start <= timestamp <= end.
+        """
+        ts = self.timestamps()
+        i0 = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value, side="left"))
+        i1 = len(ts) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side="right"))
+        return i0, max(i0, i1)
+
+    def read(self, start=None, end=None, coins: list[str] | None = None) -> pd.DataFrame:
+        """
+        Returns a DataFrame indexed by timestamp with one 'prices.<coin>.usd'
+        column per coin, the same shape json_normalize gives for the JSONL log.
+        """
+        i0, i1 = self.locate(start, end)
+        index = pd.DatetimeIndex(np.array(self.timestamps()[i0:i1]).astype("datetime64[ns]"), name="timestamp")
+        columns = {
+            f"prices.{coin}.usd": np.array(self.column(coin)[i0:i1])
+            for coin in (coins if coins is not None else self.coins)
+            if coin in self.coins
+        }
+        return pd.DataFrame(columns, index=index)
+
+    # === Writing ===
+
+    def append(self, timestamp, prices: dict) -> None:
+        """
+        Append one scan record. `prices` is the CoinGecko payload,
+        e.g. {"bitcoin": {"usd": 67000.0}, ...}.
+        """
+        self.append_records([{"timestamp": timestamp, "prices": prices}])
+
+    def append_records(self, records: list[dict]) -> None:
+        """
+        Append scan records ({"timestamp": ..., "prices": {...}}) in one write.
+        """
+        if not records:
+            return
+        ts = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601").asi8
+        self.append_many(ts, records_to_columns(records))
+
+    def append_many(self, timestamps: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        """
+        Append a block of rows. Coins missing from `columns` are stored as NaN;
+        new coins get a column back-filled with NaN for existing rows.
+        """
+        timestamps = np.asarray(timestamps, dtype="<i8")
+        if len(timestamps) == 0:
+            return
+        if np.any(np.diff(timestamps) <= 0):
+            raise ValueError("Timestamps must be strictly increasing")
+
+        n = len(self)
+        last = self.timestamps()[-1] if n else None
+        if last is not None and timestamps[0] <= last:
+            raise ValueError(f"Timestamp {pd.Timestamp(timestamps[0])} is not after last stored {pd.Timestamp(last)}")
+
+        new_coins = [coin for coin in columns if coin not in self.coins]
+        if new_coins:
+            for coin in new_coins:
+                with open(self._column_path(coin), "wb") as f:
+                    np.full(n, np.nan, dtype="<f8").tofile(f)
+            self.coins = self.coins + new_coins
+            self._write_meta(self.coins)
+
+        # Columns first, timestamps last: the timestamp file length is the
+        # commit point, so a torn write leaves extra column bytes that are
+        # ignored on read and truncated here on the next append.
+        for coin in self.coins:
+            path = self._column_path(coin)
+            with open(path, "r+b") as f:
+                f.truncate(n * 8)
+                f.seek(n * 8)
+                values = columns.get(coin)
+                if values is None:
+                    values = np.full(len(timestamps), np.nan)
+                np.asarray(values, dtype="<f8").tofile(f)
+
+        with open(self._timestamp_path(), "r+b") as f:
+            f.truncate(n * 8)
+            f.seek(n * 8)
+            timestamps.tofile(f)
+
+    # === Internals ===
+
+    def _timestamp_path(self) -> str:
+        return os.path.join(self.path, TIMESTAMP_FILE)
+
+    def _column_path(self, coin: str) -> str:
+        return os.path.join(self.path, coin + COLUMN_SUFFIX)
+
+    def _write_meta(self, coins: list[str]) -> None:
+        tmp = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": FORMAT_VERSION, "coins": coins}, f)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+    @staticmethod
+    def _map(path: str, dtype: str, n: int) -> np.ndarray:
+        if n == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+def records_to_columns(records: list[dict]) -> dict[str, np.ndarray]:
+    """
+    One float64 USD column per coin for a list of scan records, NaN where a
+    record has no price for the coin.
+    """
+    def usd(quote) -> float:
+        return quote.get("usd", np.nan) if isinstance(quote, dict) else np.nan
+
+    coins = sorted({coin for r in records for coin in r.get("prices", {})})
+    return {
+        coin: np.array([usd(r.get("prices", {}).get(coin)) for r in records], dtype="<f8")
+        for coin in coins
+    }
+
+def records_to_arrays(records: list[dict]) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Epoch-nanosecond timestamps and records_to_columns for a list of scan
+    records, sorted by time. Coins are in order of first appearance.
+    """
+    if not records:
+        return np.empty(0, dtype="<i8"), {}
+    ts = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601").asi8
+    columns = records_to_columns(records)
+    # Coins in order of first appearance, as json_normalize lays them out
+    columns = {coin: columns[coin] for coin in dict.fromkeys(c for r in records for c in r.get("prices", {}))}
+    order = np.argsort(ts, kind="stable")
+    if np.any(order != np.arange(len(order))):
+        ts = ts[order]
+        columns = {coin: values[order] for coin, values in columns.items()}
+    return ts, columns
+
+def convert_jsonl(jsonl_path: str, store_path: str, chunk_lines: int = 50_000) -> int:
+    """
+    Convert a crypto_prices_log.jsonl file into a PriceStore.
+    Records at or before the store's last timestamp are skipped, so re-running
+    the conversion only appends what is new. Returns the number of rows added.
+    """
+    store = PriceStore(store_path, create=True)
+    last = store.timestamps()[-1] if len(store) else None
+    added = 0
+
+    def flush(records):
+        nonlocal last, added
+        if not records:
+            return
+        ts = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601").asi8
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.ones(len(ts), dtype=bool)
+        keep[1:] = np.diff(ts) > 0
+        if last is not None:
+            keep &= ts > last
+        if not keep.any():
+            return
+
+        rows = [records[i] for i in order[keep]]
+        store.append_many(ts[keep], records_to_columns(rows))
+        last = ts[keep][-1]
+        added += int(keep.sum())
+
+    records = []
+    with open(jsonl_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            records.append(json.loads(line))
+            if len(records) >= chunk_lines:
+                flush(records)
+                records = []
+    flush(records)
+
+    return added
@@ -0,0 +1,234 @@
+# storage/pyramid.py
+
+import numpy as np
+import pandas as pd
+from storage.resample import _append, _step
+
+LEVELS = ("1min", "5min", "15min", "1h", "1d")
+BAR_COLUMNS = ["open", "high", "low", "close", "mean", "count"]
+PYRAMID = "ohlc"    # ResampleCache layer holding the pyramids
+MAX_POINTS = 1000   # Default point budget for resolution_for
+MIN_WINDOW_BARS = 2 # Bars a horizon or lookback needs for a prediction other than 0
+
+def window_bars(window, resolution: str) -> int:
+    return int(pd.Timedelta(window) // pd.Timedelta(resolution))
+
+def check_resolution(resolution: str, windows: dict[str, object], levels=LEVELS) -> None:
+    """
+    Raise ValueError if bars of `resolution` leave any of `windows`
+    (label -> span, e.g. {"1h horizon": "1h", "60min lookback": "60min"})
+    with fewer than MIN_WINDOW_BARS bars: every prediction from it would be 0.
+    """
+    for label, window in windows.items():
+        bars = window_bars(window, resolution)
+        if bars < MIN_WINDOW_BARS:
+            finer = [r for r in levels if window_bars(window, r) >= MIN_WINDOW_BARS]
+            hint = f"use {finer[-1]} bars or finer" if finer else "no bar size is fine enough"
+            raise ValueError(f"{resolution} bars leave the {label} {bars} bar(s), "
+                             f"at least {MIN_WINDOW_BARS} are needed; {hint}")
+
+def resolution_for(span, max_points: int = MAX_POINTS, levels=LEVELS, windows: dict[str, object] | None = None) -> str:
+    """
+    Finest level that covers `span` in at most `max_points` bars, or the
+    coarsest level if none does, e.g. 30 days -> "1h" (720 bars).
+
+    Levels that would leave any of `windows` (see check_resolution) under
+    MIN_WINDOW_BARS bars are skipped, even if that exceeds `max_points`:
+    30 days with a 1h horizon -> "15min". Raises ValueError if no level fits.
+    """
+    windows = windows or {}
+    usable = [r for r in levels if all(window_bars(w, r) >= MIN_WINDOW_BARS for w in windows.values())]
+    if not usable:
+        check_resolution(levels[0], windows, levels)
+    span = pd.Timedelta(span)
+    for resolution in usable:
+        if span / pd.Timedelta(resolution) <= max_points:
+            return resolution
+    return usable[-1]
+
+class _Level:
+    """
+    Bars of one resolution, in time order. Only buckets holding at least
+    one point have a bar; `ts` is the bucket start (epoch ns).
+    """
+
+    __slots__ = ("step", "ts", "open", "high", "low", "close", "sums", "counts", "n")
+
+    FIELDS = ("ts", "open", "high", "low", "close", "sums", "counts")
+
+    def __init__(self, step: int):
+        self.step = step
+        for field in self.FIELDS:
+            setattr(self, field, np.empty(0, dtype="<i8" if field in ("ts", "counts") else "<f8"))
+        self.n = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, field).nbytes for field in self.FIELDS)
+
+    def fold(self, ts, open_, high, low, close, sums, counts) -> int:
+        """
+        Fold points or finer bars, in time order and none in a bucket before
+        the last bar, into bars. Returns the index of the first bar changed.
+        """
+        buckets = ts // self.step * self.step
+        starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = np.append(starts[1:], len(ts)) - 1
+        new = {
+            "ts": buckets[starts],
+            "open": open_[starts],
+            "high": np.maximum.reduceat(high, starts),
+            "low": np.minimum.reduceat(low, starts),
+            "close": close[ends],
+            "sums": np.add.reduceat(sums, starts),
+            "counts": np.add.reduceat(counts, starts),
+        }
+
+        changed = self.n
+        if self.n and new["ts"][0] == self.ts[self.n - 1]:
+            # The first bucket is still open: merge into the last bar
+            i = changed = self.n - 1
+            self.high[i] = max(self.high[i], new["high"][0])
+            self.low[i] = min(self.low[i], new["low"][0])
+            self.close[i] = new["close"][0]
+            self.sums[i] += new["sums"][0]
+            self.counts[i] += new["counts"][0]
+            new = {field: values[1:] for field, values in new.items()}
+
+        for field in self.FIELDS:
+            setattr(self, field, _append(getattr(self, field), self.n, new[field]))
+        self.n += len(new["ts"])
+        return changed
+
+    def refold(self, finer: "_Level", changed: int) -> int:
+        """
+        Rebuild the bars from the bucket holding finer bar `changed` on.
+        Returns the index of the first bar changed.
+        """
+        bucket = finer.ts[changed] // self.step * self.step
+        self.n = int(np.searchsorted(self.ts[:self.n], bucket, side="left"))
+        k = int(np.searchsorted(finer.ts[:finer.n], bucket, side="left"))
+        return self.fold(*(getattr(finer, field)[k:finer.n] for field in self.FIELDS))
+
+    def span(self, start: int | None, end: int | None) -> slice:
+        # Bars overlapping start <= timestamp <= end
+        ts = self.ts[:self.n]
+        i0 = 0 if start is None else int(np.searchsorted(ts, start // self.step * self.step, side="left"))
+        i1 = self.n if end is None else int(np.searchsorted(ts, end, side="right"))
+        return slice(i0, max(i0, i1))
+
+class Pyramid:
+    """
+    OHLC and mean bars of one coin at every resolution in `resolutions`
+    (each a multiple of the one before), maintained incrementally.
+
+    New points are folded into the finest level, merging into its last bar
+    while that bucket is still open. Each coarser level then drops its bars
+    from the bucket holding the first changed finer bar and refolds the
+    finer bars from there, so an update costs the new points plus at most
+    one coarse bucket of finer bars per level. A bar's mean is the mean of
+    the points in its bucket, as resample(resolution).mean() would give.
+    """
+
+    __slots__ = ("resolutions", "levels", "last")
+
+    def __init__(self, resolutions=LEVELS):
+        steps = [_step(resolution) for resolution in resolutions]
+        if any(coarse % fine for fine, coarse in zip(steps, steps[1:])):
+            raise ValueError(f"Each resolution must be a multiple of the one before: {resolutions}")
+        self.resolutions = tuple(resolutions)
+        self.levels = {resolution: _Level(step) for resolution, step in zip(resolutions, steps)}
+        self.last: int | None = None  # newest point (epoch ns)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels.values())
+
+    def extend(self, ts: np.ndarray, values: np.ndarray) -> bool:
+        """
+        Add points newer than the last one. Returns False (and changes
+        nothing) if any point is older, in which case the pyramid must be rebuilt.
+        """
+        keep = ~np.isnan(values)
+        ts, values = ts[keep], values[keep]
+        if not len(ts):
+            return True
+        if self.last is not None and ts[0] < self.last:
+            return False
+        self.last = int(ts[-1])
+
+        finer = None
+        for level in self.levels.values():
+            if finer is None:
+                changed = level.fold(ts, values, values, values, values, values, np.ones(len(ts), dtype="<i8"))
+            else:
+                changed = level.refold(finer, changed)
+            finer = level
+        return True
+
+    def bars(self, resolution: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Bars overlapping start <= timestamp <= end, indexed by bucket start,
+        with columns open, high, low, close, mean and count (points per bar).
+        """
+        level = self.levels[resolution]
+        span = level.span(_ns(start), _ns(end))
+        return pd.DataFrame({
+            "open": level.open[span],
+            "high": level.high[span],
+            "low": level.low[span],
+            "close": level.close[span],
+            "mean": level.sums[span] / level.counts[span],
+            "count": level.counts[span],
+        }, index=pd.DatetimeIndex(level.ts[span], name="timestamp"), columns=BAR_COLUMNS)
+
+    def series(self, resolution: str, start=None, end=None, field: str = "mean",
+               name: str | None = None) -> pd.Series | None:
+        """
+        One bar field on a regular grid, empty buckets interpolated, like
+        resample(resolution).mean().interpolate() over whole buckets.
+        None if no bar overlaps the window.
+        """
+        level = self.levels[resolution]
+        span = level.span(_ns(start), _ns(end))
+        ts = level.ts[span]
+        if not len(ts):
+            return None
+
+        if field == "mean":
+            values = level.sums[span] / level.counts[span]
+        else:
+            values = getattr(level, field)[span].astype(float)
+        offsets = (ts - ts[0]) // level.step
+        if offsets[-1] + 1 > len(ts):
+            values = np.interp(np.arange(offsets[-1] + 1), offsets, values)
+
+        index = pd.date_range(start=pd.Timestamp(ts[0]), periods=len(values), freq=resolution, name="timestamp")
+        return pd.Series(values, index=index, name=name)
+
+    # === Cache state ===
+
+    def state(self) -> dict[str, np.ndarray]:
+        state = {"last": np.array([] if self.last is None else [self.last], dtype="<i8")}
+        for resolution, level in self.levels.items():
+            for field in _Level.FIELDS:
+                state[f"{resolution}.{field}"] = getattr(level, field)[:level.n]
+        return state
+
+    def restore(self, state) -> None:
+        last = state["last"]
+        self.last = int(last[0]) if len(last) else None
+        for resolution, level in self.levels.items():
+            for field in _Level.FIELDS:
+                setattr(level, field, state[f"{resolution}.{field}"])
+            level.n = len(level.ts)
+
+def _ns(t) -> int | None:
+    return pd.Timestamp(t).value if t is not None else None
+
+def pyramid_dict(cache, source, coins: list[str] | None = None, start=None) -> dict[str, Pyramid]:
+    """
+    Pyramid per coin for a resample cache source, synced with it. With
+    `start`, only bars from its day on are needed.
+    """
+    return cache.layers(source, PYRAMID, Pyramid, coins, since=start)
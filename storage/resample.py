@@ -0,0 +1,641 @@
+# storage/resample.py
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from instrument import count, stage
+from storage.partitioned import PartitionedLog
+from storage.price_store import PriceStore, records_to_arrays
+
+RESOLUTION = "1min"
+CACHE_ENV_VAR = "CRYPTO_RESAMPLE_CACHE"  # "off" disables the disk cache, a path moves it
+MAX_BYTES = 256 * 2**20        # In-process cache cap
+DISK_MAX_BYTES = 1024 * 2**20  # On-disk cache cap
+TOKEN_BYTES = 64               # Bytes before a JSONL position that must be unchanged
+DAY_NS = 24 * 3600 * 10**9
+DISK_FORMAT = 2                # Layout of the on-disk cache, see ResampleCache._save
+
+def _step(resolution: str) -> int:
+    step = pd.Timedelta(resolution).value
+    if step <= 0 or DAY_NS % step:
+        raise ValueError(f"Resolution must evenly divide a day: {resolution}")
+    return step
+
+def on_grid(series: pd.Series, resolution: str = RESOLUTION) -> bool:
+    """
+    True if the series is already what resample(resolution).mean().interpolate()
+    would return for it: bucket-aligned, evenly spaced and without NaN.
+    """
+    if series.empty or series.isna().any():
+        return False
+    step = _step(resolution)
+    ts = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else None
+    if ts is None or ts[0] % step:
+        return False
+    freq = series.index.freq
+    if freq is not None:
+        return pd.Timedelta(freq).value == step
+    return bool(np.all(np.diff(ts) == step))
+
+def resample_series(series: pd.Series, resolution: str = RESOLUTION) -> pd.Series:
+    """
+    dropna().resample(resolution).mean().interpolate(), skipped when the
+    series is already on that grid.
+    """
+    if on_grid(series, resolution):
+        count("resample.skipped")
+        return series
+    return series.dropna().resample(resolution).mean().interpolate()
+
+def grid_resolution(series: pd.Series) -> str:
+    """
+    Spacing of a series on a grid coarser than RESOLUTION (e.g. pyramid
+    bars) as a resolution string, otherwise RESOLUTION.
+    """
+    index = series.index
+    if not isinstance(index, pd.DatetimeIndex):
+        return RESOLUTION
+    freq = index.freq or (index.inferred_freq if len(index) > 2 else None)
+    if freq is None:
+        return RESOLUTION
+    step, minute = pd.Timedelta(freq), pd.Timedelta(RESOLUTION)
+    if step <= minute or step % minute or DAY_NS % step.value:
+        return RESOLUTION
+    return f"{step // minute}min"
+
+# === Sources ===
+
+class StoreSource:
+    """
+    Rows of a PriceStore; a position is a row count.
+
+    Every source can also seek(timestamp) to the position of the first
+    point at or after it, and read_range(start, end) the points with
+    start <= timestamp <= end (epoch ns) without moving a position.
+    """
+
+    def __init__(self, store: PriceStore):
+        self.store = store
+        self.key = "store:" + os.path.abspath(store.path)
+
+    def start(self):
+        return 0
+
+    def token(self, position):
+        return int(self.store.timestamps()[position - 1]) if position else None
+
+    def unchanged(self, position, token) -> bool:
+        return len(self.store) >= position and self.token(position) == token
+
+    def seek(self, timestamp: int):
+        return int(np.searchsorted(self.store.timestamps(), timestamp, side="left"))
+
+    def read(self, position):
+        return self._rows(position, len(self.store))
+
+    def read_range(self, start: int, end: int):
+        timestamps = self.store.timestamps()
+        lo = int(np.searchsorted(timestamps, start, side="left"))
+        hi = int(np.searchsorted(timestamps, end, side="right"))
+        return self._rows(lo, hi)[:2]
+
+    def _rows(self, lo: int, hi: int):
+        ts = np.array(self.store.timestamps()[lo:hi])
+        columns = {coin: np.array(self.store.column(coin)[lo:hi]) for coin in self.store.coins}
+        return ts, columns, hi
+
+class JsonlSource:
+    """
+    Complete lines of a single JSONL log; a position is a byte offset.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.key = "jsonl:" + os.path.abspath(path)
+
+    def start(self):
+        return 0
+
+    def token(self, position):
+        if not position:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(max(0, position - TOKEN_BYTES))
+            tail = f.read(min(position, TOKEN_BYTES))
+        return [os.stat(self.path).st_ino, tail.hex()]
+
+    def unchanged(self, position, token) -> bool:
+        try:
+            return os.path.getsize(self.path) >= position and self.token(position) == token
+        except FileNotFoundError:
+            return False
+
+    def seek(self, timestamp: int):
+        # Imported here: storage.tail imports storage.loader, which imports this module
+        from storage.tail import seek_timestamp
+        return seek_timestamp(self.path, pd.Timestamp(timestamp))
+
+    def read(self, position):
+        with open(self.path, "rb") as f:
+            f.seek(position)
+            chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        records = [json.loads(line) for line in chunk[:end].splitlines() if line.strip()]
+        return (*records_to_arrays(records), position + end)
+
+    def read_range(self, start: int, end: int):
+        records = []
+        with open(self.path, "rb") as f:
+            f.seek(self.seek(start))
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if pd.Timestamp(record["timestamp"]).value > end:
+                    break
+                records.append(record)
+        return _between(*records_to_arrays(records), start, end)
+
+class PartitionSource:
+    """
+    Complete lines of a PartitionedLog; a position is (day, byte offset).
+    """
+
+    def __init__(self, partitions: PartitionedLog):
+        self.partitions = partitions
+        self.key = "days:" + os.path.abspath(partitions.path)
+
+    def start(self):
+        days = self.partitions.partitions()
+        return [days[0] if days else "", 0]
+
+    def token(self, position):
+        day, offset = position
+        if not offset:
+            return None
+        with open(self.partitions.log_path(day), "rb") as f:
+            f.seek(max(0, offset - TOKEN_BYTES))
+            return f.read(min(offset, TOKEN_BYTES)).hex()
+
+    def unchanged(self, position, token) -> bool:
+        day, offset = position
+        path = self.partitions.log_path(day)
+        if not offset:
+            return True
+        return os.path.exists(path) and os.path.getsize(path) >= offset and self.token(position) == token
+
+    def seek(self, timestamp: int):
+        position = self.partitions.seek(pd.Timestamp(timestamp))
+        return list(position) if position is not None else self.start()
+
+    def read(self, position):
+        records, (day, offset) = self.partitions.read_from(tuple(position))
+        return (*records_to_arrays(records), [day, offset])
+
+    def read_range(self, start: int, end: int):
+        records = self.partitions.read_records(start=pd.Timestamp(start), end=pd.Timestamp(end))
+        return records_to_arrays(records)
+
+def _between(ts: np.ndarray, columns: dict[str, np.ndarray], start: int, end: int):
+    keep = (ts >= start) & (ts <= end)
+    if keep.all():
+        return ts, columns
+    return ts[keep], {coin: values[keep] for coin, values in columns.items()}
+
+# === Grids ===
+
+class _Grid:
+    """
+    One coin at one resolution: the sum and count of its points in every
+    bucket from `first` on, and the timestamp of its newest point. Raw
+    points are not kept: a window edge that cuts through a bucket is
+    recounted from the source (see ResampleCache.series_dict).
+    """
+
+    __slots__ = ("step", "first", "last", "sums", "counts", "buckets")
+
+    def __init__(self, step: int):
+        self.step = step
+        self.first = 0
+        self.last: int | None = None  # newest point (epoch ns)
+        self.sums = np.empty(0, dtype="<f8")
+        self.counts = np.empty(0, dtype="<i4")
+        self.buckets = 0  # buckets used
+
+    @property
+    def nbytes(self) -> int:
+        return self.sums.nbytes + self.counts.nbytes
+
+    def extend(self, ts: np.ndarray, values: np.ndarray) -> bool:
+        """
+        Add points from the newest one on. Returns False (and changes
+        nothing) if any point is older, in which case the grid must be rebuilt.
+        """
+        keep = ~np.isnan(values)
+        ts, values = ts[keep], values[keep]
+        if not len(ts):
+            return True
+        if self.last is not None and ts[0] < self.last:
+            return False
+        self.last = int(ts[-1])
+
+        buckets = ts // self.step
+        if not self.buckets:
+            self.first = int(buckets[0])
+        offset = buckets - self.first
+        size = int(offset[-1]) + 1
+        added_sums = np.bincount(offset - offset[0], weights=values)
+        added_counts = np.bincount(offset - offset[0])
+
+        start = int(offset[0])
+        self.sums = _append(self.sums, self.buckets, np.zeros(max(0, size - self.buckets)))
+        self.counts = _append(self.counts, self.buckets, np.zeros(max(0, size - self.buckets), dtype="<i4"))
+        self.sums[start:size] += added_sums
+        self.counts[start:size] += added_counts
+        self.buckets = max(self.buckets, size)
+        return True
+
+    def window(self, start: int | None, end: int | None, resolution: str, name: str,
+               head: tuple | None = None, tail: tuple | None = None) -> pd.Series | None:
+        """
+        Resampled, interpolated series of the points with start <= ts <= end
+        (epoch ns), or None if there are none. `head` and `tail` are the
+        (sum, count) of the window's points in the buckets holding `start`
+        and `end`, when the window cuts through them.
+        """
+        lo = 0 if start is None else max(0, start // self.step - self.first)
+        hi = self.buckets if end is None else min(self.buckets, end // self.step - self.first + 1)
+        if lo >= hi:
+            return None
+        sums = self.sums[lo:hi].copy()
+        counts = self.counts[lo:hi].astype("<i8")
+
+        for edge, point, k in ((head, start, 0), (tail, end, hi - lo - 1)):
+            if edge is not None and point // self.step - self.first == lo + k:
+                sums[k], counts[k] = edge
+
+        filled = np.flatnonzero(counts)
+        if not len(filled):
+            return None
+        # Trim edge buckets left empty by the recount
+        first, last = int(filled[0]), int(filled[-1]) + 1
+        lo, sums, counts, filled = lo + first, sums[first:last], counts[first:last], filled - first
+        with np.errstate(invalid="ignore"):
+            means = sums / counts
+        if len(filled) < len(means):
+            means = np.interp(np.arange(len(means)), filled, means[filled])
+
+        index = pd.date_range(start=pd.Timestamp((self.first + lo) * self.step), periods=len(means),
+                              freq=resolution, name="timestamp")
+        return pd.Series(means, index=index, name=name)
+
+    def state(self) -> dict[str, np.ndarray]:
+        return {"first": np.array([self.first], dtype="<i8"),
+                "last": np.array([] if self.last is None else [self.last], dtype="<i8"),
+                "sums": self.sums[:self.buckets], "counts": self.counts[:self.buckets]}
+
+    def restore(self, state) -> None:
+        self.first = int(state["first"][0])
+        self.last = int(state["last"][0]) if len(state["last"]) else None
+        self.sums, self.counts = state["sums"], state["counts"]
+        self.buckets = len(self.sums)
+
+def _append(array: np.ndarray, used: int, new: np.ndarray) -> np.ndarray:
+    # Amortized append into a buffer with spare capacity
+    need = used + len(new)
+    if need > len(array):
+        grown = np.empty(max(need, 2 * len(array)), dtype=array.dtype)
+        grown[:used] = array[:used]
+        array = grown
+    array[used:need] = new
+    return array
+
+def _edge_sums(ts: np.ndarray, columns: dict[str, np.ndarray]) -> dict[str, tuple[float, int]]:
+    sums = {}
+    for coin, values in columns.items():
+        values = values[~np.isnan(values)]
+        if len(values):
+            sums[coin] = (float(values.sum()), len(values))
+    return sums
+
+class _Entry:
+    """
+    Sync state of one (source, layer): how far the source has been read,
+    from which timestamp on (None: from its start), the coins evicted
+    since, and what of each coin is already on disk.
+    """
+
+    __slots__ = ("position", "token", "since", "coins", "evicted", "dirty", "saved")
+
+    def __init__(self, position, since: int | None = None):
+        self.position = position
+        self.token = None
+        self.since = since
+        self.coins: dict[str, None] = {}  # ordered by first appearance
+        self.evicted: set[str] = set()
+        self.dirty = False
+        self.saved: dict[str, dict] | None = None  # coin -> field -> [dtype, rows on disk, tail]
+
+    def covers(self, since: int | None) -> bool:
+        return self.since is None or (since is not None and self.since <= since)
+
+# === Cache ===
+
+class ResampleCache:
+    """
+    Resampled grids per (source, coin, resolution), kept up to date with
+    the source instead of rebuilt from it.
+
+    A source remembers how far it has been read (row count, byte offset or
+    partition position) together with a token of the data just before that
+    point. While the token still matches, only what was appended since is
+    parsed and folded into the per-bucket sums; otherwise (rewritten or
+    truncated source) the entry is rebuilt. A first sync for a window seeks
+    to the day it starts in rather than reading the whole source. Any
+    window is then a slice of the bucket arrays, with edge buckets the
+    window cuts through recounted from the source and gaps interpolated,
+    so results match series[start:end].dropna().resample(resolution).mean().interpolate().
+
+    Other per-coin structures fed the same way (see layers(), e.g. the OHLC
+    pyramids in storage.pyramid) share the sync, eviction and disk logic.
+
+    Grids are evicted least recently used once the in-process total passes
+    `max_bytes`. With `disk_dir`, entries are also saved there (one
+    directory per source and layer, evicted by last use past
+    `disk_max_bytes`) and picked up by the next process. Every state array
+    is an append-only file plus its last element in the metadata, so a
+    save only writes what was appended.
+    """
+
+    def __init__(self, max_bytes: int = MAX_BYTES, disk_dir: str | None = None, disk_max_bytes: int = DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.entries: dict[tuple, _Entry] = {}
+        self.grids: OrderedDict[tuple, _Grid] = OrderedDict()
+        self.nbytes = 0
+
+    def series_dict(self, source, start=None, end=None, coins: list[str] | None = None,
+                    resolution: str = RESOLUTION) -> dict[str, pd.Series]:
+        """
+        Resampled series per coin over start <= timestamp <= end, named
+        'prices.<coin>.usd' like the columns they come from. Coins without
+        points in the window are left out.
+        """
+        step = _step(resolution)
+        start = pd.Timestamp(start).value if start is not None else None
+        end = pd.Timestamp(end).value if end is not None else None
+        grids = self.layers(source, resolution, lambda: _Grid(step), coins, since=start)
+        # A store has a column for every coin, even one without points since `since`
+        grids = {coin: grid for coin, grid in grids.items() if grid.last is not None}
+
+        result = {}
+        with stage("resample.window"):
+            head, tail = self._edges(source, grids, start, end, step)
+            for coin, grid in grids.items():
+                series = grid.window(start, end, resolution, f"prices.{coin}.usd",
+                                     None if head is None else head.get(coin, (0.0, 0)),
+                                     None if tail is None or grid.last <= end else tail.get(coin, (0.0, 0)))
+                if series is not None:
+                    result[coin] = series
+        count("resample.coins", len(result))
+        return result
+
+    def layers(self, source, name: str, make, coins: list[str] | None = None, since=None) -> dict:
+        """
+        Per-coin objects of one layer (e.g. the grids of one resolution),
+        created with make() and fed the source's points through
+        extend(ts, values) -> bool, in the source's coin order. Only points
+        from the day of `since` on are needed (None: all of them).
+
+        state() must return arrays that only grow and, once saved, only
+        change in their last element; restore(state) takes them back.
+        """
+        key = (source.key, name)
+        since = pd.Timestamp(since).value // DAY_NS * DAY_NS if since is not None else None
+        with stage("resample.sync"):
+            entry = self._sync(source, key, make, coins, since)
+
+        result = {}
+        for coin in entry.coins:
+            if coins is not None and coin not in coins:
+                continue
+            grid = self.grids.get((*key, coin))
+            if grid is None:
+                continue
+            self.grids.move_to_end((*key, coin))
+            result[coin] = grid
+        self._evict()
+        return result
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.grids.clear()
+        self.nbytes = 0
+
+    @staticmethod
+    def _edges(source, grids: dict, start: int | None, end: int | None, step: int) -> tuple[dict | None, dict | None]:
+        # (sum, count) per coin of the window's points in the buckets holding
+        # start and end, read back from the source where the window cuts
+        # through them (None where it does not)
+        head = tail = None
+        if start is not None and start % step:
+            bucket_end = start // step * step + step - 1
+            head = _edge_sums(*source.read_range(start, bucket_end if end is None else min(end, bucket_end)))
+        if end is not None and (end + 1) % step and any(grid.last > end for grid in grids.values()):
+            if head is not None and start // step == end // step:
+                tail = head
+            else:
+                bucket_start = end // step * step
+                tail = _edge_sums(*source.read_range(bucket_start if start is None else max(start, bucket_start), end))
+        return head, tail
+
+    def _sync(self, source, key: tuple, make, coins: list[str] | None, since: int | None) -> _Entry:
+        entry = self.entries.get(key)
+        if entry is None and self.disk_dir:
+            entry = self._load(source, key, make)
+
+        if entry is not None:
+            missing = entry.evicted if coins is None else entry.evicted & set(coins)
+            if missing or not entry.covers(since) or not source.unchanged(entry.position, entry.token):
+                count("resample.rebuilds")
+                self._drop(key)
+                entry = None
+
+        if entry is None:
+            count("resample.misses")
+            entry = self._new(source, key, since)
+        else:
+            count("resample.hits")
+
+        if not self._read(source, key, make, entry):
+            # Points older than what is cached were appended: start over
+            count("resample.rebuilds")
+            self._drop(key)
+            entry = self._new(source, key, since)
+            self._read(source, key, make, entry)
+
+        if entry.dirty and self.disk_dir:
+            self._save(key, entry)
+        return entry
+
+    def _new(self, source, key: tuple, since: int | None) -> _Entry:
+        position = source.start() if since is None else source.seek(since)
+        entry = self.entries[key] = _Entry(position, since)
+        return entry
+
+    def _read(self, source, key: tuple, make, entry: _Entry) -> bool:
+        # Fold everything appended since entry.position into the grids
+        ts, columns, position = source.read(entry.position)
+        if len(ts):
+            for coin, values in columns.items():
+                if coin in entry.evicted:
+                    continue
+                grid = self.grids.get((*key, coin))
+                if grid is None:
+                    grid = self.grids[(*key, coin)] = make()
+                    entry.coins[coin] = None
+                before = grid.nbytes
+                if not grid.extend(ts, values):
+                    return False
+                self.nbytes += grid.nbytes - before
+        entry.dirty = entry.dirty or position != entry.position
+        entry.position = position
+        entry.token = source.token(position)
+        return True
+
+    def _drop(self, key: tuple) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for coin in entry.coins:
+            grid = self.grids.pop((*key, coin), None)
+            if grid is not None:
+                self.nbytes -= grid.nbytes
+
+    def _evict(self) -> None:
+        # Least recently used first; what was just served is already collected
+        for grid_key in list(self.grids):
+            if self.nbytes <= self.max_bytes:
+                break
+            grid = self.grids.pop(grid_key)
+            self.nbytes -= grid.nbytes
+            entry = self.entries[grid_key[:2]]
+            entry.coins.pop(grid_key[2], None)
+            entry.evicted.add(grid_key[2])
+            count("resample.evictions")
+
+    # === Disk ===
+
+    def _dir(self, key: tuple) -> str:
+        digest = hashlib.sha1("|".join(key).encode()).hexdigest()[:16]
+        return os.path.join(self.disk_dir, digest)
+
+    def _save(self, key: tuple, entry: _Entry) -> None:
+        path = self._dir(key)
+        try:
+            with stage("resample.save"):
+                if entry.saved is None:
+                    # A new entry: nothing on disk is its own
+                    _remove_dir(path)
+                    entry.saved = {}
+                os.makedirs(path, exist_ok=True)
+                for coin in entry.coins:
+                    saved = entry.saved.setdefault(coin, {})
+                    for field, array in self.grids[(*key, coin)].state().items():
+                        saved[field] = _save_array(os.path.join(path, f"{coin}.{field}"), array, saved.get(field))
+                meta = {"format": DISK_FORMAT, "key": list(key), "position": entry.position, "token": entry.token,
+                        "since": entry.since, "coins": {coin: entry.saved[coin] for coin in entry.coins},
+                        "evicted": sorted(entry.evicted)}
+                tmp = os.path.join(path, "meta.json.tmp")
+                with open(tmp, "w") as f:
+                    json.dump(meta, f)
+                os.replace(tmp, os.path.join(path, "meta.json"))
+            entry.dirty = False
+            self._evict_disk()
+        except OSError as e:
+            print(f"[WARN] Resample cache not saved to {path}: {e}")
+            self.disk_dir = None
+
+    def _load(self, source, key: tuple, make) -> _Entry | None:
+        path = self._dir(key)
+        try:
+            with open(os.path.join(path, "meta.json"), "r") as f:
+                meta = json.load(f)
+            if meta.get("format") != DISK_FORMAT or meta["key"] != list(key) \
+                    or not source.unchanged(meta["position"], meta["token"]):
+                return None
+
+            entry = _Entry(meta["position"], meta["since"])
+            entry.token = meta["token"]
+            entry.evicted = set(meta["evicted"])
+            entry.saved = meta["coins"]
+            grids = {}
+            for coin, fields in entry.saved.items():
+                grid = grids[coin] = make()
+                grid.restore({field: _load_array(os.path.join(path, f"{coin}.{field}"), saved)
+                              for field, saved in fields.items()})
+            os.utime(os.path.join(path, "meta.json"))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        for coin, grid in grids.items():
+            self.grids[(*key, coin)] = grid
+            self.nbytes += grid.nbytes
+            entry.coins[coin] = None
+        count("resample.disk_hits")
+        self.entries[key] = entry
+        return entry
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for name in os.listdir(self.disk_dir):
+            path = os.path.join(self.disk_dir, name)
+            meta = os.path.join(path, "meta.json")
+            if not os.path.isfile(meta):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(path))
+            entries.append((os.path.getmtime(meta), size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            _remove_dir(path)
+            total -= size
+
+def _save_array(path: str, array: np.ndarray, saved: list | None) -> list:
+    # All but the last element, which may still change, go to an append-only
+    # file; only the part not yet there is written. The last element is
+    # kept in the metadata, which is replaced last, so a save cut short
+    # leaves the previous one readable.
+    rows = max(0, len(array) - 1)
+    done = saved[1] if saved is not None and saved[0] == array.dtype.str and saved[1] <= rows else 0
+    if rows > done:
+        with open(path, "r+b" if done else "wb") as f:
+            f.seek(done * array.itemsize)
+            f.write(np.ascontiguousarray(array[done:rows]))
+            f.truncate()
+    return [array.dtype.str, rows, array[rows:].tolist()]
+
+def _load_array(path: str, saved: list) -> np.ndarray:
+    dtype, rows, last = saved
+    array = np.empty(rows + len(last), dtype=dtype)
+    if rows:
+        with open(path, "rb") as f:
+            if f.readinto(array[:rows]) != array[:rows].nbytes:
+                raise ValueError(f"Truncated cache file: {path}")
+    array[rows:] = last
+    return array
+
+def _remove_dir(path: str) -> None:
+    if not os.path.isdir(path):
+        return
+    for f in os.listdir(path):
+        os.remove(os.path.join(path, f))
+    os.rmdir(path)
@@ -0,0 +1,322 @@
+# storage/ring.py
+
+import numpy as np
+import pandas as pd
+from instrument import count
+
+MINUTE_NS = 60 * 10**9
+LATE_MINUTES = 10  # Newest minutes that still take late points (their point counts are kept)
+
+def _minute(ts, ceil: bool = False) -> int | None:
+    if ts is None:
+        return None
+    value = pd.Timestamp(ts).value
+    return -(-value // MINUTE_NS) if ceil else value // MINUTE_NS
+
+class PriceRing:
+    """
+    Compact in-memory history of 1-minute prices for many coins.
+
+    All coins share one int64 axis of minutes since the epoch. Prices sit
+    in a preallocated (minute, coin) array of `dtype`, with a validity
+    bitmask packed 8 coins to a byte. A minute holds the mean of its
+    points. Minutes without points are invalid (and NaN), and are only
+    interpolated when a window is turned into a Series or frame. Point
+    counts are kept for the newest LATE_MINUTES minutes, so a late point
+    still averages into one of those. Older late points are ignored
+    (counted as ring.late), as StreamingPredictor ignores them.
+
+    The last `capacity` minutes are kept. Rows are in time order, followed
+    by `slack` spare rows. Once those run out, the live rows are moved
+    back to the start, which costs capacity / slack row copies per minute
+    amortized. Every window is a contiguous slice, so `axis`, `window` and
+    `frame` return views, not copies.
+    """
+
+    __slots__ = ("capacity", "slack", "dtype", "coins", "columns", "minutes", "values", "valid",
+                 "counts", "lo", "hi")
+
+    def __init__(self, capacity: int, coins: list[str] = (), dtype=np.float32, slack: int | None = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least one minute.")
+        self.capacity = capacity
+        self.slack = max(slack or capacity // 8, LATE_MINUTES)
+        self.dtype = np.dtype(dtype)
+        self.coins: list[str] = []
+        self.columns: dict[str, int] = {}
+        self.minutes = np.zeros(capacity + self.slack, dtype="<i8")
+        self.values = np.full((capacity + self.slack, 0), np.nan, dtype=self.dtype)
+        self.valid = np.zeros((capacity + self.slack, 0), dtype=np.uint8)
+        self.counts = np.zeros((LATE_MINUTES, 0), dtype=np.uint32)
+        self.lo = self.hi = 0  # Live rows
+        self._add_coins(list(coins))
+
+    @classmethod
+    def from_series_dict(cls, series_dict: dict[str, pd.Series], capacity: int | None = None,
+                         dtype=np.float32) -> "PriceRing":
+        """
+        A ring holding per-coin series (e.g. from load_series_dict), by
+        default sized to their whole span.
+        """
+        series_dict = {coin: s for coin, s in ((coin, s.dropna()) for coin, s in series_dict.items()) if not s.empty}
+        if capacity is None:
+            first = min((_minute(s.index[0]) for s in series_dict.values()), default=0)
+            last = max((_minute(s.index[-1]) for s in series_dict.values()), default=0)
+            capacity = last - first + 1
+        ring = cls(capacity, coins=list(series_dict), dtype=dtype)
+        if series_dict:
+            ts = np.unique(np.concatenate([s.index.asi8 for s in series_dict.values()]))
+            columns = {}
+            for coin, s in series_dict.items():
+                column = np.full(len(ts), np.nan)
+                column[np.searchsorted(ts, s.index.asi8)] = s.to_numpy(dtype=float)
+                columns[coin] = column
+            ring.extend(ts, columns)
+        return ring
+
+    def __len__(self) -> int:
+        return self.hi - self.lo
+
+    @property
+    def nbytes(self) -> int:
+        return self.minutes.nbytes + self.values.nbytes + self.valid.nbytes + self.counts.nbytes
+
+    @property
+    def first_minute(self) -> int | None:
+        return int(self.minutes[self.lo]) if len(self) else None
+
+    @property
+    def last_minute(self) -> int | None:
+        return int(self.minutes[self.hi - 1]) if len(self) else None
+
+    # === Ingest ===
+
+    def extend(self, ts: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        """
+        Fold points into their minutes: `ts` in epoch ns, and per coin an
+        array of prices aligned with it, NaN where a point has no price.
+        """
+        ts = np.asarray(ts, dtype="<i8")
+        columns = {coin: np.asarray(v, dtype=float) for coin, v in columns.items()}
+        if not len(ts) or not columns:
+            return
+        self._add_coins([coin for coin in columns if coin not in self.columns])
+
+        minutes = ts // MINUTE_NS
+        newest = self.last_minute
+        if newest is not None:
+            fresh = minutes > newest - LATE_MINUTES
+            if not fresh.all():
+                count("ring.late", int((~fresh).sum()))
+                minutes = minutes[fresh]
+                columns = {coin: v[fresh] for coin, v in columns.items()}
+                if not len(minutes):
+                    return
+
+        # Mean and count of the new points per (minute, coin)
+        order = np.argsort(minutes, kind="stable")
+        minutes = minutes[order]
+        starts = np.flatnonzero(np.r_[True, minutes[1:] != minutes[:-1]])
+        batch = np.column_stack([columns[coin][order] for coin in columns])
+        known = ~np.isnan(batch)
+        sums = np.add.reduceat(np.where(known, batch, 0.0), starts, axis=0)
+        added = np.add.reduceat(known, starts, axis=0).astype(np.uint32)
+        minutes = minutes[starts]
+        cols = np.array([self.columns[coin] for coin in columns])
+
+        # Counts already in the newest minutes, read before new minutes reuse their slots
+        before = np.zeros_like(added)
+        existing = minutes <= newest if newest is not None else np.zeros(len(minutes), dtype=bool)
+        before[existing] = self.counts[(minutes[existing] % LATE_MINUTES)[:, None], cols]
+
+        self._advance(int(minutes[0]), int(minutes[-1]))
+        rows = self.hi - 1 - (self.last_minute - minutes)
+        inside = rows >= self.lo
+        if not inside.all():
+            # Whole batch spans more than `capacity`: older minutes fall out
+            rows, minutes, sums, added, before = (a[inside] for a in (rows, minutes, sums, added, before))
+
+        total = before + added
+        old = self.values[rows[:, None], cols].astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            merged = (np.where(before > 0, old, 0.0) * before + sums) / total
+        self.values[rows[:, None], cols] = np.where(total > 0, merged, old)
+
+        # rows are distinct, so each row's bits are OR-ed in once
+        bits = np.zeros((len(rows), self.values.shape[1]), dtype=bool)
+        bits[:, cols] = total > 0
+        self.valid[rows] |= np.packbits(bits, axis=1, bitorder="little")
+
+        recent = minutes > self.last_minute - LATE_MINUTES
+        self.counts[(minutes[recent] % LATE_MINUTES)[:, None], cols] = total[recent]
+        count("ring.points", int(added.sum()))
+
+    def _advance(self, first: int, last: int) -> None:
+        # Open empty rows up to minute `last`, from `first` if the ring is empty
+        newest = self.last_minute
+        if newest is not None and last <= newest:
+            return
+        if newest is None:
+            newest = first - 1
+        k = last - newest
+        if k >= self.capacity:
+            self.lo = self.hi = 0  # Gap longer than the ring: nothing old stays
+            k = self.capacity
+        elif self.hi + k > len(self.minutes):
+            keep = min(len(self), self.capacity - k)
+            src = slice(self.hi - keep, self.hi)
+            self.minutes[:keep] = self.minutes[src]
+            self.values[:keep] = self.values[src]
+            self.valid[:keep] = self.valid[src]
+            self.lo, self.hi = 0, keep
+            count("ring.compactions")
+
+        new = slice(self.hi, self.hi + k)
+        self.minutes[new] = np.arange(last - k + 1, last + 1)
+        self.values[new] = np.nan
+        self.valid[new] = 0
+        self.counts[np.arange(last - min(k, LATE_MINUTES) + 1, last + 1) % LATE_MINUTES] = 0
+        self.hi += k
+        self.lo = max(self.lo, self.hi - self.capacity)
+
+    def _add_coins(self, coins: list[str]) -> None:
+        if not coins:
+            return
+        n = len(self.coins) + len(coins)
+        width = self.values.shape[1]
+        if n > width:
+            # Coins grow by doubling, whole bytes of the bitmask at a time
+            width = max(8, 2 * width, -(-n // 8) * 8)
+            values = np.full((len(self.minutes), width), np.nan, dtype=self.dtype)
+            valid = np.zeros((len(self.minutes), width // 8), dtype=np.uint8)
+            counts = np.zeros((LATE_MINUTES, width), dtype=np.uint32)
+            values[:, :self.values.shape[1]] = self.values
+            valid[:, :self.valid.shape[1]] = self.valid
+            counts[:, :self.counts.shape[1]] = self.counts
+            self.values, self.valid, self.counts = values, valid, counts
+        for coin in coins:
+            self.columns[coin] = len(self.coins)
+            self.coins.append(coin)
+
+    # === Views ===
+
+    def _rows(self, start=None, end=None) -> tuple[int, int]:
+        # Live rows of the minutes in [start, end], timestamps inclusive like series[start:end]
+        if not len(self):
+            return 0, 0
+        first = int(self.minutes[self.lo])
+        m0, m1 = _minute(start, ceil=True), _minute(end)
+        i0 = self.lo if m0 is None else min(max(self.lo, self.lo + m0 - first), self.hi)
+        i1 = self.hi if m1 is None else min(max(self.lo, self.lo + m1 - first + 1), self.hi)
+        return i0, max(i0, i1)
+
+    def axis(self, start=None, end=None) -> np.ndarray:
+        """
+        View of the minutes (since the epoch) in [start, end].
+        """
+        i0, i1 = self._rows(start, end)
+        return self.minutes[i0:i1]
+
+    def window(self, coin: str, start=None, end=None) -> np.ndarray:
+        """
+        View of one coin's prices in [start, end], NaN where invalid.
+        """
+        i0, i1 = self._rows(start, end)
+        return self.values[i0:i1, self.columns[coin]]
+
+    def frame(self, start=None, end=None) -> np.ndarray:
+        """
+        View of the (minute, coin) prices in [start, end], columns in
+        `coins` order, NaN where invalid.
+        """
+        i0, i1 = self._rows(start, end)
+        return self.values[i0:i1, :len(self.coins)]
+
+    def mask(self, coin: str, start=None, end=None) -> np.ndarray:
+        """
+        Validity of one coin's minutes in [start, end].
+        """
+        i0, i1 = self._rows(start, end)
+        col = self.columns[coin]
+        return (self.valid[i0:i1, col >> 3] >> (col & 7)) & 1 == 1
+
+    # === Adapters ===
+
+    def _filled(self, col: int, i0: int, i1: int) -> tuple[int, np.ndarray] | None:
+        # (first row, values) from the coin's first to last valid row in
+        # [i0, i1), gaps interpolated from the nearest valid rows (also
+        # outside the window), as resample().mean().interpolate() fills them
+        valid = (self.valid[self.lo:self.hi, col >> 3] >> (col & 7)) & 1 == 1
+        inside = np.flatnonzero(valid[i0 - self.lo:i1 - self.lo]) + i0
+        if not len(inside):
+            return None
+        f0, f1 = int(inside[0]), int(inside[-1]) + 1
+        # Interior gaps, and leading ones with an earlier valid row to fill from
+        before = np.flatnonzero(valid[:i0 - self.lo])
+        if len(before) and f0 > i0:
+            f0 = i0
+        values = self.values[f0:f1, col]
+        if len(inside) == f1 - f0:
+            return f0, values
+
+        known = np.flatnonzero(valid) + self.lo
+        lo = int(before[-1]) + self.lo if f0 < inside[0] else f0
+        known = known[(known >= lo) & (known < f1)]
+        rows = np.arange(f0, f1)
+        return f0, np.interp(rows, known, self.values[known, col].astype(float))
+
+    def series(self, coin: str, start=None, end=None, name: str | None = None) -> pd.Series | None:
+        """
+        One coin's 1-minute series over [start, end], as the resampled
+        series the loaders return: from its first to last point in the
+        window, gaps interpolated. None if it has no points there.
+
+        Without gaps, a float64 ring hands out a view; otherwise (or for
+        float32, whose sums lose precision) a float64 copy of the window.
+        That makes it a direct input for predict_next, predict_all and
+        backtest_one.
+        """
+        if coin not in self.columns:
+            return None
+        i0, i1 = self._rows(start, end)
+        filled = self._filled(self.columns[coin], i0, i1)
+        if filled is None:
+            return None
+        f0, values = filled
+        index = pd.date_range(pd.Timestamp(int(self.minutes[f0]) * MINUTE_NS), periods=len(values),
+                              freq="1min", name="timestamp")
+        return pd.Series(values.astype(float, copy=False), index=index, name=name, copy=False)
+
+    def series_dict(self, start=None, end=None, coins: list[str] | None = None) -> dict[str, pd.Series]:
+        """
+        `series` for every coin with points in [start, end].
+        """
+        result = {}
+        for coin in (self.coins if coins is None else coins):
+            series = self.series(coin, start, end)
+            if series is not None:
+                result[coin] = series
+        return result
+
+    def matrix(self, start=None, end=None) -> pd.DataFrame:
+        """
+        Time-by-coin frame over [start, end], as price_matrix lays out the
+        `series_dict`: gaps interpolated, NaN outside each coin's points.
+        A view when the ring is float64 and nothing needs filling. Goes
+        straight into predict_matrix.
+        """
+        i0, i1 = self._rows(start, end)
+        values = self.frame(start, end)
+        bits = np.unpackbits(self.valid[i0:i1], axis=1, count=len(self.coins), bitorder="little")
+        filled = np.flatnonzero(~bits.all(axis=0).astype(bool))
+        if len(filled) or self.dtype != np.float64:
+            values = values.astype(float)
+            for j in filled:
+                values[:, j] = np.nan
+                result = self._filled(j, i0, i1)
+                if result is not None:
+                    f0, column = result
+                    values[f0 - i0:f0 - i0 + len(column), j] = column
+        index = pd.date_range(pd.Timestamp(int(self.minutes[i0]) * MINUTE_NS) if i1 > i0 else pd.Timestamp(0),
+                              periods=i1 - i0, freq="1min", name="timestamp")
+        return pd.DataFrame(values, index=index, columns=list(self.coins), copy=False)
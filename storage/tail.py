@@ -0,0 +1,174 @@
+# storage/tail.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from instrument import count, stage
+from storage.loader import LOGFILE, jsonl_latest_timestamp, open_partitions
+from storage.price_store import records_to_columns
+from storage.ring import PriceRing
+
+# Minutes kept before the window start, so the first visible minute can
+# still be interpolated from a point before it.
+RAW_MARGIN = timedelta(minutes=10)
+
+def _line_timestamp(line: bytes) -> pd.Timestamp | None:
+    try:
+        return pd.Timestamp(json.loads(line)["timestamp"])
+    except (ValueError, KeyError):
+        return None
+
+def seek_timestamp(path: str, target) -> int:
+    """
+    Byte offset of the first line whose timestamp is >= target.
+    Binary search over the file, so only O(log n) lines are parsed.
+    """
+    target = pd.Timestamp(target)
+
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+
+        def line_start(pos: int) -> int:
+            if pos == 0:
+                return 0
+            f.seek(pos - 1)
+            f.readline()
+            return f.tell()
+
+        def at_or_after(pos: int) -> bool:
+            f.seek(line_start(pos))
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                return True  # EOF or a line still being written
+            ts = _line_timestamp(line)
+            return ts is None or ts >= target
+
+        lo, hi = 0, size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if at_or_after(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+
+        return line_start(lo)
+
+class JsonlTail:
+    """
+    Tail-following reader for the JSONL price log.
+
+    Remembers its byte offset and only parses lines appended since the last
+    poll. If the log has been replaced by a daily-partitioned one, follows
+    that instead, moving on to each new day's partition as it appears.
+    Keeps the last `hours` of 1-minute means of every coin in a PriceRing,
+    so new points only touch their own minute and windows come out as the
+    resampled series the loaders return.
+    """
+
+    def __init__(self, path: str = LOGFILE, hours: float = 3, coins: list[str] | None = None, dtype=np.float32):
+        self.path = path
+        self.window = timedelta(hours=hours)
+        self.coins = set(coins) if coins is not None else None
+        self.dtype = dtype
+        self.capacity = int((self.window + RAW_MARGIN) // timedelta(minutes=1)) + 1
+        self._reset()
+
+    def _reset(self):
+        self.offset = None
+        self.latest_timestamp: pd.Timestamp | None = None
+        self._ring = PriceRing(self.capacity, dtype=self.dtype)
+
+    def poll(self) -> int:
+        """
+        Read newly appended records. Returns how many were ingested.
+        """
+        with stage("tail.read"):
+            records = self.read()
+        if records:
+            with stage("tail.ingest"):
+                self._ingest(records)
+        return len(records)
+
+    def read(self) -> list[dict]:
+        """
+        Parse and return the records appended since the last read, without
+        ingesting them. The first read starts `hours` before the latest record.
+        """
+        partitions = open_partitions(self.path)
+        if partitions is not None:
+            return self._read_partitions(partitions)
+
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return []
+
+        if self.offset is not None and size < self.offset:
+            self._reset()  # log was truncated or rotated
+
+        if self.offset is None:
+            latest = jsonl_latest_timestamp(self.path)
+            if latest is None:
+                return []
+            self.offset = seek_timestamp(self.path, latest - self.window - RAW_MARGIN)
+
+        if size <= self.offset:
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+
+        # Leave a partially written last line for the next read
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return []
+        self.offset += end + 1
+
+        records = [json.loads(line) for line in chunk[:end + 1].splitlines() if line.strip()]
+        count("tail.records", len(records))
+        return records
+
+    def _read_partitions(self, partitions) -> list[dict]:
+        # Offset is a (day, byte offset) position in the partitioned log
+        if not isinstance(self.offset, tuple):
+            self._reset()
+        else:
+            day, offset = self.offset
+            path = partitions.log_path(day)
+            if not os.path.exists(path) or os.path.getsize(path) < offset:
+                self._reset()  # partition was removed or rewritten
+
+        if self.offset is None:
+            latest = partitions.latest_timestamp()
+            if latest is None:
+                return []
+            self.offset = partitions.seek(latest - self.window - RAW_MARGIN)
+
+        records, self.offset = partitions.read_from(self.offset)
+        count("tail.records", len(records))
+        return records
+
+    def _ingest(self, records: list[dict]):
+        timestamps = pd.to_datetime([r["timestamp"] for r in records], format="ISO8601")
+        columns = records_to_columns(records)
+        if self.coins is not None:
+            columns = {coin: values for coin, values in columns.items() if coin in self.coins}
+
+        newest = timestamps.max()
+        if self.latest_timestamp is None or newest > self.latest_timestamp:
+            self.latest_timestamp = newest
+
+        self._ring.extend(timestamps.asi8, columns)
+
+    def series_dict(self) -> dict[str, pd.Series]:
+        """
+        1-minute resampled series per coin over the last `hours` of data.
+        """
+        if self.latest_timestamp is None:
+            return {}
+
+        start = self.latest_timestamp - self.window
+        return self._ring.series_dict(start, self.latest_timestamp)
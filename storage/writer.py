@@ -0,0 +1,58 @@
+# storage/writer.py
+
+import json
+import time
+from instrument import stage
+from storage.loader import LOGFILE
+from storage.partitioned import PartitionedLog
+from storage.price_store import PriceStore
+
+class BufferedLogWriter:
+    """
+    Collects scan records in memory and appends them to the JSONL log (or
+    the daily-partitioned log, if given) and the columnar store, if given,
+    with one write per flush instead of one open/close per record.
+    """
+
+    def __init__(self, logfile: str = LOGFILE, store: PriceStore | None = None, flush_interval: float = 60.0,
+                 partitions: PartitionedLog | None = None):
+        self.logfile = logfile
+        self.store = store
+        self.partitions = partitions
+        self.flush_interval = flush_interval
+        self.buffer: list[dict] = []
+        self._last_flush = time.monotonic()
+
+    def write(self, record: dict) -> None:
+        self.buffer.append(record)
+        self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        if time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self.buffer:
+            return
+
+        records, self.buffer = self.buffer, []
+        with stage("writer.jsonl"):
+            if self.partitions is not None:
+                try:
+                    self.partitions.append_records(records)
+                except ValueError as e:
+                    print(f"[WARN] Skipped log append: {e}")
+            else:
+                with open(self.logfile, "a") as f:
+                    f.write("".join(json.dumps(r) + "\n" for r in records))
+
+        if self.store is not None:
+            with stage("writer.store"):
+                try:
+                    self.store.append_records(records)
+                except ValueError as e:
+                    print(f"[WARN] Skipped store append: {e}")
+
+    def close(self) -> None:
+        self.flush()
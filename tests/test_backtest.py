@@ -0,0 +1,69 @@
+# tests/test_backtest.py
+
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from eval.backtest import RESULT_COLUMNS, BacktestContext, RunningScore, backtest_batch, backtest_one
+from eval.tune import walk_forward
+
+METHODS = ["last", "mean", "linear", "momentum_wave", "ensemble"]
+
+@pytest.fixture(scope="module")
+def series() -> pd.Series:
+    # Two days of a 1-minute random walk, long enough for 1d horizons
+    rng = np.random.default_rng(7)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, 2 * 1440 + 200)))
+    index = pd.date_range("2026-01-01", periods=len(prices), freq="1min", name="timestamp")
+    return pd.Series(prices, index=index, name="bitcoin")
+
+@pytest.mark.parametrize("horizon", ["1h", "1d"])
+@pytest.mark.parametrize("method", METHODS)
+def test_batch_matches_loop(series, method, horizon):
+    loop = backtest_one(series, horizon=horizon, method=method, step_minutes=10, lookback_minutes=60)
+    batch = backtest_batch(series, horizon=horizon, method=method, step_minutes=10, lookback_minutes=60)
+
+    assert len(loop) > 0
+    assert len(batch) == len(loop)
+    assert (pd.DatetimeIndex(batch["timestamp"]) == pd.DatetimeIndex(loop["timestamp"])).all()
+    for column in ["predicted", "actual", "error"]:
+        np.testing.assert_allclose(batch[column].to_numpy(dtype=float), loop[column].to_numpy(dtype=float),
+                                   rtol=0, atol=1e-12)
+    np.testing.assert_array_equal(batch["hit"].to_numpy(), loop["hit"].to_numpy())
+
+def test_batch_schema(series):
+    batch = backtest_batch(series, horizon="1h", method="linear")
+    assert list(batch.columns[:len(RESULT_COLUMNS)]) == RESULT_COLUMNS
+
+def test_running_score_matches_one_pass():
+    rng = np.random.default_rng(3)
+    predicted, actual = rng.normal(0, 1e-2, 1000), rng.normal(0, 1e-2, 1000)
+    score = RunningScore()
+    for chunk in np.array_split(np.arange(1000), 7):
+        score.add(predicted[chunk], actual[chunk])
+    assert score.points == 1000
+    assert score.mae == math.fsum(np.abs(predicted - actual)) / 1000
+    assert score.hit_rate == (np.sign(predicted) == np.sign(actual)).mean()
+
+@pytest.mark.parametrize("bad", [np.nan, np.inf, -np.inf])
+def test_running_score_skips_non_finite_errors(bad):
+    score = RunningScore()
+    score.add(np.array([0.01, bad, -0.02]), np.array([0.02, 0.01, -0.01]))
+    score.add(np.array([bad]), np.array([0.0]))
+    assert score.points == 4
+    assert score.mae == pytest.approx(0.01)
+
+def test_score_from_first_matches_frame(series):
+    ctx = BacktestContext(series)
+    first = series.index[1500]
+    frame = ctx.backtest(horizon="1h", method="mean", step_minutes=10, lookback_minutes=60)
+    frame = frame[frame["timestamp"] >= first]
+
+    points, mae, hit_rate = ctx.score(horizon="1h", method="mean", step_minutes=10, lookback_minutes=60, first=first)
+    assert points == len(frame)
+    assert mae == pytest.approx(frame["error"].abs().mean())
+    assert hit_rate == pytest.approx(frame["hit"].mean())
+
+def test_walk_forward_rejects_test_windows_within_horizon(series):
+    with pytest.raises(ValueError, match="test windows"):
+        walk_forward(series, horizon="1d", train_hours=48, test_hours=24)
@@ -0,0 +1,88 @@
+# tests/test_baseline.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from model.baseline import HORIZON_MINUTES, predict_all, predict_matrix, predict_next, price_matrix
+
+HORIZONS = ["1h", "1d"]
+METHODS = ["last", "mean", "linear", "momentum_wave"]
+
+def random_series(freq: str = "1min", seed: int = 0) -> dict[str, pd.Series]:
+    # Coins starting and stopping at different points of one grid, one too
+    # short for any window, one shorter than the 1h window and one empty
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2026-01-01", periods=int(pd.Timedelta("2d") / pd.Timedelta(freq)), freq=freq,
+                          name="timestamp")
+    n = len(index)
+
+    def walk(i0: int, i1: int) -> pd.Series:
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, i1 - i0)))
+        return pd.Series(prices, index=index[i0:i1])
+
+    return {
+        "bitcoin": walk(0, n),
+        "ethereum": walk(n // 3, n),
+        "solana": walk(0, n - 97),
+        "dogecoin": walk(n // 2, n - n // 5),
+        "pepe": walk(n - 30 // (int(pd.Timedelta(freq).total_seconds()) // 60), n),
+        "single": walk(n - 1, n),
+        "empty": pd.Series([], dtype=float, index=pd.DatetimeIndex([])),
+    }
+
+@pytest.mark.parametrize("freq", ["1min", "5min"])
+def test_matrix_matches_predict_next(freq):
+    series_dict = random_series(freq)
+    table = predict_matrix(price_matrix(series_dict), HORIZONS, METHODS)
+    assert sorted(table.index) == sorted(coin for coin, s in series_dict.items() if not s.empty)
+    for coin in table.index:
+        series = series_dict[coin].asfreq(freq)
+        for method in METHODS:
+            for horizon in HORIZONS:
+                want = predict_next(series, horizon=horizon, method=method)
+                assert table.loc[coin, (method, horizon)] == pytest.approx(want, rel=1e-9, abs=1e-12)
+
+def test_matrix_drops_missing_points_from_the_window():
+    series_dict = random_series(seed=1)
+    prices = price_matrix(series_dict)
+    rng = np.random.default_rng(1)
+    prices = prices.mask((rng.random(prices.shape) < 0.2) & (np.arange(len(prices)) < len(prices) - 40)[:, None])
+    table = predict_matrix(prices, HORIZONS, ["mean", "linear"])
+
+    for coin in table.index:
+        column = prices[coin].to_numpy()
+        end = np.flatnonzero(~np.isnan(column))[-1]
+        for horizon in HORIZONS:
+            window = column[max(0, end + 1 - HORIZON_MINUTES[horizon]):end + 1]
+            x = np.arange(1 - len(window), 1)[~np.isnan(window)]
+            y = window[~np.isnan(window)]
+            if len(y) < 2:
+                assert table.loc[coin, ("linear", horizon)] == 0
+                continue
+            slope, intercept = np.polyfit(x, y, 1)
+            assert table.loc[coin, ("mean", horizon)] == pytest.approx((y.mean() - y[-1]) / y[-1], rel=1e-9)
+            assert table.loc[coin, ("linear", horizon)] == pytest.approx((slope + intercept - y[-1]) / y[-1],
+                                                                         rel=1e-6, abs=1e-12)
+
+def test_predict_all_per_coin_configs():
+    series_dict = random_series(seed=2)
+    configs = {
+        "bitcoin": {"method": "mean", "lookback": 45},
+        "ethereum": {"method": "linear", "lookback": 20, "distance": 5},
+        "dogecoin": {"method": "last"},
+    }
+    predictions = predict_all(series_dict, horizon="1h", method="linear", configs=configs)
+    assert sorted(predictions) == sorted(coin for coin, s in series_dict.items() if not s.empty)
+    for coin, predicted in predictions.items():
+        config = configs.get(coin, {})
+        series = series_dict[coin].asfreq("1min")
+        if config.get("lookback") and len(series) > 2:
+            series = series.iloc[-config["lookback"]:]
+        want = predict_next(series, horizon="1h", method=config.get("method", "linear"))
+        assert predicted == pytest.approx(want, rel=1e-9, abs=1e-12)
+
+def test_price_matrix_rejects_mixed_grids():
+    series_dict = random_series()
+    series_dict["hourly"] = series_dict["bitcoin"].resample("1h").mean()
+    with pytest.raises(ValueError):
+        price_matrix(series_dict)
@@ -0,0 +1,112 @@
+# tests/test_coverage.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from bench.synthetic import generate_log
+from model.data_health import fill_rates, gap_index
+from storage.coverage import MINUTE_NS, Coverage, coverage_dict
+from storage.resample import JsonlSource, ResampleCache
+
+START = pd.Timestamp("2026-01-01").value // MINUTE_NS
+
+def random_points(seed: int, minutes: int = 2000) -> tuple[np.ndarray, np.ndarray]:
+    # A few points in most minutes, whole stretches missing, some NaN prices
+    rng = np.random.default_rng(seed)
+    present = rng.random(minutes) < 0.7
+    present[rng.integers(0, minutes - 40, 5)[:, None] + np.arange(40)] = False
+    minutes = START + np.repeat(np.flatnonzero(present), rng.integers(1, 4, present.sum()))
+    ts = minutes * MINUTE_NS + rng.integers(0, MINUTE_NS, len(minutes))
+    ts.sort()
+    values = np.where(rng.random(len(ts)) < 0.1, np.nan, 1.0)
+    return ts, values
+
+def brute_force(ts: np.ndarray, values: np.ndarray) -> tuple[int, int, int, list, list]:
+    minutes = np.unique(ts[~np.isnan(values)] // MINUTE_NS)
+    missing = np.setdiff1d(np.arange(minutes[0], minutes[-1] + 1), minutes)
+    breaks = np.flatnonzero(np.diff(missing) > 1)
+    starts = np.r_[missing[:1], missing[breaks + 1]] if len(missing) else missing
+    ends = np.r_[missing[breaks], missing[-1:]] + 1 if len(missing) else missing
+    return int(minutes[0]), int(minutes[-1]), len(minutes), starts.tolist(), ends.tolist()
+
+def summary(coverage: Coverage) -> tuple[int, int, int, list, list]:
+    starts, ends = coverage.gaps()
+    return coverage.first, coverage.last, coverage.present, starts.tolist(), ends.tolist()
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batches_match_brute_force(seed):
+    ts, values = random_points(seed)
+    coverage = Coverage()
+    rng = np.random.default_rng(seed)
+    cuts = np.sort(rng.integers(0, len(ts), 30))
+    for chunk in np.split(np.arange(len(ts)), cuts):
+        assert coverage.extend(ts[chunk], values[chunk])
+    assert summary(coverage) == brute_force(ts, values)
+
+def test_repeated_last_minute_counts_once():
+    coverage = Coverage()
+    minute = START * MINUTE_NS
+    assert coverage.extend(np.array([minute, minute + 10**9]), np.array([1.0, 1.0]))
+    assert coverage.extend(np.array([minute + 2 * 10**9]), np.array([1.0]))          # same minute again
+    assert coverage.extend(np.array([minute + 3 * MINUTE_NS]), np.array([1.0]))      # 2-minute gap
+    assert coverage.extend(np.array([minute + 3 * MINUTE_NS + 5]), np.array([1.0]))  # same minute again
+    assert summary(coverage) == (START, START + 3, 2, [START + 1], [START + 3])
+
+def test_older_points_are_rejected_unchanged():
+    ts, values = random_points(3, minutes=300)
+    coverage = Coverage()
+    assert coverage.extend(ts, values)
+    before = summary(coverage)
+    assert not coverage.extend(ts[:1], values[:1])
+    assert summary(coverage) == before
+
+def test_state_round_trip():
+    ts, values = random_points(4)
+    coverage = Coverage()
+    coverage.extend(ts[:len(ts) // 2], values[:len(ts) // 2])
+    restored = Coverage()
+    restored.restore({name: array.copy() for name, array in coverage.state().items()})
+    assert summary(restored) == summary(coverage)
+    restored.extend(ts[len(ts) // 2:], values[len(ts) // 2:])
+    assert summary(restored) == brute_force(ts, values)
+
+    empty = Coverage()
+    empty.restore(Coverage().state())
+    assert summary(empty) == (None, None, 0, [], [])
+
+def test_cache_round_trip_matches_from_scratch(tmp_path):
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    generate_log(log, days=1, gap_rate=0.01, drop_rate=0.05, seed=5)
+    lines = open(log).readlines()
+    with open(log, "w") as f:
+        f.writelines(lines[:len(lines) // 2])
+    cache_dir = str(tmp_path / "cache")
+    coverage_dict(ResampleCache(disk_dir=cache_dir), JsonlSource(log))
+    with open(log, "a") as f:
+        f.writelines(lines[len(lines) // 2:])
+
+    # A new process: restored from disk, then synced with the appended half
+    synced = coverage_dict(ResampleCache(disk_dir=cache_dir), JsonlSource(log))
+    scratch = coverage_dict(ResampleCache(), JsonlSource(log))
+    assert {coin: summary(c) for coin, c in synced.items()} == {coin: summary(c) for coin, c in scratch.items()}
+
+def test_fill_rates_and_gaps_match_brute_force():
+    ts, values = random_points(6)
+    coverage = Coverage()
+    coverage.extend(ts, values)
+    minutes = set((ts[~np.isnan(values)] // MINUTE_NS).tolist())
+    end = pd.Timestamp((START + 1800) * MINUTE_NS)
+    stop = START + 1801
+
+    rates = fill_rates({"a": coverage}, ["1h", "24h", None], end=end).loc["a"]
+    for window, length in (("1h", 60), ("24h", 1440)):
+        assert rates[window] == pytest.approx(sum(m in minutes for m in range(stop - length, stop)) / length)
+    assert rates["None"] == pytest.approx(sum(m in minutes for m in range(coverage.first, stop)) / (stop - coverage.first))
+
+    gaps = gap_index({"a": coverage}, "24h", end=end)
+    missing = [m for m in range(stop - 1440, stop) if m not in minutes]
+    assert int(gaps["minutes"].sum()) == len(missing)
+    for row in gaps.itertuples():
+        first, last = row.start.value // MINUTE_NS, row.end.value // MINUTE_NS
+        assert all(m not in minutes for m in range(first, last))
+        assert first - 1 in minutes or first == stop - 1440
@@ -0,0 +1,85 @@
+# tests/test_echo.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from model.echo import cross_correlation, echo_matrix, echo_ranking, lead_lag, returns_frame, top_pairs
+
+COINS = ["bitcoin", "ethereum", "solana", "dogecoin", "flatcoin"]
+
+def random_returns(seed: int, minutes: int = 600) -> pd.DataFrame:
+    # ethereum follows bitcoin 3 minutes later; solana is amplified bitcoin;
+    # holes of NaN everywhere and a coin that never moves
+    rng = np.random.default_rng(seed)
+    base = rng.normal(0, 1, minutes + 3)
+    returns = pd.DataFrame({
+        "bitcoin": base[3:],
+        "ethereum": base[:-3] + rng.normal(0, 0.2, minutes),
+        "solana": 2.5 * base[3:] + rng.normal(0, 0.5, minutes),
+        "dogecoin": rng.normal(0, 1, minutes),
+        "flatcoin": np.zeros(minutes),
+    }, index=pd.date_range("2026-01-01", periods=minutes, freq="1min"))
+    return returns.mask(rng.random(returns.shape) < 0.1)
+
+def pair_stats(ref: pd.Series, alt: pd.Series) -> tuple[float, float]:
+    # The per-pair loop the chart used before the matrix version
+    combined = pd.DataFrame({"ref": ref, "alt": alt}).dropna()
+    same = (combined["ref"] * combined["alt"]) > 0
+    agreement = same.sum() / len(combined)
+    ref_std = combined["ref"][same].std()
+    alt_std = combined["alt"][same].std()
+    return agreement, (alt_std / ref_std) if ref_std > 0 else 0
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_echo_matrix_matches_pair_loop(seed):
+    returns = random_returns(seed)
+    echo = echo_matrix(returns)
+    for ref in COINS:
+        for alt in COINS:
+            agreement, amplification = pair_stats(returns[ref], returns[alt])
+            if ref == "flatcoin" or alt == "flatcoin":
+                assert echo["agreement"].loc[ref, alt] == 0
+                continue
+            assert echo["agreement"].loc[ref, alt] == pytest.approx(agreement, rel=1e-12)
+            assert echo["amplification"].loc[ref, alt] == pytest.approx(amplification, rel=1e-9)
+            assert echo["score"].loc[ref, alt] == pytest.approx(agreement * amplification, rel=1e-9)
+
+def test_cross_correlation_matches_shifted_dot_products():
+    returns = random_returns(2, minutes=200)
+    lags, corr = cross_correlation(returns, max_lag=12)
+    x = (returns - returns.mean()).fillna(0).to_numpy()
+    norms = np.sqrt((x * x).sum(axis=0))
+    n = len(x)
+    for k, lag in enumerate(lags):
+        for i in range(4):  # flatcoin has no variance to normalize by
+            for j in range(4):
+                a, b = (x[:n - lag, i], x[lag:, j]) if lag >= 0 else (x[-lag:, i], x[:n + lag, j])
+                assert corr[k, i, j] == pytest.approx(a @ b / (norms[i] * norms[j]), abs=1e-12)
+
+def test_lead_lag_finds_the_echo():
+    lag, lag_corr = lead_lag(random_returns(3), max_lag=10)
+    assert lag.loc["bitcoin", "ethereum"] == 3
+    assert lag.loc["ethereum", "bitcoin"] == -3
+    assert lag.loc["bitcoin", "solana"] == 0
+    assert lag_corr.loc["bitcoin", "ethereum"] > 0.8
+    assert abs(lag_corr.loc["bitcoin", "dogecoin"]) < 0.3
+
+def test_ranking_from_raw_price_slices_is_finite():
+    # The chart passes price slices as logged; coins start at different minutes
+    returns = random_returns(4).fillna(0)
+    prices = (100 + returns.cumsum()).mask(returns.isna())
+    series_dict = {coin: prices[coin].iloc[10 * i:] for i, coin in enumerate(COINS[:4])}
+
+    ranking = echo_ranking(returns_frame(series_dict), reference="bitcoin", max_lag=10)
+    assert list(ranking["coin"]) == ["solana", "ethereum", "dogecoin"]
+    assert np.isfinite(ranking[["agreement", "amplification", "score", "lag_corr"]].to_numpy()).all()
+    assert ranking.loc[ranking["coin"] == "ethereum", "lag"].item() == 3
+
+def test_top_pairs_skips_the_diagonal():
+    score = echo_matrix(random_returns(5))["score"]
+    pairs = top_pairs(score, top=6)
+    assert len(pairs) == 6
+    assert (pairs["reference"] != pairs["coin"]).all()
+    assert pairs["score"].is_monotonic_decreasing
+    off_diagonal = score.to_numpy()[~np.eye(len(score), dtype=bool)]
+    assert pairs["score"].iloc[0] == np.nanmax(off_diagonal)
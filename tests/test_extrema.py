@@ -0,0 +1,90 @@
+# tests/test_extrema.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.signal import find_peaks
+from model.extrema import ExtremaDetector
+from model.frequency import CycleTracker, estimate_cycle_frequency, predict_next_trend_shift
+
+def random_walk(seed: int, n: int = 600, plateaus: bool = False) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0, 1, n)
+    if plateaus:
+        # Runs of equal values, which find_peaks treats as flat peaks. Distinct
+        # runs keep distinct heights: find_peaks orders equal-height peaks with
+        # an unstable argsort, so which of two tied peaks it keeps is undefined.
+        steps[rng.random(n) < 0.4] = 0
+    return np.cumsum(steps)
+
+def scipy_extrema(x: np.ndarray, distance: float, start: int = 0) -> tuple[list[int], list[int]]:
+    peaks, _ = find_peaks(x[start:], distance=distance)
+    valleys, _ = find_peaks(-x[start:], distance=distance)
+    return (peaks + start).tolist(), (valleys + start).tolist()
+
+@pytest.mark.parametrize("plateaus", [False, True])
+@pytest.mark.parametrize("distance", [1, 3, 10, 25.5])
+@pytest.mark.parametrize("seed", range(3))
+def test_matches_find_peaks_after_every_append(seed, distance, plateaus):
+    x = random_walk(seed, plateaus=plateaus)
+    detector = ExtremaDetector(distance=distance)
+    for n, value in enumerate(x, start=1):
+        detector.append(value)
+        assert (detector.peak_positions(), detector.valley_positions()) == scipy_extrema(x[:n], distance)
+
+@pytest.mark.parametrize("plateaus", [False, True])
+@pytest.mark.parametrize("window", [5, 40, 150])
+@pytest.mark.parametrize("seed", range(3))
+def test_window_matches_find_peaks_on_slice(seed, window, plateaus):
+    x = random_walk(seed, plateaus=plateaus)
+    detector = ExtremaDetector(distance=10, window=window)
+    for n, value in enumerate(x, start=1):
+        detector.append(value)
+        assert detector.start == max(0, n - window)
+        assert (detector.peak_positions(), detector.valley_positions()) == \
+            scipy_extrema(x[:n], 10, start=detector.start)
+
+@pytest.mark.parametrize("window", [None, 60])
+@pytest.mark.parametrize("seed", range(3))
+def test_provisional_samples_roll_back(seed, window):
+    x = random_walk(seed, plateaus=True)
+    rng = np.random.default_rng(seed + 100)
+    detector = ExtremaDetector(distance=10, window=window)
+    for n, value in enumerate(x, start=1):
+        # A few provisional values for this sample, as an open minute bucket would see
+        for _ in range(rng.integers(0, 4)):
+            detector.rollback()
+            guess = value + rng.normal(0, 2)
+            detector.append(guess, provisional=True)
+            assert (detector.peak_positions(), detector.valley_positions()) == \
+                scipy_extrema(np.append(x[:n - 1], guess), 10, start=detector.start)
+        detector.rollback()
+        assert detector.count == n - 1
+        assert (detector.peak_positions(), detector.valley_positions()) == \
+            scipy_extrema(x[:n - 1], 10, start=detector.start)
+        detector.append(value)
+
+def test_final_append_requires_rollback():
+    detector = ExtremaDetector(distance=3)
+    detector.append(1.0)
+    detector.append(2.0, provisional=True)
+    with pytest.raises(ValueError):
+        detector.append(3.0)
+
+def test_cycle_tracker_matches_batch_functions():
+    x = 100 + random_walk(5, n=400)
+    index = pd.date_range("2026-01-01", periods=len(x), freq="1min")
+    series = pd.Series(x, index=index)
+    tracker = CycleTracker(distance=10)
+    for n in range(20, len(x) + 1, 17):
+        tracker.extend(series.iloc[:n])
+        expected = estimate_cycle_frequency(series.iloc[:n], distance=10)
+        info = tracker.cycle_info()
+        assert info["last_peak"] == expected["last_peak"]
+        assert info["last_valley"] == expected["last_valley"]
+        for key in ("peak_period", "valley_period"):
+            if expected[key] is None:
+                assert info[key] is None
+            else:
+                assert info[key] == pytest.approx(expected[key])
+        assert tracker.next_trend_shift() == predict_next_trend_shift(series.iloc[:n], distance=10)
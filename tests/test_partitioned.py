@@ -0,0 +1,110 @@
+# tests/test_partitioned.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from bench.synthetic import generate_log
+from storage.loader import partitions_path_for
+from storage.partitioned import INDEX_STRIDE, PartitionedLog, convert_partitions, split_jsonl
+from storage.price_store import PriceStore, convert_jsonl
+
+@pytest.fixture
+def log(tmp_path) -> str:
+    path = str(tmp_path / "crypto_prices_log.jsonl")
+    generate_log(path, days=2.5, gap_rate=0.003, drop_rate=0.05, seed=8)
+    return path
+
+@pytest.fixture
+def partitions(log) -> PartitionedLog:
+    split_jsonl(log, partitions_path_for(log), chunk_lines=700)
+    return PartitionedLog(partitions_path_for(log))
+
+def read_log(path: str) -> tuple[list[dict], pd.DatetimeIndex]:
+    records = [json.loads(line) for line in open(path)]
+    return records, pd.to_datetime([r["timestamp"] for r in records], format="ISO8601")
+
+def test_split_keeps_every_record_by_day(log, partitions):
+    records, ts = read_log(log)
+    assert partitions.partitions() == sorted(set(ts.strftime("%Y-%m-%d")))
+    assert partitions.read_records() == records
+    assert partitions.latest_timestamp() == ts[-1]
+    assert split_jsonl(log, partitions.path) == 0  # Nothing new
+
+    for day in partitions.partitions():
+        index = partitions.index(day)
+        size = os.path.getsize(partitions.log_path(day))
+        assert len(index) and index[0, 1] == 0
+        assert (np.diff(index[:, 0]) > 0).all()
+        assert (np.diff(index[:, 1]) >= INDEX_STRIDE).all() and size - index[-1, 1] < 2 * INDEX_STRIDE
+    assert max(len(partitions.index(day)) for day in partitions.partitions()) > 5
+
+def test_windows_match_a_scan(log, partitions):
+    records, ts = read_log(log)
+    rng = np.random.default_rng(0)
+    windows = [(None, None), (ts[0], ts[-1]), (ts[-1], None), (None, ts[0] - pd.Timedelta("1s"))]
+    for _ in range(30):
+        a, b = np.sort(rng.integers(ts[0].value - 10**11, ts[-1].value + 10**11, 2))
+        windows.append((pd.Timestamp(a), pd.Timestamp(b)))
+    # Bounds exactly on indexed records, where the byte range is cut
+    indexed = [pd.Timestamp(t) for day in partitions.partitions() for t in partitions.index(day)[1:4, 0]]
+    windows += [(t, None) for t in indexed] + [(ts[0], t) for t in indexed]
+    for start, end in windows:
+        keep = np.ones(len(ts), dtype=bool)
+        if start is not None:
+            keep &= ts >= start
+        if end is not None:
+            keep &= ts <= end
+        assert partitions.read_records(start, end) == [r for r, k in zip(records, keep) if k]
+
+def test_seek_lands_within_one_stride(log, partitions):
+    records, ts = read_log(log)
+    for target in [ts[0] - pd.Timedelta("1d"), ts[-1] + pd.Timedelta("1d"), *ts[::211], ts[700] + pd.Timedelta("1s")]:
+        day, offset = partitions.seek(target)
+        got, _ = partitions.read_from((day, offset))
+        want = [r for r, t in zip(records, ts) if t >= target]
+        # Reading from the position gives every record from the target on,
+        # plus at most one stride of earlier ones from the same day
+        assert got[len(got) - len(want):] == want
+        skipped = got[:len(got) - len(want)]
+        assert all(r["timestamp"].startswith(day) for r in skipped)
+        assert sum(len(json.dumps(r)) + 1 for r in skipped) <= INDEX_STRIDE
+
+def test_append_records_matches_split(log, tmp_path):
+    records, _ = read_log(log)
+    appended = PartitionedLog(str(tmp_path / "appended.days"), create=True)
+    for i in range(0, len(records), 333):
+        appended.append_records(records[i:i + 333])
+    split = PartitionedLog(str(tmp_path / "split.days"), create=True)
+    split_jsonl(log, split.path)
+    for day in split.partitions():
+        np.testing.assert_array_equal(appended.index(day), split.index(day))
+        assert open(appended.log_path(day), "rb").read() == open(split.log_path(day), "rb").read()
+
+    with pytest.raises(ValueError):
+        appended.append_records(records[-1:])  # Not after the newest record
+    with pytest.raises(ValueError):
+        PartitionedLog(appended.path).append_records([records[-1], records[-1]])  # Not increasing
+
+def test_torn_append_is_repaired(partitions):
+    day = partitions.partitions()[-1]
+    last = partitions.latest_timestamp()
+    with open(partitions.log_path(day), "ab") as f:
+        f.write(b'{"timestamp": "')
+    with open(partitions.index_path(day), "ab") as f:
+        f.write(b"\x01\x02\x03")
+    assert partitions.latest_timestamp() == last
+
+    record = {"timestamp": (last + pd.Timedelta("1min")).isoformat(), "prices": {"bitcoin": {"usd": 1.0}}}
+    partitions.append_records([record])
+    assert PartitionedLog(partitions.path).read_records(start=last)[-1] == record
+    assert os.path.getsize(partitions.index_path(day)) % 16 == 0
+
+def test_convert_partitions_matches_convert_jsonl(log, partitions, tmp_path):
+    from_partitions, from_log = str(tmp_path / "a.store"), str(tmp_path / "b.store")
+    records, _ = read_log(log)
+    assert convert_partitions(partitions.path, from_partitions) == len(records)
+    assert convert_partitions(partitions.path, from_partitions) == 0
+    convert_jsonl(log, from_log)
+    pd.testing.assert_frame_equal(PriceStore(from_partitions).read(), PriceStore(from_log).read(), check_like=True)
@@ -0,0 +1,79 @@
+# tests/test_price_store.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from bench.synthetic import generate_log
+from storage.loader import load_dataframe
+from storage.price_store import PriceStore, convert_jsonl, records_to_arrays
+
+def test_records_to_arrays_sorts_and_fills_missing():
+    records = [
+        {"timestamp": "2026-01-01T00:02:00", "prices": {"eth": {"usd": 3.0}, "btc": {"usd": 2.0}}},
+        {"timestamp": "2026-01-01T00:00:00", "prices": {"btc": {"usd": 1.0}}},
+        {"timestamp": "2026-01-01T00:01:00", "prices": {"btc": {}, "doge": None}},
+    ]
+    ts, columns = records_to_arrays(records)
+
+    assert list(ts) == [pd.Timestamp(f"2026-01-01 00:0{i}:00").value for i in range(3)]
+    assert list(columns) == ["eth", "btc", "doge"]  # First appearance, as json_normalize orders them
+    np.testing.assert_array_equal(columns["btc"], [1.0, np.nan, 2.0])
+    np.testing.assert_array_equal(columns["eth"], [np.nan, np.nan, 3.0])
+    assert np.isnan(columns["doge"]).all()
+
+def test_records_to_arrays_empty():
+    ts, columns = records_to_arrays([])
+    assert ts.dtype == np.dtype("<i8") and not len(ts) and columns == {}
+
+@pytest.fixture
+def log(tmp_path) -> str:
+    path = str(tmp_path / "crypto_prices_log.jsonl")
+    generate_log(path, days=1, drop_rate=0.05, seed=2)
+    return path
+
+def test_converted_store_reads_like_the_log(log, tmp_path):
+    store_path = str(tmp_path / "prices.store")
+    lines = open(log).readlines()
+    with open(log, "w") as f:
+        f.writelines(lines[:-100])
+    assert convert_jsonl(log, store_path) == len(lines) - 100
+    assert convert_jsonl(log, store_path) == 0  # Nothing new
+    with open(log, "a") as f:
+        f.writelines(lines[-100:])
+    assert convert_jsonl(log, store_path) == 100
+
+    store = PriceStore(store_path)
+    end = store.last_timestamp()
+    for start in (None, end - pd.Timedelta(hours=3, seconds=20)):
+        want = load_dataframe(log, hours=None if start is None else 3, end=end)
+        want = want[want.index >= start] if start is not None else want
+        got = store.read(start=start, end=end)
+        pd.testing.assert_frame_equal(got, want, check_like=True, check_freq=False)
+
+def test_append_many_rules(tmp_path):
+    store = PriceStore(str(tmp_path / "s.store"), create=True)
+    store.append_many(np.array([1, 2]), {"btc": np.array([1.0, 2.0])})
+    with pytest.raises(ValueError):
+        store.append_many(np.array([2, 3]), {"btc": np.array([3.0, 4.0])})  # Not after the last row
+    with pytest.raises(ValueError):
+        store.append_many(np.array([5, 4]), {"btc": np.array([3.0, 4.0])})  # Not increasing
+
+    # A new coin is back-filled with NaN, a missing one gets NaN
+    store.append_many(np.array([3]), {"eth": np.array([9.0])})
+    store = PriceStore(store.path)
+    assert store.coins == ["btc", "eth"]
+    np.testing.assert_array_equal(store.column("btc"), [1.0, 2.0, np.nan])
+    np.testing.assert_array_equal(store.column("eth"), [np.nan, np.nan, 9.0])
+    assert store.locate(2, 3) == (1, 3)
+
+def test_torn_append_is_ignored_then_overwritten(tmp_path):
+    store = PriceStore(str(tmp_path / "s.store"), create=True)
+    store.append_many(np.array([1]), {"btc": np.array([1.0])})
+    # Columns written, timestamps not: the row does not exist yet
+    with open(store._column_path("btc"), "ab") as f:
+        np.array([99.0]).tofile(f)
+    assert len(store) == 1
+    np.testing.assert_array_equal(store.column("btc"), [1.0])
+
+    store.append_many(np.array([2]), {"btc": np.array([2.0])})
+    np.testing.assert_array_equal(store.column("btc"), [1.0, 2.0])
@@ -0,0 +1,120 @@
+# tests/test_pyramid.py
+
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from bench.synthetic import generate_log
+from storage.pyramid import LEVELS, MIN_WINDOW_BARS, Pyramid, check_resolution, pyramid_dict, resolution_for
+from storage.resample import JsonlSource, ResampleCache
+
+START = pd.Timestamp("2026-01-01")
+
+def random_points(seed: int, days: float = 3) -> pd.Series:
+    # Jittered points, whole hours missing, some NaN prices
+    rng = np.random.default_rng(seed)
+    seconds = np.sort(rng.integers(0, int(days * 86400), int(days * 1440 * 1.5)))
+    seconds = seconds[(seconds // 3600) % 17 != 5]
+    values = 100 + rng.normal(0, 1, len(seconds)).cumsum()
+    values[rng.random(len(values)) < 0.05] = np.nan
+    return pd.Series(values, index=START + pd.to_timedelta(seconds, unit="s"))
+
+def expected_bars(points: pd.Series, resolution: str) -> pd.DataFrame:
+    resampled = points.dropna().resample(resolution)
+    bars = resampled.ohlc()
+    bars["mean"] = resampled.mean()
+    bars["count"] = resampled.count()
+    return bars[bars["count"] > 0]
+
+def build(points: pd.Series, seed: int, pieces: int = 25) -> Pyramid:
+    pyramid = Pyramid()
+    ts, values = points.index.asi8, points.to_numpy()
+    cuts = np.sort(np.random.default_rng(seed).integers(0, len(ts), pieces))
+    for chunk in np.split(np.arange(len(ts)), cuts):
+        assert pyramid.extend(ts[chunk], values[chunk])
+    return pyramid
+
+def assert_bars(got: pd.DataFrame, want: pd.DataFrame) -> None:
+    np.testing.assert_array_equal(got.index, want.index)
+    for column in ("open", "high", "low", "close", "mean"):
+        np.testing.assert_allclose(got[column].to_numpy(), want[column].to_numpy(), rtol=1e-12)
+    np.testing.assert_array_equal(got["count"].to_numpy(), want["count"].to_numpy())
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_bars_match_resample_ohlc(seed):
+    points = random_points(seed)
+    pyramid = build(points, seed)
+    for resolution in LEVELS:
+        want = expected_bars(points, resolution)
+        assert_bars(pyramid.bars(resolution), want)
+
+        # Bars overlapping a window: the first may start before it
+        start, end = START + pd.Timedelta("1d 03:17:41"), START + pd.Timedelta("2d 11:02:09")
+        window = want[(want.index + pd.Timedelta(resolution) > start) & (want.index <= end)]
+        assert_bars(pyramid.bars(resolution, start, end), window)
+
+def test_series_matches_resample_mean_interpolate():
+    points = random_points(2)
+    pyramid = build(points, 2)
+    for resolution in LEVELS[:-1]:
+        want = points.dropna().resample(resolution).mean().interpolate()
+        got = pyramid.series(resolution)
+        np.testing.assert_array_equal(got.index, want.index)
+        np.testing.assert_allclose(got.to_numpy(), want.to_numpy(), rtol=1e-12)
+    assert pyramid.series("1h", START - pd.Timedelta("2d"), START - pd.Timedelta("1d")) is None
+
+def test_older_points_and_state_round_trip():
+    points = random_points(3, days=1)
+    half = len(points) // 2
+    pyramid = build(points[:half], 3)
+    assert not pyramid.extend(points.index.asi8[:1], points.to_numpy()[:1])
+
+    restored = Pyramid()
+    restored.restore({name: array.copy() for name, array in pyramid.state().items()})
+    restored.extend(points.index.asi8[half:], points.to_numpy()[half:])
+    for resolution in LEVELS:
+        assert_bars(restored.bars(resolution), expected_bars(points, resolution))
+
+def test_resolutions_must_nest():
+    with pytest.raises(ValueError):
+        Pyramid(("1min", "7min", "1h"))
+
+def test_cache_round_trip_matches_from_scratch(tmp_path):
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    generate_log(log, days=1.5, gap_rate=0.005, jitter_seconds=40, seed=7)
+    lines = open(log).readlines()
+    with open(log, "w") as f:
+        f.writelines(lines[:len(lines) // 2])
+    cache_dir = str(tmp_path / "cache")
+    pyramid_dict(ResampleCache(disk_dir=cache_dir), JsonlSource(log))
+    with open(log, "a") as f:
+        f.writelines(lines[len(lines) // 2:])
+
+    synced = pyramid_dict(ResampleCache(disk_dir=cache_dir), JsonlSource(log))
+    scratch = pyramid_dict(ResampleCache(), JsonlSource(log))
+    assert sorted(synced) == sorted(scratch)
+    for coin in scratch:
+        for resolution in LEVELS:
+            assert_bars(synced[coin].bars(resolution), scratch[coin].bars(resolution))
+
+def test_resolution_for_point_budget():
+    assert resolution_for(timedelta(hours=12)) == "1min"
+    assert resolution_for(timedelta(days=3)) == "5min"
+    assert resolution_for(timedelta(days=30)) == "1h"
+    assert resolution_for(timedelta(days=3650)) == "1d"  # Nothing fits: the coarsest
+
+def test_resolution_for_keeps_windows_predictable():
+    windows = {"1h horizon": "1h", "60min lookback": "60min"}
+    assert resolution_for(timedelta(days=30), windows=windows) == "15min"
+    assert resolution_for(timedelta(hours=6), windows=windows) == "1min"
+    for resolution in ("1min", "5min", "15min"):
+        check_resolution(resolution, windows)
+    assert all(pd.Timedelta(w) // pd.Timedelta("15min") >= MIN_WINDOW_BARS for w in windows.values())
+
+def test_check_resolution_hints_at_a_finer_level():
+    with pytest.raises(ValueError, match="1h horizon 1 bar.*use 15min bars or finer"):
+        check_resolution("1h", {"1h horizon": "1h"})
+    with pytest.raises(ValueError, match="no bar size is fine enough"):
+        check_resolution("1min", {"1min horizon": "1min"})
+    with pytest.raises(ValueError):
+        resolution_for(timedelta(days=30), windows={"1min horizon": "1min"})
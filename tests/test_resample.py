@@ -0,0 +1,101 @@
+# tests/test_resample.py
+
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from bench.synthetic import generate_log
+from storage.loader import load_dataframe
+from storage.price_store import PriceStore, convert_jsonl
+from storage.resample import JsonlSource, ResampleCache, StoreSource
+
+END = pd.Timestamp("2026-01-03 12:00")
+WINDOWS = [
+    (None, None),
+    ("2026-01-02 03:00:17", "2026-01-02 09:00:03"),
+    ("2026-01-01 20:59:59", None),
+    (None, "2026-01-02 00:00:30"),
+    ("2026-01-03 11:58:20", "2026-01-03 11:58:40"),
+]
+
+@pytest.fixture
+def log(tmp_path) -> str:
+    # Points jittered off the minute, so most windows cut through an edge bucket
+    path = str(tmp_path / "crypto_prices_log.jsonl")
+    generate_log(path, days=2.5, gap_rate=0.003, jitter_seconds=40, end=END.to_pydatetime(), seed=3)
+    return path
+
+def expected(path: str, start, end, resolution: str) -> dict[str, pd.Series]:
+    df = load_dataframe(path)
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= df.index >= pd.Timestamp(start)
+    if end is not None:
+        keep &= df.index <= pd.Timestamp(end)
+    df = df[keep]
+    series = {col.split(".")[1]: df[col].dropna() for col in df.columns}
+    return {coin: s.resample(resolution).mean().interpolate() for coin, s in series.items() if not s.empty}
+
+def assert_matches(path: str, cache: ResampleCache, start, end, resolution: str = "1min", source=None) -> None:
+    want = expected(path, start, end, resolution)
+    got = cache.series_dict(source or JsonlSource(path), start, end, resolution=resolution)
+    assert sorted(got) == sorted(want)
+    for coin, series in want.items():
+        assert (got[coin].index == series.index).all()
+        np.testing.assert_allclose(got[coin].to_numpy(), series.to_numpy(), rtol=1e-12)
+
+@pytest.mark.parametrize("resolution", ["1min", "3min", "1h"])
+@pytest.mark.parametrize("start, end", WINDOWS)
+def test_window_matches_resample(log, tmp_path, start, end, resolution):
+    assert_matches(log, ResampleCache(disk_dir=str(tmp_path / "cache")), start, end, resolution)
+    # A new process picks the grids up from disk
+    assert_matches(log, ResampleCache(disk_dir=str(tmp_path / "cache")), start, end, resolution)
+
+def test_appends_are_saved_as_deltas(log, tmp_path):
+    lines = open(log).readlines()
+    with open(log, "w") as f:
+        f.writelines(lines[:-120])
+    cache_dir = str(tmp_path / "cache")
+    start = "2026-01-03 02:00:13"
+    assert_matches(log, ResampleCache(disk_dir=cache_dir), start, None)
+
+    for chunk in (lines[-120:-60], lines[-60:]):
+        with open(log, "a") as f:
+            f.writelines(chunk)
+        assert_matches(log, ResampleCache(disk_dir=cache_dir), start, None)
+
+    # The grids start at the window's day, not at the start of the log
+    [entry] = os.listdir(cache_dir)
+    with open(os.path.join(cache_dir, entry, "meta.json")) as f:
+        meta = json.load(f)
+    assert meta["since"] == pd.Timestamp("2026-01-03").value
+    first_minute = meta["coins"]["bitcoin"]["first"][2][0]
+    assert pd.Timestamp(first_minute * 60 * 10**9) >= pd.Timestamp("2026-01-03")
+
+def test_earlier_window_rebuilds(log, tmp_path):
+    cache = ResampleCache(disk_dir=str(tmp_path / "cache"))
+    assert_matches(log, cache, "2026-01-03 02:00:13", None)
+    assert_matches(log, cache, "2026-01-01 13:00:13", None)
+
+def test_eviction_includes_the_served_source(log):
+    cache = ResampleCache(max_bytes=1)
+    first = cache.series_dict(JsonlSource(log), *WINDOWS[1])
+    assert cache.nbytes == 0
+    again = cache.series_dict(JsonlSource(log), *WINDOWS[1])
+    assert all(first[coin].equals(again[coin]) for coin in first)
+
+def test_store_coin_without_points_in_window(log, tmp_path):
+    # A store keeps a column for every coin; this one stops on the first day
+    records = [json.loads(line) for line in open(log)]
+    for record in records[:300]:
+        record["prices"]["ghostcoin"] = {"usd": 1.0}
+    with open(log, "w") as f:
+        f.writelines(json.dumps(record) + "\n" for record in records)
+    store = str(tmp_path / "crypto_prices_log.store")
+    convert_jsonl(log, store)
+
+    start, end = "2026-01-03 01:00:17", "2026-01-03 11:00:03"
+    cache = ResampleCache(disk_dir=str(tmp_path / "cache"))
+    assert_matches(log, cache, start, end, source=StoreSource(PriceStore(store)))
+    assert "ghostcoin" not in cache.series_dict(StoreSource(PriceStore(store)), start, end)
@@ -0,0 +1,121 @@
+# tests/test_ring.py
+
+import numpy as np
+import pandas as pd
+import pytest
+from storage.ring import LATE_MINUTES, MINUTE_NS, PriceRing
+
+COINS = [f"coin{i:02d}" for i in range(11)]  # Spans two bytes of the bitmask
+START = pd.Timestamp("2026-01-01").value // MINUTE_NS
+
+class Reference:
+    """
+    Every point per (minute, coin), trimmed to the ring's last `capacity`
+    minutes, with the ring's late-point rule.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.points: dict[tuple[int, str], list[float]] = {}
+        self.first: int | None = None  # First minute the ring opened
+        self.last: int | None = None
+
+    def extend(self, ts: np.ndarray, columns: dict[str, np.ndarray]) -> None:
+        minutes = ts // MINUTE_NS
+        newest = self.last
+        if self.first is None:
+            self.first = int(minutes.min())
+        for i, minute in enumerate(minutes):
+            if newest is not None and minute <= newest - LATE_MINUTES:
+                continue
+            for coin, values in columns.items():
+                if not np.isnan(values[i]):
+                    self.points.setdefault((int(minute), coin), []).append(values[i])
+        self.last = max([m for m in minutes if newest is None or m > newest - LATE_MINUTES] + [self.last or minutes[0]])
+        self.points = {k: v for k, v in self.points.items() if k[0] > self.last - self.capacity}
+
+    def minutes(self) -> np.ndarray:
+        first = self.last - self.capacity + 1
+        return np.arange(max(first, self.first), self.last + 1)
+
+    def value(self, minute: int, coin: str) -> float:
+        points = self.points.get((minute, coin))
+        return np.mean(points) if points else np.nan
+
+def feed(ring: PriceRing, reference: Reference, rng, minutes: int, batch: int = 7, late: bool = False) -> None:
+    minute = (reference.last or START) + 1
+    end = minute + minutes
+    while minute < end:
+        n = int(rng.integers(1, batch + 1))
+        ts = np.sort(rng.integers(minute * MINUTE_NS, (minute + n) * MINUTE_NS, size=2 * n))
+        if late:
+            ts = np.sort(np.r_[ts, (minute - rng.integers(1, 2 * LATE_MINUTES, size=3)) * MINUTE_NS])
+        columns = {coin: np.where(rng.random(len(ts)) < 0.3, np.nan, rng.uniform(1, 2, len(ts))) for coin in COINS}
+        ring.extend(ts, columns)
+        reference.extend(ts, columns)
+        minute += n
+
+def assert_same(ring: PriceRing, reference: Reference) -> None:
+    minutes = reference.minutes()
+    np.testing.assert_array_equal(ring.axis(), minutes)
+    for coin in COINS:
+        want = np.array([reference.value(m, coin) for m in minutes])
+        np.testing.assert_allclose(ring.window(coin), want, rtol=1e-12)
+        np.testing.assert_array_equal(ring.mask(coin), ~np.isnan(want))
+
+@pytest.mark.parametrize("late", [False, True])
+def test_wraparound_matches_reference(late):
+    # 40 minutes plus 10 spare rows, fed 600 minutes: many compactions
+    rng = np.random.default_rng(1)
+    ring = PriceRing(40, coins=COINS[:3], dtype=np.float64, slack=10)
+    reference = Reference(40)
+    for _ in range(60):
+        feed(ring, reference, rng, minutes=10, late=late)
+        assert len(ring) <= 40
+        assert_same(ring, reference)
+
+def test_mask_tracks_each_coin_bit():
+    ring = PriceRing(20, dtype=np.float64)
+    ts = (START + np.arange(5)) * MINUTE_NS
+    for j, coin in enumerate(COINS):
+        # coin j has a point in minute j % 5 only
+        ring.extend(ts, {coin: np.where(np.arange(5) == j % 5, 1.0 + j, np.nan)})
+    for j, coin in enumerate(COINS):
+        np.testing.assert_array_equal(ring.mask(coin), np.arange(5) == j % 5)
+        assert ring.window(coin)[j % 5] == 1.0 + j
+
+def test_reads_across_the_compaction_point():
+    rng = np.random.default_rng(2)
+    ring = PriceRing(30, coins=COINS, dtype=np.float64, slack=10)
+    reference = Reference(30)
+    # One minute per batch: 40 rows fill up exactly, then the 41st minute compacts
+    feed(ring, reference, rng, minutes=37, batch=1)
+    oldest = ring.minutes[0]
+    feed(ring, reference, rng, minutes=8, batch=1)
+    assert ring.minutes[0] > oldest  # The spare rows ran out and live rows moved back
+
+    minutes = reference.minutes()
+    for i0, i1 in [(0, len(minutes) - 1), (5, 25), (len(minutes) - 12, len(minutes) - 1)]:
+        start, end = pd.Timestamp(minutes[i0] * MINUTE_NS), pd.Timestamp(minutes[i1] * MINUTE_NS)
+        for coin in COINS:
+            full = pd.Series([reference.value(m, coin) for m in minutes],
+                             index=pd.to_datetime(minutes * MINUTE_NS)).interpolate(limit_area="inside")
+            points = np.array([reference.value(m, coin) for m in minutes])
+            valid = full.index[i0:i1 + 1][~np.isnan(points[i0:i1 + 1])]
+            got = ring.series(coin, start, end)
+            if not len(valid):
+                assert got is None
+                continue
+            # Leading gaps are filled when the coin has an earlier point in the ring
+            first = start if (~np.isnan(points[:i0])).any() else valid[0]
+            want = full[first:valid[-1]]
+            np.testing.assert_array_equal(got.index, want.index)
+            np.testing.assert_allclose(got.to_numpy(), want.to_numpy(), rtol=1e-12)
+
+def test_gap_longer_than_capacity_starts_over():
+    ring = PriceRing(10, coins=["a"], dtype=np.float64)
+    ring.extend(np.array([START * MINUTE_NS]), {"a": np.array([1.0])})
+    ring.extend(np.array([(START + 25) * MINUTE_NS]), {"a": np.array([2.0])})
+    np.testing.assert_array_equal(ring.axis(), np.arange(START + 16, START + 26))
+    assert ring.mask("a").sum() == 1
+    assert ring.window("a")[-1] == 2.0
@@ -0,0 +1,148 @@
+# tests/test_scan.py
+
+import asyncio
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import runners.scan as scan_module
+from runners.scan import scan
+from storage.loader import load_dataframe, partitions_path_for
+from storage.partitioned import PartitionedLog
+from storage.price_store import PriceStore
+from storage.writer import BufferedLogWriter
+
+COINS = [f"coin{i}" for i in range(7)]
+
+class PriceStub:
+    """
+    A local price endpoint: answers {coin: {"usd": price}} for the requested
+    ids, failing the first `failures[coin]` requests that include `coin`.
+    """
+
+    def __init__(self, failures: dict[str, int] | None = None):
+        self.failures = dict(failures or {})
+        self.requests: list[list[str]] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                ids = parse_qs(urlparse(self.path).query)["ids"][0].split(",")
+                stub.requests.append(ids)
+                failing = [coin for coin in ids if stub.failures.get(coin, 0) > 0]
+                for coin in failing:
+                    stub.failures[coin] -= 1
+                body = b"{}" if failing else json.dumps({coin: {"usd": 1.0 + len(coin)} for coin in ids}).encode()
+                self.send_response(500 if failing else 200)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/price"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    stubs = []
+
+    def make(failures=None) -> PriceStub:
+        stubs.append(PriceStub(failures))
+        return stubs[-1]
+
+    yield make
+    for s in stubs:
+        s.close()
+
+def logged(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+def test_batches_cover_every_coin_each_tick(stub, tmp_path):
+    server = stub()
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    writer = BufferedLogWriter(log, flush_interval=3600)
+    asyncio.run(scan(COINS, writer, api_url=server.url, interval=0.2, batch_size=3, max_ticks=3))
+    assert not (tmp_path / "crypto_prices_log.jsonl").exists()  # Still buffered
+    writer.close()
+
+    assert sorted(map(len, server.requests)) == [1, 1, 1, 3, 3, 3, 3, 3, 3]
+    records = logged(log)
+    assert len(records) == 3
+    for record in records:
+        assert record["prices"] == {coin: {"usd": 1.0 + len(coin)} for coin in COINS}
+
+def test_failed_batch_retries_within_the_tick(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_module, "RETRY_BASE", 0.01)
+    server = stub({"coin0": 2})
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    writer = BufferedLogWriter(log, flush_interval=0)
+    asyncio.run(scan(COINS, writer, api_url=server.url, interval=5, batch_size=3, retries=3, max_ticks=1))
+
+    assert sum("coin0" in ids for ids in server.requests) == 3
+    [record] = logged(log)
+    assert sorted(record["prices"]) == COINS
+
+def test_batch_dropped_when_retries_run_out(stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(scan_module, "RETRY_BASE", 0.01)
+    server = stub({"coin0": 100})
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    writer = BufferedLogWriter(log, flush_interval=0)
+    asyncio.run(scan(COINS, writer, api_url=server.url, interval=5, batch_size=3, retries=2, max_ticks=1))
+
+    assert sum("coin0" in ids for ids in server.requests) == 3
+    [record] = logged(log)
+    assert sorted(record["prices"]) == COINS[3:]  # The other batches still made it
+
+def test_retry_that_would_miss_the_next_tick_is_dropped(stub, tmp_path):
+    # The first retry waits RETRY_BASE seconds, longer than the whole tick
+    server = stub({"coin0": 100})
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    writer = BufferedLogWriter(log, flush_interval=0)
+    asyncio.run(scan(COINS, writer, api_url=server.url, interval=0.3, batch_size=3, retries=3, max_ticks=2))
+
+    assert sum("coin0" in ids for ids in server.requests) == 2  # Once per tick
+    assert [sorted(r["prices"]) for r in logged(log)] == [COINS[3:], COINS[3:]]
+
+def record(minute: int) -> dict:
+    return {"timestamp": f"2026-01-01T00:{minute:02d}:00", "prices": {"btc": {"usd": 1.0 + minute}}}
+
+def test_writer_flushes_to_log_and_store(tmp_path):
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    store = PriceStore(str(tmp_path / "crypto_prices_log.store"), create=True)
+    writer = BufferedLogWriter(log, store=store, flush_interval=3600)
+    for minute in range(5):
+        writer.write(record(minute))
+    writer.flush_if_due()
+    assert len(store) == 0 and not (tmp_path / "crypto_prices_log.jsonl").exists()
+
+    writer.close()
+    assert logged(log) == [record(minute) for minute in range(5)]
+    assert list(PriceStore(store.path).column("btc")) == [1.0 + minute for minute in range(5)]
+
+    # A record the store already has is skipped there, but still logged
+    writer.write(record(4))
+    writer.write(record(5))
+    writer.close()
+    assert len(logged(log)) == 7
+    assert len(PriceStore(store.path)) == 5
+
+def test_writer_appends_to_partitions(tmp_path):
+    log = str(tmp_path / "crypto_prices_log.jsonl")
+    partitions = PartitionedLog(partitions_path_for(log), create=True)
+    writer = BufferedLogWriter(log, flush_interval=0, partitions=partitions)
+    for minute in range(3):
+        writer.write(record(minute))
+    writer.close()
+
+    assert not (tmp_path / "crypto_prices_log.jsonl").exists()
+    assert PartitionedLog(partitions.path).read_records() == [record(minute) for minute in range(3)]
+    assert list(load_dataframe(log)["prices.btc.usd"]) == [1.0, 2.0, 3.0]
@@ -0,0 +1,87 @@
+# tests/test_tail.py
+
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from bench.synthetic import generate_log
+from storage.loader import load_series_dict, partitions_path_for
+from storage.partitioned import PartitionedLog, split_jsonl
+from storage.tail import JsonlTail, seek_timestamp
+
+@pytest.fixture
+def log(tmp_path) -> str:
+    path = str(tmp_path / "crypto_prices_log.jsonl")
+    generate_log(path, days=0.5, gap_rate=0.005, drop_rate=0.05, seed=4)
+    return path
+
+def test_seek_timestamp_matches_a_scan(log):
+    lines = open(log, "rb").readlines()
+    offsets = np.cumsum([0] + [len(line) for line in lines])
+    stamps = [pd.Timestamp(json.loads(line)["timestamp"]) for line in lines]
+    # A line still being written is not read past
+    with open(log, "ab") as f:
+        f.write(b'{"timestamp": "2099-01-01T00:00:00", "pri')
+
+    rng = np.random.default_rng(0)
+    targets = [stamps[0] - pd.Timedelta("1h"), stamps[-1] + pd.Timedelta("1h"), *stamps[::97],
+               *(stamps[0] + pd.Timedelta(seconds=int(s)) for s in rng.integers(0, 12 * 3600, 50))]
+    for target in targets:
+        first = next((i for i, t in enumerate(stamps) if t >= target), len(lines))
+        assert seek_timestamp(log, target) == offsets[first]
+
+def assert_tail_matches(tail: JsonlTail, log: str, hours: float) -> None:
+    want = load_series_dict(log, hours=hours, end=tail.latest_timestamp, cache=False)
+    got = tail.series_dict()
+    assert sorted(got) == sorted(want)
+    first = tail.latest_timestamp - pd.Timedelta(hours=hours)
+    for coin, series in want.items():
+        # The tail's window starts at the first whole minute, and fills the
+        # minutes before a coin's first point from the points kept before it
+        assert got[coin].index[0] <= max(series.index[0], first.ceil("1min"))
+        start = max(series.index[0], got[coin].index[0])
+        np.testing.assert_allclose(got[coin][start:].to_numpy(), series[start:].to_numpy(), rtol=1e-12)
+        assert got[coin].index[-1] == series.index[-1]
+
+def test_polls_follow_appends(log):
+    lines = open(log).readlines()
+    with open(log, "w") as f:
+        f.writelines(lines[:300])
+    tail = JsonlTail(log, hours=2, dtype=np.float64)
+    assert tail.poll() > 0
+    assert_tail_matches(tail, log, 2)
+
+    for i in range(300, len(lines), 70):
+        chunk = "".join(lines[i:i + 70])
+        with open(log, "a") as f:
+            f.write(chunk[:-20])  # Last line only partly written
+        polled = tail.poll()
+        with open(log, "a") as f:
+            f.write(chunk[-20:])
+        assert polled + tail.poll() == len(lines[i:i + 70])
+        assert_tail_matches(tail, log, 2)
+    assert tail.poll() == 0
+
+def test_truncated_log_starts_over(log):
+    tail = JsonlTail(log, hours=1, dtype=np.float64)
+    tail.poll()
+    lines = open(log).readlines()
+    with open(log, "w") as f:
+        f.writelines(lines[:100])
+    assert tail.poll() > 0
+    assert tail.latest_timestamp == pd.Timestamp(json.loads(lines[99])["timestamp"])
+    assert_tail_matches(tail, log, 1)
+
+def test_follows_a_partitioned_log(log):
+    lines = open(log).readlines()
+    with open(log, "w") as f:
+        f.writelines(lines[:400])
+    split_jsonl(log, partitions_path_for(log))
+    tail = JsonlTail(log, hours=2, dtype=np.float64)
+    tail.poll()
+
+    partitions = PartitionedLog(partitions_path_for(log))
+    for i in range(400, len(lines), 90):
+        partitions.append_records([json.loads(line) for line in lines[i:i + 90]])
+        assert tail.poll() == len(lines[i:i + 90])
+        assert_tail_matches(tail, log, 2)
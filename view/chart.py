@@ -0,0 +1,284 @@
+# view/chart.py
+
+import numpy as np
+import pandas as pd
+import matplotlib.dates as mdates
+import matplotlib.ticker as tickr
+
+HEADROOM = 0.1  # Fraction of the window / price range kept free beyond the data when limits are reset
+
+def classify_trend(x, threshold=0):
+    if x > threshold:
+        return 'up'
+    elif x < -threshold:
+        return 'down'
+    else:
+        return 'flat'
+
+def trend_frame(btc_slice: pd.Series) -> pd.DataFrame:
+    """
+    Price, momentum, acceleration and up/down/flat trend per point, with
+    `trend_shift` marking the points where the trend changes.
+    """
+    velocity = btc_slice.diff()
+    acceleration = velocity.diff()
+
+    trend_df = pd.DataFrame({
+        'price': btc_slice,
+        'momentum': velocity,
+        'acceleration': acceleration
+    })
+    trend_df['trend'] = trend_df['momentum'].apply(classify_trend)
+    trend_df['trend_shift'] = trend_df['trend'].ne(trend_df['trend'].shift())
+    return trend_df
+
+def decimate(series: pd.Series, buckets: int) -> pd.Series:
+    """
+    Min/max decimation to at most 2 * `buckets` points: the series is split
+    into `buckets` runs of consecutive points and only the lowest and
+    highest point of each run is kept, in time order. With one run per
+    pixel column the drawn line looks the same, spikes included.
+
+    Gaps stay gaps: a run of only NaNs keeps a NaN point.
+    """
+    n = len(series)
+    if buckets < 1 or n <= 2 * buckets:
+        return series
+
+    size = -(-n // buckets)
+    values = np.full(size * buckets, np.nan)
+    values[:n] = series.to_numpy(dtype=float)
+    runs = values.reshape(buckets, size)
+    missing = np.isnan(runs)
+
+    offsets = np.arange(buckets) * size
+    lows = np.where(missing, np.inf, runs).argmin(axis=1) + offsets
+    highs = np.where(missing, -np.inf, runs).argmax(axis=1) + offsets
+    keep = np.unique(np.concatenate((lows, highs)))
+    return series.iloc[keep[keep < n]]
+
+def _dates(index: pd.Index) -> np.ndarray:
+    return mdates.date2num(index.to_numpy()) if len(index) else np.empty(0)
+
+class FullChart:
+    """
+    The chart redrawn from scratch on every update: the axes is cleared,
+    every artist re-created and the layout recomputed. Kept as the
+    reference the blitted chart is compared against.
+    """
+
+    def __init__(self, fig, ax, hours: int):
+        self.fig = fig
+        self.ax = ax
+        self.hours = hours
+
+    def update(self, sliced_coins: dict[str, pd.Series], peaks: pd.Index, valleys: pd.Index,
+               best: str | None, end_time: pd.Timestamp) -> None:
+        ax = self.ax
+        btc_slice = sliced_coins['bitcoin']
+        trend_df = trend_frame(btc_slice)
+
+        ax.clear()
+        ax.yaxis.set_major_formatter(tickr.PercentFormatter(xmax=1.0))
+
+        for coin, series in sliced_coins.items():
+            if coin == 'bitcoin':
+                continue
+
+            style = {'linewidth': 1.2, 'alpha': 0.4}
+            if coin == best:
+                style = {'linewidth': 2.5, 'alpha': 0.9, 'linestyle': '--'}
+
+            ax.plot(series.index, series.values, label=coin.capitalize(), **style)
+
+        # Plot BTC itself
+        ax.plot(btc_slice.index, btc_slice.values, label='Bitcoin', color='blue', linewidth=2.5, zorder=5)
+        ax.plot(btc_slice.rolling(5).mean(), label='Smoothed BTC', color='gray', linestyle='--')
+
+        ax.plot(peaks, btc_slice[peaks], 'g^', label='BTC Peaks')
+        ax.plot(valleys, btc_slice[valleys], 'rv', label='BTC Valleys')
+
+        ax.scatter(trend_df[trend_df['trend'] == 'up'].index,
+                   trend_df[trend_df['trend'] == 'up']['price'],
+                   color='limegreen', s=30, label='BTC Uptrend', zorder=3)
+        ax.scatter(trend_df[trend_df['trend'] == 'down'].index,
+                   trend_df[trend_df['trend'] == 'down']['price'],
+                   color='red', s=30, label='BTC Downtrend', zorder=3)
+        ax.scatter(trend_df[trend_df['trend_shift']].index,
+                   trend_df[trend_df['trend_shift']]['price'],
+                   color='purple', s=50, marker='x', label='BTC Trend Shift')
+
+        ax.set_title(f'Crypto % Change — Last {self.hours} Hours (Updated: {end_time:%Y-%m-%d %H:%M:%S})')
+        ax.legend(loc='upper left', ncol=2, fontsize='small')
+        self.fig.tight_layout()
+        self.fig.canvas.draw_idle()
+
+class BlitChart:
+    """
+    The same chart with its artists created once and updated in place.
+
+    Each update sets new data on the existing lines and markers, decimated
+    to about two points per pixel column. The axes limits are only reset
+    (with HEADROOM to spare) when the data leaves them or shrinks to less
+    than half of them; then the static parts (axes, ticks, legend) are
+    drawn once and saved. Every other update restores that background and
+    redraws just the data artists (blitting), skipping layout and ticks.
+
+    On canvases without blitting support the artists are still reused and
+    the figure is redrawn normally.
+    """
+
+    def __init__(self, fig, ax, hours: int):
+        self.fig = fig
+        self.ax = ax
+        self.hours = hours
+        self.blit = fig.canvas.supports_blit
+        self.lines = {}
+        self.best = None
+        self.limits = None
+        self.stale = True        # Limits or legend changed: the background needs a full draw
+        self.background = None
+
+        ax.set_title(f'Crypto % Change — Last {hours} Hours')
+        ax.yaxis.set_major_formatter(tickr.PercentFormatter(xmax=1.0))
+        ax.xaxis_date()
+
+        animated = {'animated': self.blit}
+        self.btc = ax.plot([], [], label='Bitcoin', color='blue', linewidth=2.5, zorder=5, **animated)[0]
+        self.smoothed = ax.plot([], [], label='Smoothed BTC', color='gray', linestyle='--', **animated)[0]
+        self.peaks = ax.plot([], [], 'g^', label='BTC Peaks', **animated)[0]
+        self.valleys = ax.plot([], [], 'rv', label='BTC Valleys', **animated)[0]
+        # Markers as lines without a line: set_data is cheaper than scatter offsets + sizes
+        self.up = ax.plot([], [], 'o', color='limegreen', markersize=np.sqrt(30), label='BTC Uptrend',
+                          zorder=3, **animated)[0]
+        self.down = ax.plot([], [], 'o', color='red', markersize=np.sqrt(30), label='BTC Downtrend',
+                            zorder=3, **animated)[0]
+        self.shift = ax.plot([], [], 'x', color='purple', markersize=np.sqrt(50), label='BTC Trend Shift',
+                             **animated)[0]
+        self.stamp = ax.text(0.99, 0.02, '', transform=ax.transAxes, ha='right', va='bottom',
+                             fontsize='small', **animated)
+
+        # Any full draw (ours, a resize, the toolbar) refreshes the saved background
+        fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event) -> None:
+        if self.blit:
+            self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+            self._draw_artists()
+
+    def _draw_artists(self) -> None:
+        # draw_artist ignores zorder, so draw in the order a full draw would
+        for artist in sorted(self._artists(), key=lambda a: a.get_zorder()):
+            self.ax.draw_artist(artist)
+
+    def _artists(self) -> list:
+        return [*self.lines.values(), self.smoothed, self.btc, self.peaks, self.valleys,
+                self.up, self.down, self.shift, self.stamp]
+
+    def _line(self, coin: str):
+        if coin not in self.lines:
+            self.lines[coin] = self.ax.plot([], [], label=coin.capitalize(), linewidth=1.2, alpha=0.4,
+                                            animated=self.blit)[0]
+            self.stale = True  # New legend entry
+        return self.lines[coin]
+
+    def _style(self, best: str | None) -> None:
+        for coin, line in self.lines.items():
+            if coin == best:
+                line.set(linewidth=2.5, alpha=0.9, linestyle='--')
+            else:
+                line.set(linewidth=1.2, alpha=0.4, linestyle='-')
+        self.best = best
+        self.stale = True  # Legend shows the highlighted coin
+
+    def _fit(self, sliced_coins: dict[str, pd.Series]) -> None:
+        start = min(s.index[0] for s in sliced_coins.values())
+        end = max(s.index[-1] for s in sliced_coins.values())
+        low = min(np.nanmin(s.to_numpy(dtype=float)) for s in sliced_coins.values())
+        high = max(np.nanmax(s.to_numpy(dtype=float)) for s in sliced_coins.values())
+        x0, x1 = mdates.date2num(start), mdates.date2num(end)
+
+        if self.limits is not None:
+            lx0, lx1, ly0, ly1 = self.limits
+            inside = lx0 <= x0 and x1 <= lx1 and ly0 <= low and high <= ly1
+            if inside and high - low >= (ly1 - ly0) / 2:
+                return
+
+        span = max(x1 - x0, 1 / 1440)
+        pad = max(high - low, 1e-4) * HEADROOM
+        self.limits = (x0, x1 + span * HEADROOM, low - pad, high + pad)
+        self.stale = True
+
+    def update(self, sliced_coins: dict[str, pd.Series], peaks: pd.Index, valleys: pd.Index,
+               best: str | None, end_time: pd.Timestamp) -> None:
+        ax = self.ax
+        btc_slice = sliced_coins['bitcoin']
+        buckets = max(1, int(ax.get_window_extent().width))
+
+        for coin, series in sliced_coins.items():
+            if coin == 'bitcoin':
+                continue
+            series = decimate(series, buckets)
+            self._line(coin).set_data(_dates(series.index), series.to_numpy())
+        for coin in self.lines.keys() - sliced_coins.keys():
+            self.lines[coin].set_data([], [])
+        if best != self.best:
+            self._style(best)
+
+        btc = decimate(btc_slice, buckets)
+        smoothed = decimate(btc_slice.rolling(5).mean(), buckets)
+        self.btc.set_data(_dates(btc.index), btc.to_numpy())
+        self.smoothed.set_data(_dates(smoothed.index), smoothed.to_numpy())
+        self.peaks.set_data(_dates(peaks), btc_slice[peaks].to_numpy())
+        self.valleys.set_data(_dates(valleys), btc_slice[valleys].to_numpy())
+
+        # Trend markers only at the points the BTC line keeps
+        trend_df = trend_frame(btc_slice).loc[btc.index]
+        for artist, mask in ((self.up, trend_df['trend'] == 'up'),
+                             (self.down, trend_df['trend'] == 'down'),
+                             (self.shift, trend_df['trend_shift'])):
+            marked = trend_df.loc[mask, 'price']
+            artist.set_data(_dates(marked.index), marked.to_numpy())
+        self.stamp.set_text(f'Updated: {end_time:%Y-%m-%d %H:%M:%S}')
+
+        self._fit(sliced_coins)
+        self.draw()
+
+    def draw(self) -> None:
+        canvas = self.fig.canvas
+        if self.stale:
+            ax = self.ax
+            ax.set_xlim(self.limits[0], self.limits[1])
+            ax.set_ylim(self.limits[2], self.limits[3])
+            handles = [*self.lines.values(), self.btc, self.smoothed, self.peaks, self.valleys,
+                       self.up, self.down, self.shift]
+            legend = ax.legend(handles=handles, loc='upper left', ncol=2, fontsize='small')
+            for handle in legend.legend_handles:
+                handle.set_animated(False)  # Copied from the animated lines, but part of the background
+            self.fig.tight_layout()
+            self.stale = False
+            if self.blit:
+                canvas.draw()  # Saves the background and draws the artists (_on_draw)
+                canvas.blit(self.fig.bbox)
+                return
+
+        if not self.blit or self.background is None:
+            canvas.draw_idle()
+            return
+
+        canvas.restore_region(self.background)
+        self._draw_artists()
+        canvas.blit(self.fig.bbox)
+
+CHARTS = {"blit": BlitChart, "full": FullChart}
+
+def make_chart(fig, ax, hours: int, render: str = "blit"):
+    return CHARTS[render](fig, ax, hours)
+
+def frame_image(fig) -> np.ndarray:
+    """
+    The canvas as last drawn (RGBA), without drawing it again. Saving
+    this instead of `fig.savefig` keeps headless frames as cheap as the
+    update that produced them.
+    """
+    return np.asarray(fig.canvas.buffer_rgba())